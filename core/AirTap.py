@@ -0,0 +1,258 @@
+"""
+Air-tap clicks: a quick forward-and-down flick of the pointing index finger.
+
+The pinch click needs the middle finger raised and brought against the index
+fingertip, and that pose change drags the cursor off target before the click
+lands. An air tap keeps the pointing pose. AirTapDetector follows one number
+per frame, the index tip's stroke relative to its knuckle in hand-size units:
+
+    stroke = ((tip.y - knuckle.y) - (tip.z - knuckle.z)) / scale
+
+It rises when the tip moves down in the image or toward the camera (MediaPipe
+z shrinks toward the camera). The detector reads the raw landmarks: the
+smoothing filter would delay the peak by a frame or two, and the stroke is
+measured against the hand's own knuckle, so moving the whole hand never looks
+like a tap.
+
+    idle      the stroke speed exceeds onsetSpeed: a stroke starts, and its
+              onset is the previous frame
+    stroke    the stroke stops rising: that is the peak. A peak between
+              minTravel and maxTravel above the onset, reached within
+              maxStroke, is a tap ("press"). Slower strokes, small twitches
+              and the finger curling into another pose are ignored
+    pressed   "release" once the finger is halfway back up, or releaseAfter
+              seconds after the press at the latest
+
+The controller freezes the cursor while a stroke is in progress. It puts the
+cursor back where it was at the stroke's onset before pressing, so the tap's
+own movement never moves the click.
+
+    python core/AirTap.py   # tap vs pinch on synthesized sessions: latency and cursor error
+"""
+import math
+
+
+class AirTapDetector():
+    def __init__(self, onsetSpeed=3.0, minTravel=0.3, maxTravel=1.0, maxStroke=0.25, releaseAfter=0.12,
+                 cooldown=0.15):
+        self.onsetSpeed = onsetSpeed  # hand sizes per second
+        self.minTravel = minTravel  # hand sizes between onset and peak
+        self.maxTravel = maxTravel  # more is the finger curling into another pose
+        self.maxStroke = maxStroke  # seconds from onset to peak
+        self.releaseAfter = releaseAfter
+        self.cooldown = cooldown  # seconds after a release before the next onset
+        self.reset()
+
+    def reset(self):
+        self.state = "idle"
+        self.prevTime = self.prevStroke = None
+        self.onsetTime = self.onsetStroke = 0.0
+        self.peakTime = self.peakStroke = 0.0
+        self.pressTime = 0.0
+        self.readyAt = 0.0
+        self.taps = 0
+        self.rejected = 0
+
+    @property
+    def active(self):
+        """A stroke or a press is in progress: hold the cursor still."""
+        return self.state != "idle"
+
+    @staticmethod
+    def strokeOf(hand):
+        """Index tip stroke of one hand's (21, 3) normalized landmarks, in hand sizes."""
+        scale = math.hypot(hand[9, 0] - hand[0, 0], hand[9, 1] - hand[0, 1])
+        if scale <= 0:
+            return None
+        return ((hand[8, 1] - hand[5, 1]) - (hand[8, 2] - hand[5, 2])) / scale
+
+    def update(self, hand, t):
+        """Feed the pointer hand's raw landmarks (None: no hand) at capture time t.
+        Returns "press", "release" or None."""
+        stroke = None if hand is None else self.strokeOf(hand)
+        if stroke is None:
+            event = "release" if self.state == "pressed" else None
+            self.state = "idle"
+            self.prevTime = self.prevStroke = None
+            return event
+
+        prevTime, prevStroke = self.prevTime, self.prevStroke
+        self.prevTime, self.prevStroke = t, stroke
+        if prevTime is None or t <= prevTime:
+            return None
+        speed = (stroke - prevStroke) / (t - prevTime)
+
+        if self.state == "idle":
+            if speed > self.onsetSpeed and t >= self.readyAt:
+                self.state = "stroke"
+                self.onsetTime, self.onsetStroke = prevTime, prevStroke
+                self.peakTime, self.peakStroke = t, stroke
+            return None
+
+        if self.state == "stroke":
+            if stroke > self.peakStroke:
+                self.peakTime, self.peakStroke = t, stroke
+                if t - self.onsetTime > self.maxStroke:
+                    # a slow push, not a tap
+                    self.state = "idle"
+                    self.rejected += 1
+                return None
+            # past the peak
+            if self.minTravel <= self.peakStroke - self.onsetStroke <= self.maxTravel:
+                self.state = "pressed"
+                self.pressTime = t
+                self.taps += 1
+                return "press"
+            self.state = "idle"
+            self.rejected += 1
+            return None
+
+        # pressed
+        halfway = self.peakStroke - 0.5 * (self.peakStroke - self.onsetStroke)
+        if stroke <= halfway or t - self.pressTime >= self.releaseAfter:
+            self.state = "idle"
+            self.readyAt = t + self.cooldown
+            return "release"
+        return None
+
+
+# hand template in hand sizes (wrist to middle knuckle = 1), image axes (y down),
+# pointing pose: index up, the other fingers curled, thumb tucked beside the palm
+_TEMPLATE = [
+    (0.0, 0.0), (-0.35, -0.25), (-0.5, -0.5), (-0.55, -0.75), (-0.5, -0.95),  # wrist, thumb
+    (-0.3, -0.95), (-0.32, -1.35), (-0.33, -1.6), (-0.34, -1.8),  # index
+    (0.0, -1.0), (0.0, -1.3), (0.02, -1.1), (0.02, -0.95),  # middle, curled
+    (0.25, -0.95), (0.25, -1.2), (0.26, -1.02), (0.26, -0.9),  # ring, curled
+    (0.45, -0.85), (0.45, -1.05), (0.46, -0.92), (0.46, -0.82),  # pinky, curled
+]
+
+
+def synthesizeClicks(path, method, fps=30.0, clicks=12, handSize=0.2, noise=0.0015, seed=0):
+    """A recording of a hand gliding between targets and clicking at each with
+    method "tap" or "pinch". Returns the capture times at which each click
+    gesture starts; the cursor should click where it was at those times."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    template = np.zeros((21, 3))
+    template[:, :2] = _TEMPLATE
+    period = 1.4  # seconds per target: glide, settle, click
+    n = int(clicks * period * fps) + int(fps)
+    t = np.arange(n) / fps
+    landmarks = np.repeat(template[None], n, axis=0)
+    onsets = []
+
+    # wrist path: glide to each target, stop, click
+    targets = rng.uniform([0.35, 0.55], [0.65, 0.8], (clicks + 1, 2))
+    wrist = np.zeros((n, 2))
+    for k in range(clicks):
+        start = k * period
+        inSegment = (t >= start) & (t < start + period)
+        glide = np.clip((t[inSegment] - start) / 0.6, 0, 1)
+        glide = glide * glide * (3 - 2 * glide)  # ease in and out
+        wrist[inSegment] = targets[k] + (targets[k + 1] - targets[k]) * glide[:, None]
+        onsets.append(start + 0.8 + rng.uniform(0, 0.1))
+    wrist[t >= clicks * period] = targets[clicks]
+
+    for onset in onsets:
+        u = t - onset
+        if method == "tap":
+            # tip flicks down and toward the camera in ~80 ms and comes back in ~100 ms
+            down = np.clip(u / 0.08, 0, 1)
+            up = np.clip((u - 0.08) / 0.1, 0, 1)
+            depth = np.sin(0.5 * np.pi * down) * (1 - up * up * (3 - 2 * up))
+            depth[u < 0] = 0
+            landmarks[:, 8, 1] += 0.3 * depth
+            landmarks[:, 8, 2] -= 0.35 * depth
+            landmarks[:, 7, 1] += 0.12 * depth
+            landmarks[:, 7, 2] -= 0.15 * depth
+        else:
+            # middle finger straightens over 200 ms and presses against the index tip,
+            # pulling the index toward it; held 100 ms, then curled again
+            rise = np.clip(u / 0.2, 0, 1)
+            fall = np.clip((u - 0.3) / 0.2, 0, 1)
+            k = rise * rise * (3 - 2 * rise) * (1 - fall * fall * (3 - 2 * fall))
+            k[u < 0] = 0
+            up = np.array([(-0.02, -1.0), (-0.06, -1.38), (-0.12, -1.62), (-0.24, -1.8)])
+            landmarks[:, 9:13, :2] += k[:, None, None] * (up - template[9:13, :2])[None]
+            landmarks[:, 8, 0] += 0.07 * k
+            landmarks[:, 7, 0] += 0.04 * k
+
+    # hand size -> frame units (x is scaled for the 4:3 frame), then place the hand
+    frame = np.zeros((n, 1, 21, 3), dtype=np.float32)
+    frame[:, 0, :, 0] = wrist[:, None, 0] + landmarks[:, :, 0] * handSize * 0.75
+    frame[:, 0, :, 1] = wrist[:, None, 1] + landmarks[:, :, 1] * handSize
+    frame[:, 0, :, 2] = landmarks[:, :, 2] * handSize * 0.75
+    frame += rng.normal(0, noise, frame.shape).astype(np.float32)
+    np.savez_compressed(path, timestamps=t, landmarks=frame, present=np.ones((n, 1), dtype=bool),
+                        handedness=np.full((n, 1), 2, dtype=np.uint8), frameSize=np.array([640, 480]))
+    return onsets
+
+
+def evaluate(path, onsets, airTap, fps=30.0, window=0.6):
+    """Replay a click session in gaming mode; latency and cursor error of each intended click."""
+    import numpy as np
+
+    from Backends import RecordingBackend
+    from Pipeline import runMode
+
+    backend = RecordingBackend()
+    runMode("gaming", source=path, backend=backend, settings={"cursorRate": 0, "airTap": airTap})
+    # replays are stamped on the local clock; frame numbers map back onto the session's times
+    moves = [(frame / fps, args) for frame, _, _, action, args in backend.events if action == "move"]
+    presses = [(frame / fps, action) for frame, _, _, action, _ in backend.events
+               if action in ("click", "mouseDown")]
+    moveTimes = np.array([ft for ft, _ in moves])
+
+    def cursorAt(time, before=False):
+        # the pointer after the frame at time (before=True: the position the frame started from)
+        i = int(np.searchsorted(moveTimes, time, side="left" if before else "right")) - 1
+        return np.array(moves[max(i, 0)][1], dtype=float) if moves else np.zeros(2)
+
+    latencies, errors = [], []
+    matched = 0
+    for onset in onsets:
+        hits = [ft for ft, _ in presses if onset <= ft <= onset + window]
+        if not hits:
+            continue
+        matched += 1
+        latencies.append(1000 * (hits[0] - onset))
+        errors.append(float(np.hypot(*(cursorAt(hits[0]) - cursorAt(onset, before=True)))))
+    spurious = len(presses) - matched
+    return {
+        "clicks": matched,
+        "missed": len(onsets) - matched,
+        "spurious": spurious,
+        "latency_ms": float(np.median(latencies)) if latencies else None,
+        "cursorError_px": float(np.median(errors)) if errors else None,
+        "cursorErrorMax_px": float(max(errors)) if errors else None,
+    }
+
+
+def main(argv=None):
+    import argparse
+    import os
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Air tap vs pinch click on synthesized gaming sessions.")
+    parser.add_argument("--clicks", type=int, default=12)
+    parser.add_argument("--fps", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for method in ("pinch", "tap"):
+            path = os.path.join(tmp, f"{method}.npz")
+            onsets = synthesizeClicks(path, method, fps=args.fps, clicks=args.clicks)
+            results[method] = evaluate(path, onsets, airTap=method == "tap", fps=args.fps)
+            # each detector on the session it was not made for, too
+            results[f"{method} session, other method"] = evaluate(path, onsets, airTap=method != "tap",
+                                                                  fps=args.fps)
+
+    for name, stats in results.items():
+        print(f"[AirTap] {name}: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
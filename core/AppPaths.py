@@ -0,0 +1,23 @@
+"""
+Per-user data location for profiles, caches and metrics logs.
+
+%APPDATA%\GestureMouse on Windows, ~/.gesture_mouse elsewhere. Set
+GESTURE_MOUSE_HOME to override (handy for tests and portable installs).
+"""
+import os
+
+
+def userDataDir():
+    root = os.environ.get("GESTURE_MOUSE_HOME")
+    if not root:
+        appData = os.environ.get("APPDATA")
+        root = os.path.join(appData, "GestureMouse") if appData else os.path.expanduser("~/.gesture_mouse")
+    return root
+
+
+def userDataPath(*parts, create=True):
+    """Path under the user data dir; creates the parent directory by default."""
+    path = os.path.join(userDataDir(), *parts)
+    if create:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,118 @@
+"""
+Output backends.
+
+A backend is where a mode's actions end up. RealBackend injects them into the
+OS through the same libraries the modes always used (SetCursorPos/autopy for
+the pointer, pyautogui and mouse for buttons, wheel and keys).
+RecordingBackend injects nothing and keeps a timestamped event log instead,
+for headless runs, CI and benchmarks.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+import ScreenMapping
+
+
+def openBackend(name):
+    if name == "real":
+        return RealBackend()
+    if name == "fake":
+        return RecordingBackend()
+    raise ValueError(f"Unknown backend {name!r} (expected 'real' or 'fake')")
+
+
+class RealBackend():
+    def __init__(self):
+        # imported here so headless runs never need a display for pyautogui
+        import pyautogui
+        import mouse
+        self.pyautogui = pyautogui
+        self.mouse = mouse
+        self.moveFunc = ScreenMapping.getCursorMover()
+        self.getDisplayLayout = ScreenMapping.getDisplayLayout
+        self.layoutSignature = ScreenMapping.layoutSignature
+
+    def beginFrame(self, index, timestamp):
+        pass
+
+    def move(self, x, y):
+        self.moveFunc(x, y)
+
+    def click(self, button='left'):
+        self.mouse.click(button)
+
+    def mouseDown(self, button='left'):
+        self.pyautogui.mouseDown(button=button)
+
+    def mouseUp(self, button='left'):
+        self.mouse.release(button)
+
+    def scroll(self, units):
+        self.pyautogui.scroll(units)
+
+    def press(self, key):
+        self.pyautogui.press(key)
+
+    def hotkey(self, *keys):
+        self.pyautogui.hotkey(*keys)
+
+
+class RecordingBackend():
+    def __init__(self, layout=((0, 0, 1920, 1080),), maxEvents=None):
+        # maxEvents keeps only the newest events (long soak runs); counts() covers all of them
+        self.layout = [tuple(m) for m in layout]
+        self.events = deque(maxlen=maxEvents)  # (frame, frameTime, wallTime, action, args)
+        self.totals = {}
+        self.frame = -1
+        self.frameTime = 0.0
+        self.lock = threading.Lock()
+
+    def getDisplayLayout(self):
+        return list(self.layout)
+
+    def layoutSignature(self):
+        return None
+
+    def beginFrame(self, index, timestamp):
+        self.frame = index
+        self.frameTime = timestamp
+
+    def _log(self, action, *args):
+        with self.lock:
+            self.events.append((self.frame, self.frameTime, time.perf_counter(), action, args))
+            self.totals[action] = self.totals.get(action, 0) + 1
+
+    def move(self, x, y):
+        self._log("move", round(x, 1), round(y, 1))
+
+    def click(self, button='left'):
+        self._log("click", button)
+
+    def mouseDown(self, button='left'):
+        self._log("mouseDown", button)
+
+    def mouseUp(self, button='left'):
+        self._log("mouseUp", button)
+
+    def scroll(self, units):
+        self._log("scroll", units)
+
+    def press(self, key):
+        self._log("press", key)
+
+    def hotkey(self, *keys):
+        self._log("hotkey", *keys)
+
+    def counts(self):
+        """Number of events per action."""
+        with self.lock:
+            return dict(self.totals)
+
+    def save(self, path):
+        with self.lock:
+            events = [{"frame": f, "frameTime": ft, "time": t, "action": a, "args": list(args)}
+                      for f, ft, t, a, args in self.events]
+        with open(path, "w") as f:
+            json.dump(events, f, indent=1)
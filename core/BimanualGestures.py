@@ -0,0 +1,75 @@
+"""
+Two-hand gesture vocabulary.
+
+The pointer hand (the hand tracked longest) keeps driving the cursor with the
+usual one-hand gestures. The other hand adds:
+
+- thumb-index pinch: press the left button, release on un-pinch (click or drag)
+- both hands pinched: spread them apart to zoom in, bring them together to zoom out
+
+Pinches are measured relative to the hand's own size (wrist to middle-finger
+knuckle), so they work at any distance from the camera. Both hands are read
+from their per-frame HandFeatures (see HandFeatures.py).
+"""
+import math
+
+
+class BimanualGestures():
+    def __init__(self, pinchRatio=0.35, releaseRatio=0.45, zoomStep=0.15):
+        self.pinchRatio = pinchRatio
+        self.releaseRatio = releaseRatio  # hysteresis so a pinch does not chatter
+        self.zoomStep = zoomStep  # relative change in hand spread per zoom step
+        self.auxPinched = False
+        self.pointerPinched = False
+        self.pressed = False
+        self.zoomRef = None
+
+    def _pinched(self, hand, wasPinched):
+        scale = hand.scale
+        if scale <= 0:
+            return False
+        ratio = hand.tipDistance[0, 1] / scale  # thumb tip to index tip
+        return ratio < (self.releaseRatio if wasPinched else self.pinchRatio)
+
+    def reset(self):
+        """Second hand left the view: returns the actions needed to clean up."""
+        actions = [("release", 0)] if self.pressed else []
+        self.auxPinched = self.pointerPinched = self.pressed = False
+        self.zoomRef = None
+        return actions
+
+    def update(self, pointer, aux):
+        """Feed the HandFeatures of both hands (aux None: one hand); returns a list of
+        (action, value) tuples: ("press", 0), ("release", 0), ("zoom", +1/-1)."""
+        if aux is None:
+            return self.reset()
+
+        actions = []
+        self.auxPinched = self._pinched(aux, self.auxPinched)
+        self.pointerPinched = self._pinched(pointer, self.pointerPinched)
+
+        if self.auxPinched and self.pointerPinched:
+            # zoom: never hold the button while both hands pinch
+            if self.pressed:
+                actions.append(("release", 0))
+                self.pressed = False
+            a, p = aux.points, pointer.points
+            spread = math.hypot(a[8, 0] - p[8, 0], a[8, 1] - p[8, 1])
+            if self.zoomRef is None:
+                self.zoomRef = spread
+            elif spread > self.zoomRef * (1 + self.zoomStep):
+                actions.append(("zoom", 1))
+                self.zoomRef = spread
+            elif spread < self.zoomRef / (1 + self.zoomStep):
+                actions.append(("zoom", -1))
+                self.zoomRef = spread
+            return actions
+
+        self.zoomRef = None
+        if self.auxPinched and not self.pressed:
+            actions.append(("press", 0))
+            self.pressed = True
+        elif not self.auxPinched and self.pressed:
+            actions.append(("release", 0))
+            self.pressed = False
+        return actions
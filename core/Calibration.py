@@ -0,0 +1,379 @@
+"""
+Guided per-user calibration.
+
+The defaults (frameR, smoothening, clickDistance) suit nobody in particular:
+a steady hand close to the camera gets a sluggish cursor, a shaky one far
+away gets a twitchy one. CalibrationSession watches a few seconds of frames
+while the user
+
+  1. holds the hand still      -> landmark noise after the landmark filter,
+  2. sweeps the reachable area -> reach extents of the index fingertip,
+  3. pinches a few times       -> open / closed fingertip distances,
+
+and derives the settings from the measurements in normalized units:
+
+  * the active region is the reach box, so every screen edge stays reachable
+    with the largest frameR that allows it,
+  * smoothening is the smallest that brings the remaining noise under
+    jitterTarget (a fraction of the active region), so quiet hands get less
+    smoothing and therefore less lag,
+  * clickDistance sits between the closed and the open pinch distributions.
+
+The profile is saved to calibration.json in the user data dir and turned
+into pixel settings for the mode's camera size by calibratedSettings().
+Phases run on frame timestamps, so a recording calibrates like live frames.
+
+    python core/Calibration.py                     # calibrate on the camera
+    python core/Calibration.py --source s.npz      # on a recording
+
+synthesizeSession() writes a recording of a synthetic user for tests.
+"""
+import json
+import math
+import time
+
+import cv2
+import numpy as np
+
+from AppPaths import userDataPath
+
+PROFILE_FILE = "calibration.json"
+
+# (phase, seconds, prompt)
+PHASES = (
+    ("hold", 2.0, "Hold your hand still"),
+    ("sweep", 4.0, "Touch every edge you can reach"),
+    ("pinch", 3.0, "Pinch index + middle tips 3x"),
+)
+SETTLE = 0.5  # s ignored at the start of each phase while the user reacts
+
+INDEX_TIP, MIDDLE_TIP = 8, 12
+MIN_PRESENT = 0.7  # share of a phase's frames that must see a hand
+MIN_PINCHES = 2
+MAX_SMOOTHENING = 12
+
+
+class CalibrationError(RuntimeError):
+    pass
+
+
+class CalibrationSession():
+    """Collects fingertip samples phase by phase; add() has the recorder signature."""
+
+    def __init__(self, phases=PHASES, settle=SETTLE, jitterTarget=0.0005):
+        self.phases = phases
+        self.settle = settle
+        self.jitterTarget = jitterTarget
+        self.start = None
+        self.frameSize = None
+        self.frames = 0
+        self.index = 0
+        self.samples = {name: [] for name, _, _ in phases}
+        self.seen = {name: 0 for name, _, _ in phases}
+
+    @property
+    def done(self):
+        return self.index >= len(self.phases)
+
+    @property
+    def prompt(self):
+        if self.done:
+            return "Calibration done"
+        return self.phases[self.index][2]
+
+    def remaining(self, timestamp):
+        """Seconds left in the current phase."""
+        if self.start is None or self.done:
+            return 0.0
+        end = sum(seconds for _, seconds, _ in self.phases[:self.index + 1])
+        return max(0.0, end - (timestamp - self.start))
+
+    def add(self, detector, img, timestamp):
+        if self.done:
+            return
+        if self.start is None:
+            self.start = timestamp
+            self.frameSize = (img.shape[1], img.shape[0])
+        elapsed = timestamp - self.start
+        while not self.done and elapsed >= sum(s for _, s, _ in self.phases[:self.index + 1]):
+            self.index += 1
+        if self.done:
+            return
+        self.frames += 1
+        name, seconds, _ = self.phases[self.index]
+        phaseStart = sum(s for _, s, _ in self.phases[:self.index])
+        if elapsed - phaseStart < self.settle:
+            return
+        self.seen[name] += 1
+        slot = detector.handSlot(0)
+        if slot is None:
+            return
+        lm = detector.landmarks[slot]
+        self.samples[name].append((timestamp, lm[INDEX_TIP, 0], lm[INDEX_TIP, 1],
+                                   lm[MIDDLE_TIP, 0], lm[MIDDLE_TIP, 1]))
+
+    def _phase(self, name):
+        samples = np.array(self.samples[name], dtype=np.float64).reshape(-1, 5)
+        if not self.seen[name] or len(samples) < MIN_PRESENT * self.seen[name]:
+            raise CalibrationError(f"no hand seen during the '{name}' step; keep it in view")
+        return samples
+
+    def profile(self):
+        """Measurements and derived normalized settings; raises CalibrationError."""
+        if not self.done:
+            raise CalibrationError("calibration was interrupted")
+        w, h = self.frameSize
+        hold, sweep, pinch = self._phase("hold"), self._phase("sweep"), self._phase("pinch")
+
+        # noise: residual of the index tip around a straight-line drift
+        t = hold[:, 0] - hold[0, 0]
+        noise = []
+        for axis in (1, 2):
+            coeffs = np.polyfit(t, hold[:, axis], 1) if len(t) > 2 else (0.0, hold[:, axis].mean())
+            noise.append(float(np.std(hold[:, axis] - np.polyval(coeffs, t))))
+        fps = (len(t) - 1) / t[-1] if t[-1] > 0 else 30.0
+
+        # reach: robust extents of the sweep, so one stray frame does not widen it
+        x0, x1 = np.percentile(sweep[:, 1], (3, 97))
+        y0, y1 = np.percentile(sweep[:, 2], (3, 97))
+        margin = activeMargin((x0, y0, x1, y1), w, h)
+        if margin is None:
+            raise CalibrationError("sweep covered too little of the frame; move the hand further")
+
+        # smoothing: EMA with alpha = 1 / s leaves sigma * sqrt(alpha / (2 - alpha)) of white noise
+        region = (1 - 2 * margin / w, 1 - 2 * margin / h)
+        sigma = max(noise[0] / region[0], noise[1] / region[1])
+        ratio = self.jitterTarget / sigma if sigma > 0 else 1.0
+        if ratio >= 1:
+            smoothening = 1
+        else:
+            smoothening = min(MAX_SMOOTHENING, math.ceil((1 + ratio * ratio) / (2 * ratio * ratio)))
+
+        # pinch: split the fingertip distances (frame widths) into closed and open
+        dist = np.hypot(pinch[:, 1] - pinch[:, 3], (pinch[:, 2] - pinch[:, 4]) * h / w)
+        split = otsuThreshold(dist)
+        closed, opened = dist[dist <= split], dist[dist > split]
+        if not len(closed) or not len(opened):
+            raise CalibrationError("no pinches seen; pinch index and middle fingertips together")
+        closedHigh = float(np.percentile(closed, 90))
+        openLow = float(np.percentile(opened, 10))
+        if openLow <= closedHigh:
+            raise CalibrationError("open and pinched fingertips overlap; pinch more clearly")
+        threshold = (closedHigh + openLow) / 2
+        pinches = countPinches(dist < threshold)
+        if pinches < MIN_PINCHES:
+            raise CalibrationError(f"saw {pinches} pinch(es); pinch at least {MIN_PINCHES} times")
+
+        return {
+            "version": 1,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "frameSize": [w, h],
+            "activeRegion": [float(x0), float(y0), float(x1), float(y1)],
+            "clickDistance": threshold,
+            "smoothening": smoothening,
+            "measured": {
+                "noise": noise,
+                "fps": fps,
+                "pinchClosed": closedHigh,
+                "pinchOpen": openLow,
+                "pinches": pinches,
+                "frames": {name: [len(self.samples[name]), self.seen[name]] for name in self.samples},
+            },
+        }
+
+
+def activeMargin(region, w, h, minSpan=0.25):
+    """Largest frameR (px) whose box lies inside region (normalized x0, y0, x1, y1),
+    or None if the box would be narrower than minSpan of the frame."""
+    x0, y0, x1, y1 = region
+    margin = max(x0 * w, (1 - x1) * w, y0 * h, (1 - y1) * h, 0.0)
+    if 2 * margin > (1 - minSpan) * min(w, h):
+        return None
+    return margin
+
+
+def otsuThreshold(values):
+    """Split point of a 1-D sample that maximizes the between-class variance."""
+    values = np.sort(values)
+    n = len(values)
+    if n < 2:
+        return float(values[0]) if n else 0.0
+    cumsum = np.cumsum(values)
+    k = np.arange(1, n)
+    meanLow = cumsum[:-1] / k
+    meanHigh = (cumsum[-1] - cumsum[:-1]) / (n - k)
+    between = k * (n - k) * (meanLow - meanHigh) ** 2
+    best = int(np.argmax(between))
+    return float(values[best])
+
+
+def countPinches(closed, minFrames=2):
+    """Runs of at least minFrames consecutive closed frames."""
+    pinches = run = 0
+    for value in closed:
+        run = run + 1 if value else 0
+        if run == minFrames:
+            pinches += 1
+    return pinches
+
+
+def profilePath():
+    return userDataPath(PROFILE_FILE)
+
+
+def loadCalibration(path=None):
+    """The saved profile, or None when the user has not calibrated."""
+    try:
+        with open(path or profilePath()) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return profile if profile.get("version") == 1 else None
+
+
+def saveCalibration(profile, path=None):
+    path = path or profilePath()
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def calibratedSettings(wCam, hCam, profile=None):
+    """Pixel settings for a wCam x hCam camera from a profile (default: the saved one)."""
+    if profile is None:
+        profile = loadCalibration()
+    if profile is None:
+        return {}
+    margin = activeMargin(profile["activeRegion"], wCam, hCam)
+    settings = {
+        "smoothening": profile["smoothening"],
+        "clickDistance": max(1, round(profile["clickDistance"] * wCam)),
+    }
+    if margin is not None:
+        settings["frameR"] = round(margin)
+    return settings
+
+
+def runCalibration(source, detector, stopFlag=None, preview=None, onPrompt=None, **kwargs):
+    """Drive a CalibrationSession from source; returns the profile, or None if stopped.
+
+    onPrompt(text) is called whenever the instruction changes; preview is an
+    optional Preview.PreviewChannel that gets the frames with the prompt drawn on.
+    """
+    from Overlay import FrameOverlay
+
+    session = CalibrationSession(**kwargs)
+    overlay = FrameOverlay(detector.maxHands) if preview is not None else None
+    if overlay is not None:
+        detector.gfx = overlay
+    shown = None
+    try:
+        while not session.done:
+            if stopFlag is not None and stopFlag.is_set():
+                return None
+            success, img, timestamp = source.read()
+            if not success:
+                if source.finished:
+                    break
+                continue
+            now = time.perf_counter()
+            previewFrame = preview is not None and preview.due(now)
+            if previewFrame:
+                overlay.begin(img)
+            img = detector.findHands(img, draw=previewFrame, timestamp=timestamp)
+            session.add(detector, img, timestamp)
+            if session.prompt != shown:
+                shown = session.prompt
+                if onPrompt is not None:
+                    onPrompt(shown)
+            if previewFrame:
+                overlay.putText(img, f"{session.prompt} ({session.remaining(timestamp):.0f} s)", (20, 50),
+                                cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 255), 2)
+                preview.publish(img, now, overlay)
+    finally:
+        if overlay is not None:
+            detector.gfx = cv2
+    return session.profile()
+
+
+def describe(profile, wCam=640, hCam=480):
+    measured = profile["measured"]
+    settings = calibratedSettings(wCam, hCam, profile)
+    lag = 1000 * (settings["smoothening"] - 1) / measured["fps"]
+    return (f"noise {1000 * max(measured['noise']):.2f}e-3, "
+            f"reach x {profile['activeRegion'][0]:.2f}-{profile['activeRegion'][2]:.2f} "
+            f"y {profile['activeRegion'][1]:.2f}-{profile['activeRegion'][3]:.2f}, "
+            f"pinch {measured['pinchClosed']:.3f}/{measured['pinchOpen']:.3f} ({measured['pinches']}x) "
+            f"-> {settings} (smoothing lag ~{lag:.0f} ms)")
+
+
+def synthesizeSession(path, fps=30.0, noise=0.002, reach=(0.2, 0.25, 0.8, 0.75), pinches=3, seed=0):
+    """Write a landmark recording of a synthetic user following the PHASES prompts."""
+    rng = np.random.default_rng(seed)
+    total = sum(seconds for _, seconds, _ in PHASES)
+    n = int((total + 0.5) * fps)  # runs past the last phase so the session completes
+    t = np.arange(n) / fps
+    holdEnd, sweepEnd = PHASES[0][1], PHASES[0][1] + PHASES[1][1]
+    # index tip path: still, then a lissajous over the reach box, then still again while pinching
+    cx, cy = (reach[0] + reach[2]) / 2, (reach[1] + reach[3]) / 2
+    rx, ry = (reach[2] - reach[0]) / 2, (reach[3] - reach[1]) / 2
+    x = np.full(n, cx)
+    y = np.full(n, cy)
+    sweep = (t >= holdEnd) & (t < sweepEnd)
+    phase = (t[sweep] - holdEnd) / (sweepEnd - holdEnd)
+    x[sweep] = cx + rx * np.sin(2 * np.pi * 3 * phase)
+    y[sweep] = cy + ry * np.sin(2 * np.pi * 2 * phase + np.pi / 2)
+    # middle tip 0.08 frame widths away, touching the index tip during each pinch
+    gap = np.full(n, 0.08)
+    pinchT = t[t >= sweepEnd] - sweepEnd - SETTLE
+    pinchLength = (total - sweepEnd - SETTLE) / pinches
+    closing = (pinchT >= 0) & ((pinchT % pinchLength) > 0.5 * pinchLength)
+    gap[t >= sweepEnd] = np.where(closing, 0.01, 0.08)
+
+    landmarks = np.zeros((n, 1, 21, 3), dtype=np.float32)
+    offsets = np.linspace(0, 0.15, 21)
+    landmarks[:, 0, :, 0] = x[:, None] - 0.05
+    landmarks[:, 0, :, 1] = y[:, None] + offsets
+    landmarks[:, 0, INDEX_TIP, :2] = np.stack([x, y], axis=1)
+    landmarks[:, 0, MIDDLE_TIP, 0] = x + gap
+    landmarks[:, 0, MIDDLE_TIP, 1] = y
+    landmarks[:, 0, :, :2] += rng.normal(0, noise, (n, 21, 2))
+    np.savez_compressed(path, timestamps=t, landmarks=landmarks, present=np.ones((n, 1), dtype=bool),
+                        handedness=np.full((n, 1), 2, dtype=np.uint8), frameSize=np.array([640, 480]))
+    return path
+
+
+def main(argv=None):
+    import argparse
+
+    from Sources import openSource
+
+    parser = argparse.ArgumentParser(description="Calibrate the cursor to your hand and camera.")
+    parser.add_argument("--source", default=None, help="camera index or recording (default: camera)")
+    parser.add_argument("--jitter-target", type=float, default=0.0005,
+                        help="cursor noise allowed after smoothing, as a fraction of the active region")
+    parser.add_argument("--no-save", action="store_true", help="print the profile without saving it")
+    args = parser.parse_args(argv)
+
+    from Pipeline import createDetector
+    from GestureModes import modeSettings
+
+    settings = modeSettings("normal")
+    source = openSource(args.source, settings["wCam"], settings["hCam"])
+    detector = createDetector(settings, source)
+    try:
+        profile = runCalibration(source, detector, jitterTarget=args.jitter_target,
+                                 onPrompt=lambda text: print(f"[Calibration] {text}"))
+    except CalibrationError as e:
+        print(f"[Calibration] failed: {e}")
+        return 1
+    finally:
+        source.release()
+    print(f"[Calibration] {describe(profile, settings['wCam'], settings['hCam'])}")
+    if not args.no_save:
+        print(f"[Calibration] wrote {saveCalibration(profile)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,354 @@
+"""
+Camera capture format negotiation.
+
+Left alone, many webcams deliver uncompressed YUYV at 15 fps behind a deep
+driver queue. CaptureNegotiator tries candidate FOURCC / FPS / buffer-size
+combinations at the requested resolution, measures the frame rate actually
+delivered and how many stale frames the driver queues, and keeps the best.
+The winning profile is saved per device in the user data dir together with
+the camera index that opened, so later starts apply it without probing.
+
+SimulatedCapture stands in for cv2.VideoCapture with a webcam's format and
+queueing behaviour on a virtual clock, so the negotiation can be exercised
+without a camera:
+
+    python core/CaptureNegotiator.py              # simulated devices
+    python core/CaptureNegotiator.py --device 0   # a real camera (--force re-probes)
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import cv2
+
+from AppPaths import userDataPath
+
+
+PROFILE_FILE = "capture_profiles.json"
+
+# tried in order at the requested resolution; fourcc None keeps the driver default
+CANDIDATES = [
+    {"fourcc": "MJPG", "fps": 60, "bufferSize": 1},
+    {"fourcc": "MJPG", "fps": 30, "bufferSize": 1},
+    {"fourcc": "YUY2", "fps": 30, "bufferSize": 1},
+    {"fourcc": None, "fps": None, "bufferSize": 1},
+]
+
+
+def fourccCode(name):
+    return cv2.VideoWriter_fourcc(*name)
+
+
+def fourccName(code):
+    code = int(code)
+    if code <= 0:
+        return None
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def deviceKey(cap, index, width, height):
+    try:
+        backend = cap.getBackendName()
+    except Exception:
+        backend = "unknown"
+    return f"{backend}:{index}:{width}x{height}"
+
+
+def scoreProfile(profile):
+    """Higher is better: frames per second up to 60, minus 0.2 per ms of queued latency."""
+    return min(profile["deliveredFps"], 60.0) - 0.2 * profile["latency_ms"]
+
+
+def applyProfile(cap, profile, width, height, defaultFourcc=None):
+    # FOURCC first: some backends only accept the size once the format allows it
+    fourcc = profile.get("fourcc") or defaultFourcc
+    if fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, fourccCode(fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if profile.get("fps"):
+        cap.set(cv2.CAP_PROP_FPS, profile["fps"])
+    if profile.get("bufferSize"):
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, profile["bufferSize"])
+
+
+def measureCapture(cap, frames=20, warmup=5, stall=0.2, clock=time.perf_counter, sleep=time.sleep):
+    """Delivered fps, frame size and queued latency of an open capture.
+
+    Queued latency: after a pause, frames the driver had buffered come back
+    immediately; each one is a frame interval the pipeline would lag behind
+    whenever it falls behind the camera.
+    """
+    for _ in range(warmup):
+        cap.read()
+    delivered = 0
+    shape = None
+    t0 = clock()
+    for _ in range(frames):
+        success, img = cap.read()
+        if success and img is not None:
+            delivered += 1
+            shape = img.shape
+    elapsed = clock() - t0
+    if not delivered or elapsed <= 0:
+        return None
+    fps = delivered / elapsed
+
+    sleep(stall)
+    stale = 0
+    for _ in range(10):
+        t = clock()
+        cap.read()
+        if clock() - t > 0.3 / fps:
+            break
+        stale += 1
+    return {
+        "deliveredFps": fps,
+        "latency_ms": 1000.0 * stale / fps,
+        "staleFrames": stale,
+        "frameSize": [shape[1], shape[0]],
+        "actualFourcc": fourccName(cap.get(cv2.CAP_PROP_FOURCC)),
+    }
+
+
+class CaptureNegotiator():
+    def __init__(self, candidates=None, path=None, frames=20, clock=time.perf_counter, sleep=time.sleep):
+        self.candidates = candidates or CANDIDATES
+        self.path = path or userDataPath(PROFILE_FILE)
+        self.frames = frames
+        self.clock = clock
+        self.sleep = sleep
+        self.probes = 0  # measurements run by this negotiator (0 when a saved profile was reused)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"lastIndex": None, "profiles": {}}
+
+    def save(self, data):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[Capture] could not save profiles: {e}")
+
+    def indexOrder(self, candidates=(1, 0)):
+        """Camera indices to try, the one that opened last time first."""
+        last = self.load().get("lastIndex")
+        if last is None:
+            return list(candidates)
+        return [last] + [i for i in candidates if i != last]
+
+    def negotiate(self, cap, width, height):
+        """Measure every candidate on cap; leaves the best one applied and returns it."""
+        defaultFourcc = fourccName(cap.get(cv2.CAP_PROP_FOURCC))
+        results = []
+        for candidate in self.candidates:
+            applyProfile(cap, candidate, width, height, defaultFourcc)
+            measured = measureCapture(cap, self.frames, clock=self.clock, sleep=self.sleep)
+            self.probes += 1
+            if measured is None:
+                continue
+            # drivers may refuse a format; record what was actually delivered
+            profile = dict(candidate, **measured)
+            profile["fourcc"] = measured["actualFourcc"] or candidate["fourcc"] or defaultFourcc
+            profile["sizeMatches"] = measured["frameSize"] == [width, height]
+            results.append(profile)
+            print(f"[Capture] {profile['fourcc']} @{candidate['fps'] or 'default'} fps, "
+                  f"buffer {candidate['bufferSize']}: {profile['deliveredFps']:.1f} fps, "
+                  f"{profile['staleFrames']} queued ({profile['latency_ms']:.0f} ms), "
+                  f"{measured['frameSize'][0]}x{measured['frameSize'][1]}")
+        if not results:
+            return None
+        # a profile at the wrong resolution only wins if nothing delivers the right one
+        best = max(results, key=lambda p: (p["sizeMatches"], scoreProfile(p)))
+        applyProfile(cap, best, width, height)
+        best["measuredAt"] = time.time()
+        return best
+
+    def configure(self, cap, index, width, height, force=False):
+        """Apply the saved profile for this device, or negotiate and save one."""
+        data = self.load()
+        key = deviceKey(cap, index, width, height)
+        profile = None if force else data["profiles"].get(key)
+        if profile is not None:
+            applyProfile(cap, profile, width, height)
+            success, img = cap.read()
+            if success and img is not None and [img.shape[1], img.shape[0]] == profile["frameSize"]:
+                if data.get("lastIndex") != index:
+                    data["lastIndex"] = index
+                    self.save(data)
+                return profile
+            print("[Capture] saved profile no longer works, renegotiating")
+        profile = self.negotiate(cap, width, height)
+        if profile is None:
+            # nothing delivered frames: plain size request, as before negotiation existed
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            return None
+        data["profiles"][key] = profile
+        data["lastIndex"] = index
+        self.save(data)
+        print(f"[Capture] using {profile['fourcc']} at {profile['deliveredFps']:.1f} fps "
+              f"for camera {index}")
+        return profile
+
+
+class SimClock():
+    """Virtual time for SimulatedCapture; sleep() advances it instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class SimulatedCapture():
+    """cv2.VideoCapture stand-in with per-format frame rates and a driver frame queue.
+
+    modes maps (fourcc, width, height) to the highest fps the "sensor" delivers.
+    Unsupported sizes fall back to 640x480. The queue keeps the newest
+    `bufferDepth` frames and read() returns the oldest of them, like a V4L2 or
+    DirectShow queue; honorBufferSize=False models drivers that ignore
+    CAP_PROP_BUFFERSIZE.
+    """
+
+    def __init__(self, modes=None, defaultFourcc="YUY2", bufferDepth=4, honorBufferSize=True,
+                 clock=None, backend="SIM"):
+        self.modes = modes or {
+            ("MJPG", 640, 480): 60,
+            ("MJPG", 1280, 720): 30,
+            ("YUY2", 640, 480): 15,
+            ("YUY2", 1280, 720): 8,
+        }
+        self.clock = clock or SimClock()
+        self.backend = backend
+        self.honorBufferSize = honorBufferSize
+        self.props = {
+            cv2.CAP_PROP_FOURCC: fourccCode(defaultFourcc),
+            cv2.CAP_PROP_FRAME_WIDTH: 640,
+            cv2.CAP_PROP_FRAME_HEIGHT: 480,
+            cv2.CAP_PROP_FPS: 0,
+            cv2.CAP_PROP_BUFFERSIZE: bufferDepth,
+        }
+        self.defaultDepth = bufferDepth
+        self.reads = 0
+        self.opened = True
+        self._restart()
+
+    def _mode(self):
+        fourcc = fourccName(self.props[cv2.CAP_PROP_FOURCC])
+        w = int(self.props[cv2.CAP_PROP_FRAME_WIDTH])
+        h = int(self.props[cv2.CAP_PROP_FRAME_HEIGHT])
+        if (fourcc, w, h) not in self.modes:
+            w, h = 640, 480
+        maxFps = self.modes.get((fourcc, w, h), 15)
+        requested = self.props[cv2.CAP_PROP_FPS]
+        return w, h, min(requested, maxFps) if requested else maxFps
+
+    def _restart(self):
+        self.width, self.height, self.fps = self._mode()
+        depth = self.props[cv2.CAP_PROP_BUFFERSIZE] if self.honorBufferSize else self.defaultDepth
+        self.depth = max(1, int(depth))
+        self.start = self.clock.time()
+        self.lastFrame = -1
+
+    def isOpened(self):
+        return self.opened
+
+    def getBackendName(self):
+        return self.backend
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FOURCC and fourccName(value) not in {m[0] for m in self.modes}:
+            return False
+        self.props[prop] = value
+        self._restart()
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        return float(self.props.get(prop, 0))
+
+    def read(self, image=None):
+        self.reads += 1
+        interval = 1.0 / self.fps
+        produced = int((self.clock.time() - self.start) / interval + 1e-9)
+        # the queue only holds the newest `depth` frames; read the oldest of them
+        frame = max(self.lastFrame + 1, produced - self.depth + 1)
+        ready = self.start + frame * interval
+        if ready > self.clock.time():
+            self.clock.sleep(ready - self.clock.time())
+        self.lastFrame = frame
+        if image is None or image.shape != (self.height, self.width, 3):
+            image = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        image.fill(frame % 256)
+        return True, image
+
+    def release(self):
+        self.opened = False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Negotiate the camera capture format.")
+    parser.add_argument("--device", type=int, default=None, help="real camera index (default: simulated devices)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--force", action="store_true", help="ignore the saved profile and probe again")
+    args = parser.parse_args(argv)
+
+    if args.device is not None:
+        cap = cv2.VideoCapture(args.device)
+        if not cap.isOpened():
+            print(f"Unable to open camera {args.device}")
+            return 1
+        negotiator = CaptureNegotiator()
+        t0 = time.perf_counter()
+        profile = negotiator.configure(cap, args.device, args.width, args.height, force=args.force)
+        print(f"profile: {profile}")
+        print(f"{negotiator.probes} probe(s) in {time.perf_counter() - t0:.1f} s; saved to {negotiator.path}")
+        cap.release()
+        return 0
+
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), PROFILE_FILE)
+    devices = {
+        "mjpg webcam": {},
+        "yuyv only, ignores buffer size": {"modes": {("YUY2", 640, 480): 30}, "honorBufferSize": False},
+    }
+    for index, (name, options) in enumerate(devices.items()):
+        print(f"--- {name}")
+        for attempt in ("first start", "second start"):
+            clock = SimClock()
+            cap = SimulatedCapture(clock=clock, **options)
+            # baseline: what the device delivers with only the size set
+            if attempt == "first start":
+                base = measureCapture(cap, clock=clock.time, sleep=clock.sleep)
+                print(f"untouched: {base['actualFourcc']} {base['deliveredFps']:.1f} fps, "
+                      f"{base['latency_ms']:.0f} ms queued")
+                cap = SimulatedCapture(clock=clock, **options)
+            negotiator = CaptureNegotiator(path=path, clock=clock.time, sleep=clock.sleep)
+            profile = negotiator.configure(cap, index, args.width, args.height)
+            print(f"{attempt}: {profile['fourcc']} {profile['deliveredFps']:.1f} fps, "
+                  f"{profile['latency_ms']:.0f} ms queued, {negotiator.probes} probe(s), "
+                  f"{cap.reads} reads")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""
+High-rate cursor output.
+
+The camera loop hands CursorOutputThread a new target position once per
+processed frame, stamped with the time the frame was captured. The thread
+moves the pointer at a fixed rate (120 Hz by default) and fills the gaps
+between camera frames by interpolating between the last two targets, or by
+extrapolating past the newest one when low latency matters more than
+smoothness (gaming mode). An optional ScrollEngine is ticked from the same
+thread so wheel events are emitted at a fixed rate too.
+"""
+import threading
+import time
+
+
+class CursorOutputThread():
+    def __init__(self, moveFunc, rate=120, extrapolate=False, maxExtrapolation=0.05,
+                 bounds=None, maxGap=0.25, scroll=None):
+        # moveFunc(x, y) performs the actual pointer move (autopy.mouse.move)
+        self.moveFunc = moveFunc
+        self.rate = rate
+        self.extrapolate = extrapolate
+        self.maxExtrapolation = maxExtrapolation
+        self.bounds = bounds  # (xmin, ymin, xmax, ymax) or None
+        self.maxGap = maxGap  # targets further apart than this are not blended
+        self.scroll = scroll  # ScrollEngine ticked every period, or None
+
+        self.lock = threading.Lock()
+        self.prev = None  # (t, x, y) of the target before the newest one
+        self.last = None  # newest (t, x, y)
+        self.latency = 0.0  # capture -> setTarget, smoothed
+        self.interval = 1 / 30  # capture-to-capture interval, smoothed
+        self.lastMoved = None
+
+        self.thread = None
+        self.stopFlag = threading.Event()
+
+    def start(self):
+        if self.rate <= 0:
+            # synchronous: the caller drives tick() once per frame (replays, benchmarks)
+            return
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopFlag.clear()
+        self.thread = threading.Thread(target=self._run, name="CursorOutput", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopFlag.set()
+        if self.thread:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    def setTarget(self, x, y, timestamp=None):
+        """Record the cursor target computed from the frame captured at timestamp."""
+        now = time.perf_counter()
+        if timestamp is None:
+            timestamp = now
+        with self.lock:
+            gap = timestamp - self.last[0] if self.last is not None else 0
+            if 0 < gap < self.maxGap:
+                self.interval += 0.2 * (gap - self.interval)
+                self.prev = self.last
+            else:
+                # first target, or tracking resumed after a pause: no segment to blend
+                self.prev = None
+            self.last = (timestamp, x, y)
+            self.latency += 0.2 * ((now - timestamp) - self.latency)
+
+    def clearTarget(self):
+        """Hold the pointer where it is until the next setTarget."""
+        with self.lock:
+            self.prev = None
+            self.last = None
+
+    def jumpTo(self, x, y, timestamp=None):
+        """Put the pointer at (x, y) now and hold it there: no blending from the
+        previous target and no extrapolation past it (a click is about to land)."""
+        with self.lock:
+            self.prev = None
+            self.last = (time.perf_counter() if timestamp is None else timestamp, x, y)
+        self.tick(time.perf_counter())
+
+    def positionAt(self, now):
+        """Pointer position for wall-clock time now, or None if there is no target."""
+        with self.lock:
+            prev, last = self.prev, self.last
+            latency, interval = self.latency, self.interval
+        if last is None:
+            return None
+        if prev is None or self.rate <= 0:
+            return last[1], last[2]
+
+        # map wall-clock time back onto the capture timeline
+        if self.extrapolate:
+            t = now - latency
+        else:
+            t = now - latency - interval
+        t0, x0, y0 = prev
+        t1, x1, y1 = last
+        t = min(t, t1 + self.maxExtrapolation)
+        t = max(t, t0)
+        k = (t - t0) / (t1 - t0)
+        return x0 + (x1 - x0) * k, y0 + (y1 - y0) * k
+
+    def tick(self, now):
+        """One output step: move the pointer and emit pending scroll."""
+        pos = self.positionAt(now)
+        if pos is not None:
+            x, y = pos
+            if self.bounds:
+                xmin, ymin, xmax, ymax = self.bounds
+                x = min(max(x, xmin), xmax - 1)
+                y = min(max(y, ymin), ymax - 1)
+            # skip sub-pixel updates to avoid flooding the OS with no-op moves
+            if self.lastMoved is None or abs(x - self.lastMoved[0]) >= 0.5 \
+                    or abs(y - self.lastMoved[1]) >= 0.5:
+                try:
+                    self.moveFunc(x, y)
+                    self.lastMoved = (x, y)
+                except Exception as e:
+                    print(f"[CursorOutput] move failed: {e}")
+        if self.scroll is not None:
+            try:
+                self.scroll.tick(now)
+            except Exception as e:
+                print(f"[CursorOutput] scroll failed: {e}")
+
+    def _run(self):
+        period = 1.0 / self.rate
+        nextTick = time.perf_counter()
+        while not self.stopFlag.is_set():
+            self.tick(time.perf_counter())
+
+            nextTick += period
+            delay = nextTick - time.perf_counter()
+            if delay > 0:
+                self.stopFlag.wait(delay)
+            else:
+                # fell behind (slow moveFunc); resync instead of bursting
+                nextTick = time.perf_counter()
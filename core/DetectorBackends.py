@@ -0,0 +1,414 @@
+"""
+Detector backends.
+
+A detector backend turns timestamped frames into timestamped landmark
+results; handDetector only does hand tracking, smoothing and the pixel helpers
+on top, so gestures and cursor logic do not care where landmarks come from.
+
+Every backend works both ways:
+
+    result = backend.process(img, timestamp)   # synchronous
+    backend.submit(img, timestamp)             # asynchronous ...
+    result = backend.poll(timeout)             # ... or onResult(result) per frame
+
+Implementations:
+
+  * MediaPipeDetectorBackend: the MediaPipe Hands solution (the original path).
+  * AsyncDetectorBackend: runs another backend on a worker thread so frame N
+    is inferred while frame N-1's result is acted on (pipelined = True).
+  * StubDetectorBackend: scripted landmarks, deterministic, no model; for
+    tests and benchmarks of the code above detection.
+  * ReplayDetectorBackend: landmarks of a RecordingSource or StreamSource.
+
+A result (DetectorResult) is owned by the backend and stays valid until the
+next process()/poll() call.
+
+    python core/DetectorBackends.py session.npz [--video clip.mp4]   # stub run, sync vs pipelined fps
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class DetectorResult():
+    """Hands found in one frame: normalized (x, y, z) landmarks and handedness per detection."""
+
+    def __init__(self, maxHands):
+        self.timestamp = 0.0
+        self.count = 0
+        self.landmarks = np.zeros((maxHands, 21, 3))
+        self.labels = [None] * maxHands  # "Left", "Right" or None; the first count entries are valid
+        self.scores = [1.0] * maxHands  # detection confidence per hand
+        self.raw = None  # engine-specific output (MediaPipe results, for drawing)
+        self.inferenceTime = 0.0
+
+    def copyFrom(self, other):
+        self.timestamp = other.timestamp
+        self.count = other.count
+        np.copyto(self.landmarks, other.landmarks)
+        self.labels[:] = other.labels
+        self.scores[:] = other.scores
+        self.raw = other.raw
+        self.inferenceTime = other.inferenceTime
+
+
+class DetectorBackend():
+    """Base class: subclasses implement _infer(); submit/poll queue synchronous results."""
+
+    pipelined = False
+    depth = 0  # frames a pipelined backend's results lag behind submit()
+
+    def __init__(self, maxHands=2, onResult=None):
+        self.maxHands = maxHands
+        self.onResult = onResult  # called with every result delivered by submit()
+        self.result = DetectorResult(maxHands)
+        self._done = deque()
+
+    def _infer(self, img, result):
+        """Fill result.landmarks/labels/raw from img; returns the number of hands."""
+        raise NotImplementedError
+
+    def process(self, img, timestamp):
+        start = time.perf_counter()
+        result = self.result
+        result.timestamp = timestamp
+        result.count = self._infer(img, result)
+        result.inferenceTime = time.perf_counter() - start
+        return result
+
+    def submit(self, img, timestamp):
+        result = self.process(img, timestamp)
+        self._done.append(result)
+        if self.onResult is not None:
+            self.onResult(result)
+
+    def poll(self, timeout=None):
+        """Oldest undelivered result, or None."""
+        return self._done.popleft() if self._done else None
+
+    def inFlight(self):
+        """Frames submitted whose result has not been polled yet."""
+        return len(self._done)
+
+    def flush(self):
+        """Drop undelivered results (a detector reused for a new run)."""
+        self._done.clear()
+
+    def restart(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MediaPipeDetectorBackend(DetectorBackend):
+    def __init__(self, maxHands=2, mode=False, detectionCon=0.5, trackCon=0.5, modelComplexity=1,
+                 inputScale=1.0, onResult=None):
+        super().__init__(maxHands, onResult)
+        import mediapipe as mp
+        self.mpHands = mp.solutions.hands
+        self.mode = mode
+        self.detectionCon = detectionCon
+        self.trackCon = trackCon
+        self.modelComplexity = modelComplexity  # 0 = lite model, 1 = full
+        self.inputScale = inputScale  # frames are shrunk by this factor before inference
+        self._rgb = None  # RGB input buffer, reused while the frame size is unchanged
+        self._small = None  # downscaled frame when inputScale < 1
+        self.hands = self._buildHands()
+
+    def _buildHands(self):
+        return self.mpHands.Hands(
+            static_image_mode=self.mode,
+            max_num_hands=self.maxHands,
+            model_complexity=self.modelComplexity,
+            min_detection_confidence=self.detectionCon,
+            min_tracking_confidence=self.trackCon,
+        )
+
+    def restart(self):
+        """Rebuild the MediaPipe graph (after the watchdog saw it hang)."""
+        try:
+            self.hands.close()
+        except Exception as e:
+            print(f"[MediaPipeDetectorBackend] closing graph failed: {e}")
+        self.hands = self._buildHands()
+
+    def close(self):
+        self.hands.close()
+
+    def _infer(self, img, result):
+        src = img
+        if self.inputScale != 1.0:
+            # landmarks are normalized, so inference on a smaller frame needs no remapping
+            h, w = img.shape[:2]
+            size = (max(1, int(w * self.inputScale)), max(1, int(h * self.inputScale)))
+            if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+                self._small = np.empty((size[1], size[0], img.shape[2]), dtype=img.dtype)
+            cv2.resize(img, size, dst=self._small, interpolation=cv2.INTER_AREA)
+            src = self._small
+        if self._rgb is None or self._rgb.shape != src.shape:
+            self._rgb = np.empty_like(src)
+        imgRGB = self._rgb
+        imgRGB.flags.writeable = True
+        cv2.cvtColor(src, cv2.COLOR_BGR2RGB, dst=imgRGB)
+        # read-only input lets MediaPipe wrap the buffer instead of copying it
+        imgRGB.flags.writeable = False
+        results = self.hands.process(imgRGB)
+        result.raw = results
+
+        count = 0
+        if results and results.multi_hand_landmarks:
+            handedness = results.multi_handedness or []
+            for i, handLms in enumerate(results.multi_hand_landmarks[:self.maxHands]):
+                det = result.landmarks[count]
+                for id, lm in enumerate(handLms.landmark):
+                    det[id] = lm.x, lm.y, lm.z
+                if i < len(handedness):
+                    result.labels[count] = handedness[i].classification[0].label
+                    result.scores[count] = handedness[i].classification[0].score
+                else:
+                    result.labels[count], result.scores[count] = None, 1.0
+                count += 1
+        return count
+
+
+class AsyncDetectorBackend(DetectorBackend):
+    """Runs `inner` on a worker thread, `depth` frames ahead of the caller.
+
+    submit() copies the frame, so the caller may draw on or reuse its buffer
+    straight away. Results come back in order through poll() or onResult
+    (called on the worker thread).
+    """
+
+    pipelined = True
+
+    def __init__(self, inner, depth=1, onResult=None):
+        super().__init__(inner.maxHands, onResult)
+        self.inner = inner
+        self.depth = depth
+        self.cond = threading.Condition()
+        self.jobs = deque()
+        self.frames = [None] * (depth + 2)  # copies of submitted frames, round-robin
+        self.results = [DetectorResult(inner.maxHands) for _ in range(depth + 2)]
+        self.submitted = 0
+        self.polled = 0
+        self.generation = 0  # bumped by flush/restart so stale work is discarded
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="DetectorWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, img, timestamp):
+        slot = self.submitted % len(self.frames)
+        buf = self.frames[slot]
+        if buf is None or buf.shape != img.shape:
+            buf = self.frames[slot] = np.empty_like(img)
+        np.copyto(buf, img)
+        with self.cond:
+            self.jobs.append((slot, buf, timestamp, self.generation))
+            self.submitted += 1
+            self.cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.jobs and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                slot, img, timestamp, generation = self.jobs[0]
+            try:
+                result = self.inner.process(img, timestamp)
+            except Exception as e:
+                print(f"[AsyncDetectorBackend] inference failed: {e}")
+                result = None
+            with self.cond:
+                if self.jobs and self.jobs[0][3] == generation == self.generation:
+                    self.jobs.popleft()
+                    out = self.results[slot]
+                    if result is None:
+                        out.timestamp, out.count, out.raw = timestamp, 0, None
+                    else:
+                        out.copyFrom(result)
+                    self._done.append(out)
+                    self.cond.notify_all()
+                else:
+                    out = None
+            if out is not None and self.onResult is not None:
+                self.onResult(out)
+
+    def poll(self, timeout=None):
+        with self.cond:
+            if not self._done and timeout != 0:
+                self.cond.wait_for(lambda: self._done or self.closed, timeout)
+            if not self._done:
+                return None
+            self.polled += 1
+            return self._done.popleft()
+
+    def inFlight(self):
+        with self.cond:
+            return self.submitted - self.polled
+
+    def flush(self):
+        with self.cond:
+            self.generation += 1
+            self.jobs.clear()
+            self._done.clear()
+            self.polled = self.submitted
+
+    def restart(self):
+        # called on the pipeline thread once a stuck inference has returned
+        self.flush()
+        self.inner.restart()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(2)
+        self.inner.close()
+
+
+class StubDetectorBackend(DetectorBackend):
+    """Scripted landmarks: script[i] is the list of (landmarks (21, 3), label[, score]) hands in frame i.
+
+    script may also be a callable script(index, timestamp) -> hands. delay
+    simulates inference time (sleeping releases the GIL like MediaPipe does).
+    """
+
+    def __init__(self, script, maxHands=2, delay=0.0, loop=True, onResult=None):
+        super().__init__(maxHands, onResult)
+        self.script = script
+        self.delay = delay
+        self.loop = loop
+        self.index = 0
+
+    def _infer(self, img, result):
+        if self.delay:
+            time.sleep(self.delay)
+        if callable(self.script):
+            hands = self.script(self.index, result.timestamp)
+        elif self.index < len(self.script) or (self.loop and self.script):
+            hands = self.script[self.index % len(self.script)]
+        else:
+            hands = ()
+        self.index += 1
+        result.raw = None
+        count = 0
+        for hand in hands[:self.maxHands]:
+            result.landmarks[count] = hand[0]
+            result.labels[count] = hand[1]
+            result.scores[count] = hand[2] if len(hand) > 2 else 1.0
+            count += 1
+        return count
+
+    def restart(self):
+        self.index = 0
+
+
+class ReplayDetectorBackend(DetectorBackend):
+    """Landmarks of the frame a recording or stream source returned last (source.current())."""
+
+    def __init__(self, source, maxHands=2, onResult=None):
+        super().__init__(maxHands, onResult)
+        self.source = source
+
+    def _infer(self, img, result):
+        from Sources import HANDEDNESS_LABELS
+        landmarks, present, handedness = self.source.current()
+        result.raw = None
+        count = 0
+        for slot in np.flatnonzero(present):
+            if count >= self.maxHands:
+                break
+            result.landmarks[count] = landmarks[slot]
+            result.labels[count] = HANDEDNESS_LABELS.get(int(handedness[slot]))
+            count += 1
+        return count
+
+
+def scriptFromRecording(path):
+    """A StubDetectorBackend script with the hands of a landmark recording."""
+    from Sources import HANDEDNESS_LABELS
+    data = np.load(path, allow_pickle=False)
+    script = []
+    for landmarks, present, handedness in zip(data["landmarks"], data["present"], data["handedness"]):
+        script.append([(landmarks[slot], HANDEDNESS_LABELS.get(int(handedness[slot])))
+                       for slot in np.flatnonzero(present)])
+    return script
+
+
+def main(argv=None):
+    import argparse
+
+    import HandTrackingModule as htm
+    from Backends import RecordingBackend
+    from GestureModes import modeSettings
+    from Pipeline import runMode
+    from Sources import VideoFileSource
+
+    parser = argparse.ArgumentParser(description="Compare synchronous and pipelined detection.")
+    parser.add_argument("recording", help=".npz recording; its hands become the stub's script")
+    parser.add_argument("--mode", default="gesture")
+    parser.add_argument("--delay", type=float, default=0.02, help="simulated stub inference time, s")
+    parser.add_argument("--capture", type=float, default=0.015, help="simulated capture time, s")
+    parser.add_argument("--video", help="also compare MediaPipe sync vs async on this video")
+    args = parser.parse_args(argv)
+    maxHands = modeSettings(args.mode)["maxHands"]
+    script = scriptFromRecording(args.recording)
+
+    class SlowCapture():
+        # blank live frames, each read taking `capture` seconds like a decode or an exposure
+        live = True
+        finished = False
+
+        def __init__(self, frames):
+            self.frames = frames
+            self.img = np.zeros((480, 640, 3), dtype=np.uint8)
+
+        def read(self):
+            if self.frames <= 0:
+                self.finished = True
+                return False, None, time.perf_counter()
+            self.frames -= 1
+            time.sleep(args.capture)
+            return True, self.img, time.perf_counter()
+
+        def release(self):
+            pass
+
+    def run(detector, source):
+        backend = RecordingBackend()
+        t0 = time.perf_counter()
+        metrics = runMode(args.mode, source=source, backend=backend, detector=detector,
+                          settings={"cursorRate": 0})
+        elapsed = time.perf_counter() - t0
+        detector.close()
+        return metrics.frames / elapsed, backend.counts()
+
+    # a capture that takes time (decode, exposure): synchronous frames cost capture + inference,
+    # pipelined ones the slower of the two
+    results = {}
+    for label, pipelined in (("sync", False), ("async", True)):
+        backend = StubDetectorBackend(script, maxHands, delay=args.delay)
+        if pipelined:
+            backend = AsyncDetectorBackend(backend)
+        results[label] = run(htm.handDetector(maxHands=maxHands, backend=backend),
+                             SlowCapture(len(script)))
+        print(f"[DetectorBackends] stub {label}: {results[label][0]:.1f} fps with "
+              f"{1000 * args.capture:.0f} ms capture, {1000 * args.delay:.0f} ms inference, "
+              f"actions {results[label][1]}")
+
+    if args.video:
+        for label, pipelined in (("sync", False), ("async", True)):
+            fps, _ = run(htm.handDetector(maxHands=maxHands, asyncInference=pipelined),
+                         VideoFileSource(args.video))
+            print(f"[DetectorBackends] MediaPipe {label}: {fps:.1f} fps on {args.video}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,320 @@
+"""
+Always-on flight recorder.
+
+FlightRecorder keeps the last few seconds of a running mode in ring buffers
+that are allocated once, on the first frame:
+
+  * frames downscaled to `width` px (cv2.resize into the ring slot),
+  * raw landmarks, presence and handedness per hand slot,
+  * the finger states the controller saw,
+  * per-stage timings (capture, detect, act),
+  * discrete actions (clicks, buttons, keys) logged by FlightBackend.
+
+Nothing is allocated per frame. When something goes wrong, the ring is
+copied and written on a background thread as a landmark recording (the
+Sources.RecordingSource format, with the extra arrays alongside), so
+
+    python core/headless.py --mode gesture --source <dump>.npz
+    python core/FlightRecorder.py <dump>.npz   # replay with the recorded settings, compare actions
+
+reproduce it. Dumps are triggered by
+
+  * a latency spike: detect + act slower than spikeMs and spikeFactor x its average,
+  * trigger(reason) from elsewhere: watchdog events, the launcher button,
+    the "f" key in the OpenCV window,
+  * an unexpected action: any (action, args) in watchActions, e.g. the close
+    hotkey (see unexpectedActions).
+
+Dumps go to flight/ in the user data dir, at most one per minInterval.
+"""
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from AppPaths import userDataPath
+from Sources import HANDEDNESS_CODES
+
+STAGES = ("capture", "detect", "act")
+DISCRETE_ACTIONS = ("click", "mouseDown", "mouseUp", "press", "hotkey")
+
+
+def unexpectedActions(settings):
+    """Actions worth a dump when fired: the ones that close or hide the user's work."""
+    watch = []
+    for key in ("closeKeys", "minimizeKeys"):
+        if key in settings:
+            watch.append(("hotkey", tuple(settings[key])))
+    return watch
+
+
+class FlightBackend():
+    """Forwards actions to backend and logs the discrete ones in the flight recorder."""
+
+    def __init__(self, backend, recorder):
+        self.backend = backend
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        # move, scroll, beginFrame, layout queries: straight through
+        return getattr(self.backend, name)
+
+    def click(self, button='left'):
+        self.recorder.action("click", button)
+        self.backend.click(button)
+
+    def mouseDown(self, button='left'):
+        self.recorder.action("mouseDown", button)
+        self.backend.mouseDown(button)
+
+    def mouseUp(self, button='left'):
+        self.recorder.action("mouseUp", button)
+        self.backend.mouseUp(button)
+
+    def press(self, key):
+        self.recorder.action("press", key)
+        self.backend.press(key)
+
+    def hotkey(self, *keys):
+        self.recorder.action("hotkey", *keys)
+        self.backend.hotkey(*keys)
+
+
+class FlightRecorder():
+    def __init__(self, mode=None, settings=None, seconds=10.0, fps=30, width=160, maxHands=2,
+                 maxActions=256, spikeMs=100.0, spikeFactor=4.0, warmupFrames=30, watchActions=(),
+                 minInterval=10.0, directory=None, keepDumps=20):
+        # the ring holds seconds * fps frames; faster sources cover proportionally less time
+        self.mode = mode
+        self.settings = dict(settings or {})  # runPipeline swaps in the controller's settings
+        self.capacity = max(1, int(seconds * fps))
+        self.width = width
+        self.maxHands = maxHands
+        self.spikeMs = spikeMs
+        self.spikeFactor = spikeFactor
+        self.warmupFrames = warmupFrames
+        self.watchActions = {(action, tuple(args)) for action, args in watchActions}
+        self.minInterval = minInterval
+        self.directory = directory
+        self.keepDumps = keepDumps
+
+        n = self.capacity
+        self.frames = None  # (n, h, w, 3), sized on the first frame
+        self.frameSize = None
+        self.timestamps = np.zeros(n)
+        self.landmarks = np.zeros((n, maxHands, 21, 3), dtype=np.float32)
+        self.present = np.zeros((n, maxHands), dtype=bool)
+        self.handedness = np.zeros((n, maxHands), dtype=np.uint8)
+        self.fingers = np.zeros((n, 5), dtype=np.int8)
+        self.timings = np.zeros((n, len(STAGES)), dtype=np.float32)  # ms
+        self.count = 0  # frames seen; the newest is slot (count - 1) % capacity
+
+        self.actionLock = threading.Lock()
+        self.actionFrame = np.zeros(maxActions, dtype=np.int64)
+        self.actionTime = np.zeros(maxActions)
+        self.actionName = np.zeros(maxActions, dtype="U10")
+        self.actionArgs = np.zeros(maxActions, dtype="U32")
+        self.actionCount = 0
+
+        self.latency = None  # running average of detect + act, s
+        self.pending = None  # reason of a requested dump
+        self.lastDump = -float("inf")
+        self.dumps = []
+        self.writer = None
+
+    def wrap(self, backend):
+        return FlightBackend(backend, self)
+
+    def add(self, detector, img, timestamp):
+        """Store one detected frame (same signature as a recorder)."""
+        if self.frames is None:
+            h, w = img.shape[:2]
+            self.frameSize = (w, h)
+            self.frames = np.zeros((self.capacity, max(1, round(h * self.width / w)), self.width, 3),
+                                   dtype=np.uint8)
+        slot = self.count % self.capacity
+        frame = self.frames[slot]
+        # INTER_LINEAR: a tenth of INTER_AREA's cost, and good enough to see what happened
+        cv2.resize(img, (frame.shape[1], frame.shape[0]), dst=frame, interpolation=cv2.INTER_LINEAR)
+        self.timestamps[slot] = timestamp
+        hands = min(self.maxHands, detector.maxHands)
+        self.landmarks[slot, :hands] = detector.rawLandmarks[:hands]
+        self.present[slot, :hands] = detector.present[:hands]
+        for hand in range(hands):
+            self.handedness[slot, hand] = HANDEDNESS_CODES.get(detector.handedness[hand], 0)
+        self.count += 1
+
+    def endFrame(self, detector, t0, t1, t2, t3):
+        """Finger states and timings of the frame just acted on; dumps if anything tripped."""
+        if not self.count:
+            return
+        slot = (self.count - 1) % self.capacity
+        self.fingers[slot] = detector.fingersUp()
+        timings = self.timings[slot]
+        timings[0] = 1000 * (t1 - t0)
+        timings[1] = 1000 * (t2 - t1)
+        timings[2] = 1000 * (t3 - t2)
+
+        latency = t3 - t1
+        if self.latency is None:
+            self.latency = latency
+        elif self.count > self.warmupFrames and latency > self.spikeMs / 1000 \
+                and latency > self.spikeFactor * self.latency:
+            self.trigger(f"spike {1000 * latency:.0f}ms")
+        else:
+            # spikes stay out of the average so a stall does not hide the next one
+            self.latency += 0.05 * (latency - self.latency)
+
+        if self.pending is not None:
+            self.dump()
+
+    def action(self, name, *args):
+        """Log a discrete action (any thread); watched actions request a dump."""
+        with self.actionLock:
+            i = self.actionCount % len(self.actionFrame)
+            self.actionFrame[i] = self.count - 1
+            self.actionTime[i] = time.perf_counter()
+            self.actionName[i] = name
+            self.actionArgs[i] = "+".join(map(str, args))
+            self.actionCount += 1
+        if (name, args) in self.watchActions:
+            self.trigger(f"{name} {'+'.join(map(str, args))}")
+
+    def trigger(self, reason):
+        """Ask for a dump at the end of the current frame (any thread)."""
+        if self.pending is None:
+            self.pending = reason
+
+    def dump(self, reason=None):
+        """Copy the ring and write it on a background thread. Returns the path or None."""
+        reason = reason or self.pending or "manual"
+        self.pending = None
+        now = time.perf_counter()
+        if not self.count or now - self.lastDump < self.minInterval:
+            return None
+        self.lastDump = now
+
+        n = min(self.count, self.capacity)
+        order = (np.arange(n) + self.count - n) % self.capacity
+        first = self.count - n
+        with self.actionLock:
+            m = min(self.actionCount, len(self.actionFrame))
+            actions = (np.arange(m) + self.actionCount - m) % len(self.actionFrame)
+            keep = actions[self.actionFrame[actions] >= first]
+            actionArrays = dict(actionFrame=self.actionFrame[keep] - first, actionTime=self.actionTime[keep],
+                                actionName=self.actionName[keep], actionArgs=self.actionArgs[keep])
+        data = dict(timestamps=self.timestamps[order], landmarks=self.landmarks[order],
+                    present=self.present[order], handedness=self.handedness[order],
+                    frameSize=np.asarray(self.frameSize), frames=self.frames[order],
+                    fingers=self.fingers[order], timings=self.timings[order], stages=np.array(STAGES),
+                    reason=np.array(reason), mode=np.array(self.mode or ""),
+                    settings=np.array(json.dumps(self.settings)), **actionArrays)
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        slug = "".join(c if c.isalnum() else "_" for c in reason)[:24]
+        if self.directory is None:
+            path = userDataPath("flight", f"{stamp}-{self.mode or 'run'}-{slug}.npz")
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{stamp}-{self.mode or 'run'}-{slug}.npz")
+        self.dumps.append(path)
+        self.writer = threading.Thread(target=self._write, args=(path, data, reason), name="FlightDump",
+                                       daemon=True)
+        self.writer.start()
+        return path
+
+    def _write(self, path, data, reason):
+        try:
+            np.savez_compressed(path, **data)
+        except OSError as e:
+            print(f"[Flight] could not write {path}: {e}")
+            return
+        print(f"[Flight] {reason}: saved the last {len(data['timestamps'])} frames to {path}")
+        directory = os.path.dirname(path)
+        dumps = sorted(f for f in os.listdir(directory) if f.endswith(".npz"))
+        for old in dumps[:-self.keepDumps]:
+            try:
+                os.remove(os.path.join(directory, old))
+            except OSError:
+                pass
+
+    def wait(self, timeout=10.0):
+        """Block until the last dump is on disk."""
+        if self.writer is not None:
+            self.writer.join(timeout)
+
+
+def replayDump(path, mode=None, settings=None):
+    """Run a dump through its mode with its settings; returns (recorded, replayed) actions
+    as lists of (frame, action, args)."""
+    from Backends import RecordingBackend
+    from Pipeline import runMode
+    from Sources import RecordingSource
+
+    data = np.load(path, allow_pickle=False)
+    mode = mode or str(data["mode"])
+    replaySettings = json.loads(str(data["settings"]))
+    replaySettings.update(settings or {"cursorRate": 0})
+    recorded = [(int(f), str(a), tuple(str(args).split("+")) if str(args) else ())
+                for f, a, args in zip(data["actionFrame"], data["actionName"], data["actionArgs"])]
+    backend = RecordingBackend()
+    runMode(mode, source=RecordingSource(path), backend=backend, settings=replaySettings)
+    replayed = [(f, a, tuple(map(str, args))) for f, _, _, a, args in backend.events if a in DISCRETE_ACTIONS]
+    return recorded, replayed
+
+
+def main(argv=None):
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Replay a flight recorder dump, or time the recorder.")
+    parser.add_argument("path", help="a flight dump (.npz), or a landmark recording with --bench")
+    parser.add_argument("--bench", action="store_true", help="per-frame cost of the recorder on a recording")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        from GestureModes import modeSettings
+        from HandTrackingModule import replayDetector
+        from Sources import RecordingSource
+
+        settings = modeSettings("gesture")
+        source = RecordingSource(args.path)
+        detector = replayDetector(source, maxHands=settings["maxHands"])
+        _, img, timestamp = source.read()
+        detector.findHands(img, draw=False, timestamp=timestamp)
+        with tempfile.TemporaryDirectory() as tmp:
+            flight = FlightRecorder("gesture", settings, directory=tmp)
+            for _ in range(100):
+                flight.add(detector, img, timestamp)
+                flight.endFrame(detector, 0.0, 0.001, 0.002, 0.003)
+            t0 = time.perf_counter()
+            for _ in range(1000):
+                flight.add(detector, img, timestamp)
+                flight.endFrame(detector, 0.0, 0.001, 0.002, 0.003)
+            cost = (time.perf_counter() - t0) / 1000
+        print(f"[Flight] recorder: {1000 * cost:.3f} ms/frame, "
+              f"ring {(flight.frames.nbytes + flight.landmarks.nbytes) / 1e6:.1f} MB")
+        return 0
+
+    data = np.load(args.path, allow_pickle=False)
+    if "reason" not in data.files:
+        print(f"[Flight] {args.path} is not a flight recorder dump")
+        return 1
+    print(f"[Flight] {args.path}: {str(data['reason'])}, {len(data['timestamps'])} frames of "
+          f"{str(data['mode'])} mode")
+    timings = data["timings"]
+    for i, stage in enumerate(data["stages"]):
+        print(f"[Flight]   {stage}: mean {timings[:, i].mean():.2f} ms, max {timings[:, i].max():.2f} ms")
+    recorded, replayed = replayDump(args.path)
+    print(f"[Flight] recorded actions: {recorded}")
+    print(f"[Flight] replayed actions: {replayed}")
+    same = [(f, a) for f, a, _ in recorded] == [(f, a) for f, a, _ in replayed]
+    print(f"[Flight] replay {'matches' if same else 'differs'}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,384 @@
+"""
+Mode controllers.
+
+A controller turns one frame's hand state into actions on an output backend
+(see Backends.py). Capture, detection and display are owned by Pipeline, so
+the same controller runs live on a webcam, on a video file or on a landmark
+recording, with real or recorded output.
+
+Per-action pauses (click debounce, slide-change delay, ...) are cooldowns
+measured on the capture timeline rather than time.sleep calls, so the cursor
+keeps moving during a cooldown and replays can run faster than real time.
+
+controller.gesture names the gesture recognized in the last frame ("move",
+"click", "drag", "scroll", "next", ...; "" for none), for the overlay,
+flight dumps and HandState readers.
+"""
+import time
+import cv2
+
+from CursorOutput import CursorOutputThread
+from ScreenMapping import CursorMapper
+from ScrollEngine import ScrollEngine
+from BimanualGestures import BimanualGestures
+from AirTap import AirTapDetector
+
+
+DEFAULT_SETTINGS = {
+    "wCam": 640,
+    "hCam": 480,
+    "frameR": 100,  # Frame Reduction
+    "smoothening": 9,
+    "cursorRate": 120,  # Hz; 0 moves the pointer synchronously once per frame
+    "cursorTarget": "virtual",  # "virtual" (all monitors), "primary" or a monitor index
+    "extrapolate": False,
+    "maxHands": 1,
+    "detectionCon": 0.5,
+    "trackCon": 0.5,
+    "modelComplexity": 1,  # 0 = lite hand model
+    "inputScale": 1.0,  # shrink frames before inference
+    "asyncInference": False,  # infer frame N while acting on frame N-1 (one frame of lag)
+    "clickDistance": 20,  # px between index and middle fingertips
+    "clickCooldown": 0.25,
+    "dragCooldown": 0.5,
+    "exitMargin": 40,  # px the thumb tip must hang below its joint to exit
+}
+
+MODE_SETTINGS = {
+    "gesture": {"maxHands": 2, "minimizeCooldown": 1.5, "closeCooldown": 2.0,
+                "minimizeKeys": ["win", "m"], "closeKeys": ["ctrl", "w"]},
+    "normal": {},
+    "presentation": {"slideCooldown": 1.5, "nextSlideKey": "right", "previousSlideKey": "left"},
+    "gaming": {"cursorTarget": "primary", "extrapolate": True,
+               "airTap": True},  # flick the index finger to click (see AirTap.py); pinch works too
+}
+
+
+def modeSettings(mode, overrides=None):
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update(MODE_SETTINGS[mode])
+    if overrides:
+        settings.update(overrides)
+    return settings
+
+
+class ModeController():
+    mode = None
+
+    def __init__(self, backend, settings=None, draw=True):
+        self.backend = backend
+        self.settings = modeSettings(self.mode, settings)
+        self.draw = draw
+        self.gfx = cv2  # drawing target; runPipeline swaps in an Overlay.FrameOverlay
+        self.cooldowns = {}
+        self.metrics = None  # set by runPipeline
+        self.requestedAt = None
+        self.gesture = ""  # set by process() for the frame it acted on
+        for key, value in self.settings.items():
+            setattr(self, key, value)
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def configure(self, changes):
+        """Apply changed settings between two frames (profile hot reload, see Profiles.py)."""
+        self.settings.update(changes)
+        for key, value in changes.items():
+            setattr(self, key, value)
+
+    def process(self, img, detector, frameTime):
+        """Act on one frame. Returns False when the user asked to leave the mode."""
+        return True
+
+    def ready(self, action, now):
+        return now >= self.cooldowns.get(action, 0.0)
+
+    def arm(self, action, now, seconds):
+        self.cooldowns[action] = now + seconds
+
+    def label(self, img, text, org, color, font=cv2.FONT_HERSHEY_PLAIN, scale=2, thickness=2):
+        if self.draw:
+            self.gfx.putText(img, text, org, font, scale, color, thickness)
+
+
+class CursorController(ModeController):
+    """Shared pointer plumbing: mapping, smoothing, output thread, clicks and exit."""
+
+    def start(self):
+        self.plocX, self.plocY = 0, 0
+        self.moved = False
+        self.dragging = False  # the fist gesture holds the left button
+        self.mapper = CursorMapper((self.wCam, self.hCam), self.frameR, target=self.cursorTarget,
+                                   layoutFunc=self.backend.getDisplayLayout,
+                                   signatureFunc=self.backend.layoutSignature)
+        self.scroll = ScrollEngine(self.backend.scroll) if self.mode == "gesture" else None
+        self.cursor = CursorOutputThread(self.backend.move, rate=self.cursorRate,
+                                         extrapolate=self.extrapolate,
+                                         bounds=self.mapper.bounds, scroll=self.scroll)
+        self.cursor.start()
+
+    def close(self):
+        self.cursor.stop()
+
+    def configure(self, changes):
+        super().configure(changes)
+        if "frameR" in changes or "cursorTarget" in changes:
+            self.mapper.frameR = self.frameR
+            self.mapper.target = self.cursorTarget
+            self.mapper.rebuild(self.mapper.camSize, self.mapper.layout)
+            self.cursor.bounds = self.mapper.bounds
+        self.cursor.extrapolate = self.extrapolate
+        if "cursorRate" in changes:
+            self.cursor.stop()
+            self.cursor.rate = self.cursorRate
+            self.cursor.start()
+
+    def beginFrame(self, img):
+        if self.mapper.update(img.shape[1], img.shape[0]):
+            self.cursor.bounds = self.mapper.bounds
+        if self.draw:
+            self.gfx.rectangle(img, (self.frameR, self.frameR),
+                               (img.shape[1] - self.frameR, img.shape[0] - self.frameR), (255, 0, 255), 2)
+
+    def endFrame(self, frameTime):
+        if self.cursorRate <= 0:
+            self.cursor.tick(frameTime)
+
+    def moveTo(self, img, x1, y1, frameTime):
+        self.gesture = "move"
+        x3, y3 = self.mapper.map(x1, y1)
+        clocX = self.plocX + (x3 - self.plocX) / self.smoothening
+        clocY = self.plocY + (y3 - self.plocY) / self.smoothening
+        self.cursor.setTarget(clocX, clocY, frameTime)
+        if not self.moved:
+            self.moved = True
+            if self.metrics is not None and self.requestedAt is not None:
+                self.metrics.gauge("firstMove_ms", 1000 * (time.perf_counter() - self.requestedAt))
+        if self.draw:
+            self.gfx.circle(img, (x1, y1), 15, (255, 0, 255), cv2.FILLED)
+        self.plocX, self.plocY = clocX, clocY
+
+    def pinchClick(self, img, detector, frameTime):
+        length, img, lineInfo = detector.findDistance(8, 12, img, draw=self.draw)
+        if length < self.clickDistance:
+            self.gesture = "click"
+        if length < self.clickDistance and self.ready("click", frameTime):
+            if self.draw:
+                self.gfx.circle(img, (lineInfo[4], lineInfo[5]), 15, (0, 255, 0), cv2.FILLED)
+            self.backend.click('left')
+            self.arm("click", frameTime, self.clickCooldown)
+
+    def dragGestures(self, img, fingers, frameTime):
+        if fingers == [0, 0, 0, 0, 0]:
+            self.gesture = "drag"
+            if self.ready("drag", frameTime):
+                self.backend.mouseDown('left')
+                self.dragging = True
+                self.arm("drag", frameTime, self.dragCooldown)
+            self.label(img, "Dragging...", (20, 100), (0, 0, 255))
+        elif fingers == [1, 1, 1, 1, 1]:
+            self.gesture = "release"
+            # only a press of our own: a second-hand pinch (BimanualGestures) may be holding it
+            if self.dragging:
+                self.backend.mouseUp('left')
+                self.dragging = False
+            self.label(img, "Released", (20, 100), (0, 255, 0))
+
+    def thumbsDown(self, img, detector):
+        hand = detector.features(detector.positionHand)
+        if hand is not None and hand.pixels[4, 1] > hand.pixels[3, 1] + self.exitMargin:
+            self.gesture = "exit"
+            self.label(img, "Thumbs Down - Exiting...", (20, 150), (0, 0, 255))
+            return True
+        return False
+
+
+class GestureController(CursorController):
+    mode = "gesture"
+
+    def start(self):
+        super().start()
+        self.bimanual = BimanualGestures()
+
+    def close(self):
+        for action, value in self.bimanual.reset():
+            self.backend.mouseUp('left')
+        super().close()
+
+    def process(self, img, detector, frameTime):
+        self.gesture = ""
+        self.beginFrame(img)
+        lmList, bbox = detector.findPosition(img, draw=self.draw)
+
+        # Second hand: pinch to click or drag, pinch with both hands to zoom
+        if detector.handCount > 1:
+            bimanualActions = self.bimanual.update(detector.features(0), detector.features(1))
+        else:
+            bimanualActions = self.bimanual.reset()
+        for action, value in bimanualActions:
+            if action == "press":
+                self.backend.mouseDown('left')
+            elif action == "release":
+                self.backend.mouseUp('left')
+            elif action == "zoom":
+                self.backend.hotkey('ctrl', '+' if value > 0 else '-')
+        if self.bimanual.zoomRef is not None:
+            self.gesture = "zoom"
+        elif self.bimanual.pressed:
+            self.gesture = "pinch"
+
+        keepRunning = True
+        if len(lmList) != 0:
+            x1, y1 = lmList[8][1:]
+            fingers = detector.fingersUp()
+
+            # Moving mode
+            if fingers[1] == 1 and fingers[2] == 0:
+                self.moveTo(img, x1, y1, frameTime)
+
+            # Clicking mode
+            if fingers[1] == 1 and fingers[2] == 1:
+                self.pinchClick(img, detector, frameTime)
+
+            # Dragging mode
+            self.dragGestures(img, fingers, frameTime)
+
+            # Scroll mode
+            if fingers == [0, 1, 1, 0, 0]:
+                self.scroll.setVelocity(self.scroll.velocityFor(y1, self.frameR, img.shape[0] - self.frameR),
+                                        frameTime)
+                self.gesture = "scroll"
+                self.label(img, "Scroll Mode", (20, 100), (0, 255, 0))
+            else:
+                self.scroll.release()
+
+            # Exit gesture
+            if self.thumbsDown(img, detector):
+                keepRunning = False
+
+            # Minimize
+            elif fingers == [1, 0, 0, 0, 1] and self.ready("minimize", frameTime):
+                self.backend.hotkey(*self.minimizeKeys)
+                self.gesture = "minimize"
+                self.arm("minimize", frameTime, self.minimizeCooldown)
+                self.label(img, "→ Minimize", (200, 100), (0, 255, 0), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
+
+            # Close
+            elif (fingers == [1, 1, 0, 0, 1] or fingers == [1, 0, 0, 1, 1]) \
+                    and self.ready("close", frameTime):
+                self.backend.hotkey(*self.closeKeys)
+                self.gesture = "close"
+                self.arm("close", frameTime, self.closeCooldown)
+                self.label(img, "→ Close", (200, 100), (0, 255, 0), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
+        else:
+            self.scroll.release()
+
+        self.endFrame(frameTime)
+        return keepRunning
+
+
+class NormalController(CursorController):
+    mode = "normal"
+
+    def process(self, img, detector, frameTime):
+        self.gesture = ""
+        self.beginFrame(img)
+        lmList, bbox = detector.findPosition(img, draw=self.draw)
+        if len(lmList) != 0:
+            x1, y1 = lmList[8][1:]
+            fingers = detector.fingersUp()
+            if fingers[1] == 1 and fingers[2] == 0:
+                self.moveTo(img, x1, y1, frameTime)
+            if fingers[1] == 1 and fingers[2] == 1:
+                self.pinchClick(img, detector, frameTime)
+        self.endFrame(frameTime)
+        return True
+
+
+class GamingController(CursorController):
+    mode = "gaming"
+
+    def start(self):
+        super().start()
+        self.airTapDetector = AirTapDetector()
+        self.tapAnchor = None  # cursor target when the running stroke began
+
+    def close(self):
+        if self.airTapDetector.state == "pressed":
+            self.backend.mouseUp('left')
+        super().close()
+
+    def airTapClick(self, detector, frameTime):
+        """Feed the air-tap detector; True while a tap holds the cursor still."""
+        hand = detector.features(0)
+        event = self.airTapDetector.update(None if hand is None else detector.rawLandmarks[hand.slot], frameTime)
+        if self.airTapDetector.active and self.tapAnchor is None:
+            # the stroke began on the previous frame, whose target the cursor is still heading to
+            self.tapAnchor = (self.plocX, self.plocY)
+            self.cursor.jumpTo(self.plocX, self.plocY, frameTime)
+        if event == "press":
+            self.backend.mouseDown('left')
+        elif event == "release":
+            self.backend.mouseUp('left')
+        if not self.airTapDetector.active:
+            self.tapAnchor = None
+            return False
+        self.gesture = "tap"
+        return True
+
+    def process(self, img, detector, frameTime):
+        self.gesture = ""
+        self.beginFrame(img)
+        lmList, bbox = detector.findPosition(img, draw=self.draw)
+        keepRunning = True
+        tapping = self.airTap and self.airTapClick(detector, frameTime)
+        if len(lmList) != 0:
+            x1, y1 = lmList[8][1:]
+            fingers = detector.fingersUp()
+            # Only Index Finger : Moving Mode
+            if fingers[1] == 1 and not tapping:
+                self.moveTo(img, x1, y1, frameTime)
+            self.dragGestures(img, fingers, frameTime)
+            if self.thumbsDown(img, detector):
+                keepRunning = False
+            elif fingers[1] == 1 and fingers[2] == 1:
+                self.pinchClick(img, detector, frameTime)
+        self.endFrame(frameTime)
+        return keepRunning
+
+
+class PresentationController(ModeController):
+    mode = "presentation"
+
+    def process(self, img, detector, frameTime):
+        self.gesture = ""
+        lmList, bbox = detector.findPosition(img, draw=self.draw)
+        fingers = detector.fingersUp()
+        if not self.ready("slide", frameTime):
+            return True
+
+        # Next Slide: Index + Middle fingers (2 fingers)
+        if fingers == [0, 1, 1, 0, 0]:
+            self.backend.press(self.nextSlideKey)
+            self.gesture = "next"
+            self.arm("slide", frameTime, self.slideCooldown)
+            self.label(img, "→ Next Slide", (200, 100), (0, 255, 0), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
+
+        # Previous Slide: Only Index finger
+        elif fingers == [0, 1, 0, 0, 0]:
+            self.backend.press(self.previousSlideKey)
+            self.gesture = "previous"
+            self.arm("slide", frameTime, self.slideCooldown)
+            self.label(img, "← Previous Slide", (150, 100), (0, 0, 255), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
+        return True
+
+
+CONTROLLERS = {
+    "gesture": GestureController,
+    "normal": NormalController,
+    "presentation": PresentationController,
+    "gaming": GamingController,
+}
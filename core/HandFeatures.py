@@ -0,0 +1,243 @@
+"""
+Per-frame hand features shared by every gesture check.
+
+handDetector.features(handNo) returns the HandFeatures of a hand for the
+current frame (keyed by the detector's frameId). Each feature is computed at
+most once per frame, on first use, with in-place NumPy operations on
+preallocated arrays:
+
+  points        (21, 3) normalized landmarks (the smoothed ones the modes act on)
+  pixels        (21, 2) int pixel coordinates, truncated like findPosition always did
+  scale         wrist to middle-finger knuckle, normalized
+  local         (21, 3) landmarks relative to the wrist, divided by scale
+  tipDistance   (5, 5) fingertip-to-fingertip distances, normalized
+  tipPixels     (5, 5) the same in pixels (clickDistance and friends are pixels)
+  angles        (5, 3) bend at the three joints of each finger, radians (0 = straight)
+  extension     (5,) base-to-tip distance over finger length (1 = fully straight)
+  fingers       the fingersUp() list (fingerMask: the same as bits, thumb = 1)
+
+Gesture predicates and classifiers read these instead of recomputing
+geometry from lmList, so adding one costs a few attribute reads per frame.
+
+    python core/HandFeatures.py session.npz   # per-frame cost against the lmList helpers
+"""
+import math
+
+import numpy as np
+
+WRIST, MIDDLE_MCP = 0, 9
+TIPS = np.array([4, 8, 12, 16, 20])
+TIP_INDEX = {int(tip): i for i, tip in enumerate(TIPS)}
+# wrist plus the four joints of each finger, thumb first
+FINGER_CHAINS = np.array([[0, 1, 2, 3, 4], [0, 5, 6, 7, 8], [0, 9, 10, 11, 12],
+                          [0, 13, 14, 15, 16], [0, 17, 18, 19, 20]])
+# fingersUp(): thumb tip right of its IP joint, other tips above their PIP joints
+UP_TIPS = TIPS[1:]
+UP_JOINTS = TIPS[1:] - 2
+UP_BITS = np.array([2, 4, 8, 16])
+
+# every possible fingersUp() result, prebuilt so the per-frame path does not allocate
+FINGER_STATES = [[(mask >> finger) & 1 for finger in range(5)] for mask in range(32)]
+
+
+# feature groups, computed on first access in a frame
+_LOCAL, _TIP_DISTANCE, _TIP_PIXELS, _JOINTS = 1, 2, 4, 8
+
+
+class HandFeatures():
+    """Features of one hand slot. points, pixels and fingers are computed by
+    update(); the rest on first access in the frame, then served from cache."""
+
+    def __init__(self):
+        self.frameId = -1
+        self.slot = None
+        self.points = np.zeros((21, 3))
+        self.pixels = np.zeros((21, 2), dtype=np.int32)
+        self.fingers = FINGER_STATES[0]
+        self.fingerMask = 0  # fingers as bits, thumb = 1
+        self._done = 0
+        self._scale = 0.0
+        self._local = np.zeros((21, 3))
+        self._tipDistance = np.zeros((5, 5))
+        self._tipPixels = np.zeros((5, 5))
+        self._angles = np.zeros((5, 3))
+        self._extension = np.zeros(5)
+
+        # scratch, so nothing here allocates arrays per frame
+        self._pixelScratch = np.zeros((21, 2))
+        self._tips = np.zeros((5, 2))
+        self._tipPx = np.zeros((5, 2), dtype=np.int32)
+        self._pairs = np.zeros((5, 5, 2))
+        self._chain = np.zeros((5, 5, 3))
+        self._segments = np.zeros((5, 4, 3))
+        self._products = np.zeros((5, 4, 3))
+        self._lengths = np.zeros((5, 4))
+        self._dots = np.zeros((5, 3))
+        self._span = np.zeros((5, 3))
+        self._reach = np.zeros((5, 3))
+        self._fingerLength = np.zeros(5)
+        self._upTips = np.zeros(4, dtype=np.int32)
+        self._upJoints = np.zeros(4, dtype=np.int32)
+        self._up = np.zeros(4, dtype=bool)
+
+    def update(self, frameId, slot, landmarks, frameScale):
+        """Take one hand's normalized (21, 3) landmarks for frame frameId."""
+        self.frameId = frameId
+        self.slot = slot
+        self._done = 0
+        np.copyto(self.points, landmarks)
+        np.multiply(self.points[:, :2], frameScale, out=self._pixelScratch)
+        # truncate like int() did
+        np.copyto(self.pixels, self._pixelScratch, casting="unsafe")
+
+        px = self.pixels
+        mask = 1 if px[4, 0] > px[3, 0] else 0
+        np.take(px[:, 1], UP_TIPS, out=self._upTips)
+        np.take(px[:, 1], UP_JOINTS, out=self._upJoints)
+        np.less(self._upTips, self._upJoints, out=self._up)
+        mask |= int(np.dot(self._up, UP_BITS))
+        self.fingerMask = mask
+        self.fingers = FINGER_STATES[mask]
+        return self
+
+    @property
+    def scale(self):
+        if not self._done & _LOCAL:
+            self._computeLocal()
+        return self._scale
+
+    @property
+    def local(self):
+        if not self._done & _LOCAL:
+            self._computeLocal()
+        return self._local
+
+    @property
+    def tipDistance(self):
+        if not self._done & _TIP_DISTANCE:
+            np.take(self.points[:, :2], TIPS, axis=0, out=self._tips)
+            self._pairwise(self._tips, self._tipDistance)
+            self._done |= _TIP_DISTANCE
+        return self._tipDistance
+
+    @property
+    def tipPixels(self):
+        if not self._done & _TIP_PIXELS:
+            np.take(self.pixels, TIPS, axis=0, out=self._tipPx)
+            self._pairwise(self._tipPx, self._tipPixels)
+            self._done |= _TIP_PIXELS
+        return self._tipPixels
+
+    @property
+    def angles(self):
+        if not self._done & _JOINTS:
+            self._computeJoints()
+        return self._angles
+
+    @property
+    def extension(self):
+        if not self._done & _JOINTS:
+            self._computeJoints()
+        return self._extension
+
+    def tipPixelDistance(self, p1, p2):
+        """Pixel distance between two landmarks, as findDistance measures it."""
+        if self._done & _TIP_PIXELS:
+            i, j = TIP_INDEX.get(p1), TIP_INDEX.get(p2)
+            if i is not None and j is not None:
+                return float(self._tipPixels[i, j])
+        px = self.pixels
+        return math.hypot(int(px[p2, 0]) - int(px[p1, 0]), int(px[p2, 1]) - int(px[p1, 1]))
+
+    def _computeLocal(self):
+        points = self.points
+        dx = points[MIDDLE_MCP, 0] - points[WRIST, 0]
+        dy = points[MIDDLE_MCP, 1] - points[WRIST, 1]
+        self._scale = scale = math.sqrt(dx * dx + dy * dy)
+        np.subtract(points, points[WRIST], out=self._local)
+        if scale > 0:
+            self._local /= scale
+        self._done |= _LOCAL
+
+    def _pairwise(self, tips, out):
+        np.subtract(tips[:, None, :], tips[None, :, :], out=self._pairs)
+        np.hypot(self._pairs[..., 0], self._pairs[..., 1], out=out)
+
+    def _computeJoints(self):
+        # bend between consecutive bones of each finger's wrist-relative 3D chain
+        np.take(self.local, FINGER_CHAINS, axis=0, out=self._chain)
+        segments = self._segments
+        np.subtract(self._chain[:, 1:], self._chain[:, :-1], out=segments)
+        np.multiply(segments, segments, out=self._products)
+        np.sum(self._products, axis=2, out=self._lengths)
+        np.sqrt(self._lengths, out=self._lengths)
+        np.multiply(segments[:, :-1], segments[:, 1:], out=self._products[:, :-1])
+        np.sum(self._products[:, :-1], axis=2, out=self._dots)
+        np.multiply(self._lengths[:, :-1], self._lengths[:, 1:], out=self._span)
+        np.maximum(self._span, 1e-9, out=self._span)
+        np.divide(self._dots, self._span, out=self._angles)
+        np.clip(self._angles, -1.0, 1.0, out=self._angles)
+        np.arccos(self._angles, out=self._angles)
+        # straight-line knuckle-to-tip distance over the length of the finger's bones
+        np.subtract(self._chain[:, -1], self._chain[:, 1], out=self._reach[:, :])
+        np.multiply(self._reach, self._reach, out=self._reach)
+        np.sum(self._reach, axis=1, out=self._extension)
+        np.sqrt(self._extension, out=self._extension)
+        np.sum(self._lengths[:, 1:], axis=1, out=self._fingerLength)
+        np.maximum(self._fingerLength, 1e-9, out=self._fingerLength)
+        self._extension /= self._fingerLength
+        self._done |= _JOINTS
+
+
+def main(argv=None):
+    import argparse
+    import math
+    import time
+
+    import HandTrackingModule as htm
+    from Sources import RecordingSource
+
+    parser = argparse.ArgumentParser(description="Per-frame cost of HandFeatures.")
+    parser.add_argument("recording", help=".npz landmark recording")
+    args = parser.parse_args(argv)
+
+    source = RecordingSource(args.recording)
+    detector = htm.replayDetector(source, maxHands=2)
+    frames = 0
+    cost = lazy = legacy = 0.0
+    while True:
+        success, img, timestamp = source.read()
+        if not success:
+            break
+        detector.findHands(img, draw=False, timestamp=timestamp)
+        lmList, _ = detector.findPosition(img, draw=False)
+        if not len(lmList):
+            continue
+        frames += 1
+        lm = lmList.copy()
+
+        # what a frame's checks cost computed from lmList, one helper call per check
+        t0 = time.perf_counter()
+        detector.fingersUp(lm)
+        detector.findDistance(8, 12, img, draw=False, lmList=lm)
+        lm[4][2] > lm[3][2] + 40
+        math.hypot(lm[8][1] - lm[4][1], lm[8][2] - lm[4][2])
+        legacy += time.perf_counter() - t0
+
+        detector.frameId += 1  # force a recompute so the timing covers it
+        t0 = time.perf_counter()
+        features = detector.features()
+        t1 = time.perf_counter()
+        features.tipDistance, features.tipPixels, features.angles, features.scale
+        cost += t1 - t0
+        lazy += time.perf_counter() - t1
+
+    print(f"[HandFeatures] {frames} frames with a hand")
+    print(f"[HandFeatures] per frame: {1e6 * cost / max(frames, 1):.1f} us (points, pixels, fingers), "
+          f"+{1e6 * lazy / max(frames, 1):.1f} us once anything reads every other feature; "
+          f"four lmList checks: {1e6 * legacy / max(frames, 1):.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
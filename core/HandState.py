@@ -0,0 +1,417 @@
+"""
+Live hand state in shared memory, for other local apps (overlays, whiteboards,
+analytics) that would otherwise open the camera and run MediaPipe again.
+
+The pipeline publishes every frame into a memory-mapped file (under /dev/shm
+where there is one, else in the user data dir) with a fixed layout, the
+numpy structured dtype stateDtype(hands), little-endian, C alignment:
+
+    seq            uint64    seqlock counter: odd while a frame is being written
+    magic          2 bytes   "GH"
+    version        uint8
+    hands          uint8     hand entries below
+    width, height  uint16    frame size the pixel coordinates refer to
+    frame          uint64    frames published since the pipeline started
+    captureTime    float64   capture time (time.perf_counter, shared by local processes)
+    publishTime    float64   when the frame was published (time.perf_counter)
+    wallTime       float64   publishTime as time.time, for readers without perf_counter
+    gesture        16 bytes  ASCII name of the recognized gesture ("move", "click", ...), NUL padded
+    present        uint8[hands]
+    handedness     uint8[hands]   Sources.HANDEDNESS_CODES
+    fingers        uint8[hands]   fingersUp() as bits, thumb = 1
+    landmarks      float32[hands, 21, 3]   smoothed normalized landmarks, pointer hand first
+
+The writer bumps seq to odd, writes the frame and bumps it back to even. A
+reader checks seq first, which costs nothing when no new frame arrived. When
+one has, it copies the fields it asked for (all of them by default, about
+0.6 kB for two hands, around a microsecond) into its own buffers and keeps the copy only if seq was
+even and unchanged across the copy; otherwise it retries. A consistent
+snapshot needs that small copy: values read straight from the mapping could
+change under the reader at any time. Readers never write to the mapping, and
+the writer never waits for or knows about them, so any number of readers
+cost the tracker nothing.
+
+The seqlock relies on stores becoming visible to other processes in the
+order they are made. x86 and x86-64 guarantee this, and Python and NumPy
+add no memory barriers of their own. On weakly ordered CPUs (ARM, such as
+Apple silicon or a Raspberry Pi), a reader may in rare cases accept a frame
+that mixes two publishes. Readers there should treat a frame as advisory
+and sanity-check it, for example by comparing frame and captureTime with
+the previous poll.
+
+    python core/headless.py --mode gesture --source 0 --backend real --hand-state
+    python core/HandState.py              # print what a running pipeline publishes
+    python core/HandState.py --bench      # publish cost with several reader processes polling
+
+Reading from another Python program (core/ on sys.path; the reader needs only numpy):
+
+    from HandState import HandStateReader
+    reader = HandStateReader()
+    while True:
+        if reader.poll():
+            print(reader.gesture, reader.fingers(0), reader.landmarks[0, 8])
+        time.sleep(0.01)
+
+A reader that needs only some fields copies only those:
+
+        if reader.poll(("gesture", "fingers", "present")):
+"""
+import mmap
+import os
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b"GH"
+VERSION = 1
+FILE_NAME = "hand_state.bin"
+GESTURE_BYTES = 16
+
+
+def stateDtype(hands):
+    return np.dtype([
+        ("seq", "<u8"),
+        ("magic", "S2"), ("version", "u1"), ("hands", "u1"), ("width", "<u2"), ("height", "<u2"),
+        ("frame", "<u8"),
+        ("captureTime", "<f8"), ("publishTime", "<f8"), ("wallTime", "<f8"),
+        ("gesture", f"S{GESTURE_BYTES}"),
+        ("present", "u1", (hands,)), ("handedness", "u1", (hands,)), ("fingers", "u1", (hands,)),
+        ("landmarks", "<f4", (hands, 21, 3)),
+    ], align=True)
+
+
+# offsets of the header fields every layout shares, whatever the hand count
+_HEADER = stateDtype(1)
+
+
+def statePath():
+    """Default location: RAM-backed /dev/shm if present, else the user data dir."""
+    if os.path.isdir("/dev/shm"):
+        return os.path.join("/dev/shm", f"gesture_mouse_{os.getuid()}_{FILE_NAME}")
+    from AppPaths import userDataPath
+    return userDataPath(FILE_NAME)
+
+
+class HandStateError(RuntimeError):
+    pass
+
+
+class HandStatePublisher():
+    """Writes the pipeline's hand state every frame; runPipeline's handState hook."""
+
+    def __init__(self, path=None, maxHands=2):
+        self.path = statePath() if path is None else path
+        self.hands = maxHands
+        self.dtype = stateDtype(maxHands)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # keep the file (and the mapping readers hold) across restarts;
+            # never shrink it either: a reader still mapping a longer layout must not fault
+            if os.fstat(fd).st_size < self.dtype.itemsize:
+                os.ftruncate(fd, self.dtype.itemsize)
+            self.map = mmap.mmap(fd, self.dtype.itemsize)
+        finally:
+            os.close(fd)
+        self.seq = np.ndarray((), dtype="<u8", buffer=self.map)
+        self.shared = np.ndarray(self.dtype.itemsize - 8, dtype=np.uint8, buffer=self.map, offset=8)
+        # frames are assembled here and copied in one go, so seq stays odd for about a microsecond
+        self.state = np.zeros((), dtype=self.dtype)
+        self.staged = self.state.reshape(1).view(np.uint8)[8:]
+        self.landmarks = self.state["landmarks"]
+        self.present = self.state["present"]
+        self.handedness = self.state["handedness"]
+        self.fingers = self.state["fingers"]
+        from Sources import HANDEDNESS_CODES
+        self.handednessCodes = HANDEDNESS_CODES
+        self.frames = 0
+        self.gestureCodes = {}  # gesture name -> encoded bytes, built once per name
+
+        self.state["magic"] = MAGIC
+        self.state["version"] = VERSION
+        self.state["hands"] = maxHands
+        seq = int(self.seq)
+        seq += seq % 2  # a publisher that died mid-frame left it odd
+        self.seq[...] = seq + 1
+        np.copyto(self.shared, self.staged)
+        self.seq[...] = seq + 2
+
+    def publish(self, detector, controller, img, timestamp):
+        codes = self.handednessCodes
+        gesture = self.gestureCodes.get(controller.gesture)
+        if gesture is None:
+            gesture = self.gestureCodes[controller.gesture] = controller.gesture.encode("ascii")[:GESTURE_BYTES]
+        state = self.state
+        state["width"] = img.shape[1]
+        state["height"] = img.shape[0]
+        state["frame"] = self.frames
+        state["captureTime"] = timestamp
+        state["publishTime"] = time.perf_counter()
+        state["wallTime"] = time.time()
+        state["gesture"] = gesture
+        count = min(detector.handCount, self.hands)
+        for handNo in range(count):
+            hand = detector.features(handNo)
+            self.landmarks[handNo] = hand.points
+            self.handedness[handNo] = codes.get(detector.handedness[hand.slot], 0)
+            self.fingers[handNo] = hand.fingerMask
+        self.present[:count] = 1
+        self.present[count:] = 0
+        # x86 keeps these stores in program order; on weakly ordered CPUs see the module docstring
+        seq = int(self.seq)
+        self.seq[...] = seq + 1
+        np.copyto(self.shared, self.staged)
+        self.seq[...] = seq + 2
+        self.frames += 1
+
+    def close(self):
+        # leave the file: readers see publishTime stop advancing, and a restarted pipeline reuses it
+        self.seq = self.shared = None
+        self.map.close()
+
+
+class HandStateReader():
+    """Polls the hand state a HandStatePublisher writes, from any local process.
+
+    After poll() returns True, the attributes hold one consistent frame:
+    frame, captureTime, publishTime, wallTime, width, height, gesture, and
+    the arrays present, handedness, fingerMasks (uint8 per hand) and
+    landmarks (hands, 21, 3). They are the reader's own copies, reused on
+    every poll. Fields left out of poll(fields) keep their older values.
+    """
+
+    def __init__(self, path=None, retries=100):
+        self.path = statePath() if path is None else path
+        self.retries = retries
+        self.map = None
+        self.seq = 0  # seq of the frame held
+        self.torn = 0  # copies discarded because the writer was mid-frame
+        self._open()
+
+    def _open(self):
+        if self.map is not None:
+            self.map.close()
+        try:
+            with open(self.path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise HandStateError(f"no hand state at {self.path} ({e}); is a mode running with --hand-state?")
+        header = np.ndarray((), dtype=_HEADER, buffer=self.map) if len(self.map) >= _HEADER.itemsize else None
+        if header is None or bytes(header["magic"]) != MAGIC or int(header["version"]) != VERSION:
+            self.map.close()
+            self.map = None
+            raise HandStateError(f"{self.path} is not a hand state file of version {VERSION}")
+        self.hands = int(header["hands"])
+        self.dtype = stateDtype(self.hands)
+        if len(self.map) < self.dtype.itemsize:
+            self.map.close()
+            self.map = None
+            raise HandStateError(f"{self.path} is truncated")
+        self.shared = np.ndarray((), dtype=self.dtype, buffer=self.map)
+        self.sharedSeq = self.shared["seq"]
+        self.copy = np.zeros((), dtype=self.dtype)
+        self.present = self.copy["present"]
+        self.handedness = self.copy["handedness"]
+        self.fingerMasks = self.copy["fingers"]
+        self.landmarks = self.copy["landmarks"]
+        self.fieldViews = {}  # fields tuple -> [(shared view, copy view)]
+        self.seq = 0
+
+    def _views(self, fields):
+        # byte ranges: plain memory copies, much cheaper than copying structured fields
+        views = self.fieldViews.get(fields)
+        if views is None:
+            shared = np.ndarray(self.dtype.itemsize, dtype=np.uint8, buffer=self.map)
+            copy = self.copy.reshape(1).view(np.uint8)
+            if fields is None:
+                ranges = [(8, self.dtype.itemsize)]  # everything after seq
+            else:
+                ranges = []
+                for name in ("hands",) + tuple(fields):
+                    fieldType, offset = self.dtype.fields[name][:2]
+                    ranges.append((offset, offset + fieldType.itemsize))
+            views = self.fieldViews[fields] = [(shared[a:b], copy[a:b]) for a, b in ranges]
+        return views
+
+    def poll(self, fields=None):
+        """Take the newest frame if there is one: True if the attributes changed.
+
+        fields is a tuple of stateDtype field names to copy, e.g. ("gesture",
+        "fingers", "present"); by default all of them are copied.
+        """
+        for _ in range(self.retries):
+            before = int(self.sharedSeq)
+            if before == self.seq:
+                return False
+            if before % 2:
+                self.torn += 1
+                continue
+            for shared, copy in self._views(fields):
+                np.copyto(copy, shared)
+            if int(self.sharedSeq) != before:
+                self.torn += 1
+                continue
+            if int(self.copy["hands"]) != self.hands:
+                # the publisher was restarted with another hand count
+                self._open()
+                continue
+            self.seq = before
+            return True
+        return False
+
+    @property
+    def frame(self):
+        return int(self.copy["frame"])
+
+    @property
+    def captureTime(self):
+        return float(self.copy["captureTime"])
+
+    @property
+    def publishTime(self):
+        return float(self.copy["publishTime"])
+
+    @property
+    def wallTime(self):
+        return float(self.copy["wallTime"])
+
+    @property
+    def width(self):
+        return int(self.copy["width"])
+
+    @property
+    def height(self):
+        return int(self.copy["height"])
+
+    @property
+    def gesture(self):
+        return self.copy["gesture"][()].decode("ascii")
+
+    def fingers(self, handNo=0):
+        """fingersUp() list of a hand, [0, 0, 0, 0, 0] if it is not present."""
+        mask = int(self.fingerMasks[handNo]) if self.present[handNo] else 0
+        return [(mask >> finger) & 1 for finger in range(5)]
+
+    def age(self, now=None):
+        """Seconds since the frame held was published (large: the pipeline stopped)."""
+        return (time.perf_counter() if now is None else now) - self.publishTime
+
+    def close(self):
+        self.shared = self.sharedSeq = None
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+def _stressWriter(publisher):
+    """frame(n) for a publisher fed by a stand-in detector: every value in frame n equals n."""
+    from types import SimpleNamespace
+
+    img = np.zeros((480, 640, 3), dtype=np.uint8)
+    hands = [SimpleNamespace(slot=slot, fingerMask=0b00110, points=np.zeros((21, 3)))
+             for slot in range(publisher.hands)]
+    detector = SimpleNamespace(handCount=publisher.hands, handedness=["Right", "Left"][:publisher.hands],
+                               features=lambda handNo: hands[handNo])
+    controller = SimpleNamespace(gesture="")
+
+    def frame(n):
+        for hand in hands:
+            hand.points.fill(n % 65536)
+        controller.gesture = str(n % 1000)
+        publisher.publish(detector, controller, img, float(n))
+
+    return frame
+
+
+def _stressReader(path, seconds, interval, results):
+    # counts the frames of a _stressWriter that do not hold one frame number throughout
+    reader = HandStateReader(path)
+    frames = inconsistent = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if interval:
+            time.sleep(interval)
+        if reader.poll():
+            frames += 1
+            value = reader.frame
+            if not (np.all(reader.landmarks == np.float32(value % 65536))
+                    and reader.captureTime == value and reader.gesture == str(value % 1000)):
+                inconsistent += 1
+    results.put((frames, inconsistent, reader.torn))
+    reader.close()
+
+
+def benchmark(readers=4, seconds=2.0, interval=0.001):
+    """Publish cost with and without reader processes polling every interval seconds."""
+    import multiprocessing
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, FILE_NAME)
+        publisher = HandStatePublisher(path, maxHands=2)
+        frame = _stressWriter(publisher)
+
+        def publishCost(frames=200):
+            t0 = time.perf_counter()
+            for _ in range(frames):
+                frame(publisher.frames)
+            return 1e6 * (time.perf_counter() - t0) / frames
+
+        alone = float(np.median([publishCost() for _ in range(50)]))
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        procs = [context.Process(target=_stressReader, args=(path, seconds, interval, results))
+                 for _ in range(readers)]
+        for proc in procs:
+            proc.start()
+        time.sleep(0.5)  # let them import and attach
+        costs = []
+        deadline = time.perf_counter() + seconds - 0.6
+        while time.perf_counter() < deadline:
+            costs.append(publishCost())
+        stats = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+        publisher.close()
+
+    print(f"[HandState] publish: {alone:.1f} us alone, {float(np.median(costs)):.1f} us with {readers} readers "
+          f"polling every {1000 * interval:g} ms ({os.cpu_count()} CPUs)")
+    for i, (frames, inconsistent, torn) in enumerate(stats):
+        print(f"[HandState] reader {i}: {frames} frames, {inconsistent} inconsistent, {torn} retries")
+    return 0
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Print the hand state a running mode publishes.")
+    parser.add_argument("--path", default=None, help=f"state file (default: {statePath()})")
+    parser.add_argument("--bench", action="store_true",
+                        help="time publishing while several reader processes poll")
+    args = parser.parse_args(argv)
+    if args.bench:
+        return benchmark()
+
+    try:
+        reader = HandStateReader(args.path)
+    except HandStateError as e:
+        print(f"[HandState] {e}", file=sys.stderr)
+        return 1
+    try:
+        while True:
+            if reader.poll():
+                hands = "  ".join(f"{''.join(map(str, reader.fingers(h)))} tip "
+                                  f"({reader.landmarks[h, 8, 0]:.2f}, {reader.landmarks[h, 8, 1]:.2f})"
+                                  for h in range(reader.hands) if reader.present[h])
+                print(f"\r[HandState] frame {reader.frame} {reader.gesture or '-':>8} "
+                      f"{1000 * reader.age():5.1f} ms old  {hands:<60}", end="", flush=True)
+            time.sleep(0.01)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
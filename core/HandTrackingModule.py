@@ -4,125 +4,318 @@ import mediapipe as mp
 import time
 import math
 import numpy as np
+from DetectorBackends import AsyncDetectorBackend, MediaPipeDetectorBackend, ReplayDetectorBackend
+from HandFeatures import FINGER_STATES, HandFeatures
+from LandmarkFilter import LandmarkFilterBank
+
+NO_HAND = ()
 
 
 class handDetector():
-    def __init__(self, mode=False, maxHands=2, detectionCon=0.5, trackCon=0.5):
+    """Hand tracking, smoothing and pixel helpers on top of a detector backend.
+
+    backend defaults to MediaPipe Hands built from the other arguments;
+    asyncInference runs it pipelined, one frame ahead (see DetectorBackends).
+    """
+
+    def __init__(self, mode=False, maxHands=2, detectionCon=0.5, trackCon=0.5, smooth=True,
+                 modelComplexity=1, inputScale=1.0, backend=None, asyncInference=False):
         # store settings
         self.mode = mode
         self.maxHands = maxHands
         self.detectionCon = detectionCon
         self.trackCon = trackCon
+        self.smooth = smooth
+        self.modelComplexity = modelComplexity  # 0 = lite model, 1 = full
+        self.inputScale = inputScale  # frames are shrunk by this factor before inference
+        self.asyncInference = asyncInference
 
-        # MediaPipe hands initialization (explicit named args)
+        if backend is None:
+            backend = MediaPipeDetectorBackend(maxHands=maxHands, mode=mode, detectionCon=detectionCon,
+                                               trackCon=trackCon, modelComplexity=modelComplexity,
+                                               inputScale=inputScale)
+        if asyncInference and not backend.pipelined:
+            backend = AsyncDetectorBackend(backend)
+        self.backend = backend
         self.mpHands = mp.solutions.hands
-        self.hands = self.mpHands.Hands(
-            static_image_mode=self.mode,
-            max_num_hands=self.maxHands,
-            min_detection_confidence=self.detectionCon,
-            min_tracking_confidence=self.trackCon,
-        )
         self.mpDraw = mp.solutions.drawing_utils
+        self._initState()
+
+    def restart(self):
+        """Rebuild the backend (after the watchdog saw it hang) and forget tracked hands."""
+        self.backend.restart()
+        self.reset()
+
+    def close(self):
+        self.backend.close()
+
+    def _initState(self):
         self.tipIds = [4, 8, 12, 16, 20]
 
         # runtime state
-        self.results = None
-        self.lmList = []
+        self.results = None  # raw backend output of the last applied result
+        self.gfx = cv2  # drawing target; runPipeline swaps in an Overlay.FrameOverlay
+        self.lmList = NO_HAND
+
+        # pixel landmarks of the hand last passed to findPosition: rows of (id, x, y)
+        self.lmPixels = np.zeros((21, 3), dtype=np.int32)
+        self.lmPixels[:, 0] = np.arange(21)
+        self._lmXY = self.lmPixels[:, 1:]
+        self._frameScale = np.zeros(2)
+        self._bboxMin = np.zeros(2, dtype=np.int32)
+        self._bboxMax = np.zeros(2, dtype=np.int32)
+        self.positionHand = 0  # handNo of the last findPosition call
+
+        # per-frame features of each slot, recomputed on first use in a new frame
+        self.frameId = 0
+        self._features = [HandFeatures() for _ in range(self.maxHands)]
 
-    def findHands(self, img, draw=True):
+        # landmark arrays: normalized (x, y, z) per hand slot, raw and smoothed.
+        # A slot belongs to one tracked hand for as long as it stays in view,
+        # so slot state (filters, gestures) never jumps between hands.
+        self.filterBank = LandmarkFilterBank(maxHands=self.maxHands)
+        self.rawLandmarks = np.zeros((self.maxHands, 21, 3))
+        self.landmarks = self.rawLandmarks
+        self.present = np.zeros(self.maxHands, dtype=bool)
+        self.handCount = 0
+        self.handOrder = []  # present slots, longest-tracked hand first
+
+        # hand tracks: stable ids matched by handedness and position continuity
+        self.trackIds = np.full(self.maxHands, -1)
+        self.handedness = [None] * self.maxHands
+        self.trackCenters = np.zeros((self.maxHands, 2))
+        self.trackSeen = np.zeros(self.maxHands)
+        self.nextTrackId = 0
+        self.trackTimeout = 0.5  # seconds a lost hand keeps its id
+        self.maxTrackJump = 0.25  # normalized distance a hand may move between frames
+        self.handednessPenalty = 0.15
+        self._detections = np.zeros((self.maxHands, 21, 3))
+        self.processTime = 0.0
+
+    def reset(self):
+        """Forget tracked hands and filter state (when a detector is reused for a new run)."""
+        self.trackIds[:] = -1
+        self.handedness = [None] * self.maxHands
+        self.present[:] = False
+        self.handCount = 0
+        self.handOrder = []
+        self.lmList = NO_HAND
+        self.frameId += 1
+        self.filterBank.reset()
+        self.backend.flush()
+
+    def findHands(self, img, draw=True, timestamp=None):
         if img is None:
             return img
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(imgRGB)
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        self.frameId += 1
+        self._frameScale[0] = img.shape[1]
+        self._frameScale[1] = img.shape[0]
+        backend = self.backend
+        if backend.pipelined:
+            # hand this frame over and apply the previous one's result: landmarks lag
+            # by backend.depth frames, inference overlaps with acting on them
+            backend.submit(img, timestamp)
+            result = backend.poll(None if backend.inFlight() > backend.depth else 0)
+            if result is None:
+                return img
+        else:
+            result = backend.process(img, timestamp)
+        self.results = result.raw
+        self.processTime = result.inferenceTime
+        self._detections = result.landmarks
+        count = min(result.count, self.maxHands)
+        if draw and self.gfx is not cv2:
+            for k in range(count):
+                self.gfx.landmarks(img, result.landmarks[k])
+        elif draw and result.raw is not None and result.raw.multi_hand_landmarks:
+            for handLms in result.raw.multi_hand_landmarks[:count]:
+                self.mpDraw.draw_landmarks(img, handLms, self.mpHands.HAND_CONNECTIONS)
+        self._updateHands(count, result.labels, result.timestamp)
+        return img
 
-        if self.results and self.results.multi_hand_landmarks:
-            for handLms in self.results.multi_hand_landmarks:
-                if draw:
-                    self.mpDraw.draw_landmarks(img, handLms,
-                                               self.mpHands.HAND_CONNECTIONS)
+    def _updateHands(self, count, labels, timestamp):
+        self.present[:] = False
+        for det, slot in enumerate(self._assignTracks(count, labels, timestamp)):
+            self.rawLandmarks[slot] = self._detections[det]
+            self.present[slot] = True
+        self.handCount = count
+        self.handOrder = sorted((int(i) for i in np.flatnonzero(self.present)),
+                                key=lambda i: self.trackIds[i])
 
-        return img
-    
+        # gestures and cursor mapping both read the smoothed bank
+        if self.smooth:
+            self.filterBank.update(self.rawLandmarks, self.present, timestamp)
+            self.landmarks = self.filterBank.value
+
+    def _assignTracks(self, count, labels, timestamp):
+        """Match this frame's detections to hand slots; returns a slot per detection."""
+        # free slots whose hand has been gone too long
+        for slot in range(self.maxHands):
+            if self.trackIds[slot] >= 0 and timestamp - self.trackSeen[slot] > self.trackTimeout:
+                self.trackIds[slot] = -1
+                self.handedness[slot] = None
 
+        # palm centre (wrist + middle MCP) of each detection
+        centers = (self._detections[:count, 0, :2] + self._detections[:count, 9, :2]) / 2
+
+        pairs = []
+        for det in range(count):
+            for slot in range(self.maxHands):
+                if self.trackIds[slot] < 0:
+                    continue
+                cost = math.hypot(*(centers[det] - self.trackCenters[slot]))
+                if cost > self.maxTrackJump:
+                    continue
+                if labels[det] != self.handedness[slot]:
+                    cost += self.handednessPenalty
+                pairs.append((cost, det, slot))
+        pairs.sort()
+
+        slots = [-1] * count
+        taken = set()
+        for cost, det, slot in pairs:
+            if slots[det] < 0 and slot not in taken:
+                slots[det] = slot
+                taken.add(slot)
+
+        for det in range(count):
+            if slots[det] < 0:
+                # new hand: prefer an empty slot, else the stalest lost track
+                free = [s for s in range(self.maxHands) if s not in taken]
+                slot = min(free, key=lambda s: (self.trackIds[s] >= 0, self.trackSeen[s]))
+                self.trackIds[slot] = self.nextTrackId
+                self.nextTrackId += 1
+                self.filterBank.reset(slot)
+                slots[det] = slot
+                taken.add(slot)
+            slot = slots[det]
+            self.handedness[slot] = labels[det]
+            self.trackCenters[slot] = centers[det]
+            self.trackSeen[slot] = timestamp
+        return slots
+
+    def handSlot(self, handNo=0):
+        """Slot of the handNo-th present hand, oldest track first, or None."""
+        if handNo >= len(self.handOrder):
+            return None
+        return self.handOrder[handNo]
 
     def findPosition(self, img, handNo=0, draw=True):
-        xList = []
-        yList = []
+        """Pixel landmarks of the handNo-th hand. Hand 0 is the hand tracked longest,
+        so a second hand entering the view never takes over the cursor.
+
+        lmList is lmPixels, an (21, 3) int array of (id, x, y) rows that is
+        overwritten by the next call, or an empty tuple when there is no hand.
+        """
         bbox = []
-        self.lmList = []
-        if self.results and self.results.multi_hand_landmarks:
+        self.lmList = NO_HAND
+        if self.handCount:
             # protect against invalid handNo
-            if handNo >= len(self.results.multi_hand_landmarks):
+            slot = self.handSlot(handNo)
+            if slot is None:
                 return self.lmList, bbox
 
-            myHand = self.results.multi_hand_landmarks[handNo]
-            for id, lm in enumerate(myHand.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                xList.append(cx)
-                yList.append(cy)
-                self.lmList.append([id, cx, cy])
-                if draw:
-                    cv2.circle(img, (cx, cy), 5, (255, 0, 255), cv2.FILLED)
-
-            if xList and yList:
-                xmin, xmax = min(xList), max(xList)
-                ymin, ymax = min(yList), max(yList)
-                bbox = xmin, ymin, xmax, ymax
-
-                if draw:
-                    cv2.rectangle(img, (xmin - 20, ymin - 20), (xmax + 20, ymax + 20),
-                                  (0, 255, 0), 2)
+            self.positionHand = handNo
+            np.copyto(self._lmXY, self.features(handNo).pixels)
+            self.lmList = self.lmPixels
+
+            self._lmXY.min(axis=0, out=self._bboxMin)
+            self._lmXY.max(axis=0, out=self._bboxMax)
+            xmin, ymin = int(self._bboxMin[0]), int(self._bboxMin[1])
+            xmax, ymax = int(self._bboxMax[0]), int(self._bboxMax[1])
+            bbox = xmin, ymin, xmax, ymax
+
+            if draw:
+                for id, cx, cy in self.lmPixels.tolist():
+                    self.gfx.circle(img, (cx, cy), 5, (255, 0, 255), cv2.FILLED)
+                self.gfx.rectangle(img, (xmin - 20, ymin - 20), (xmax + 20, ymax + 20),
+                                   (0, 255, 0), 2)
 
         return self.lmList, bbox
 
-    def fingersUp(self):
-        fingers = []
-        if not self.lmList:
-            return [0, 0, 0, 0, 0]
+    def features(self, handNo=0):
+        """HandFeatures of the handNo-th hand for the current frame, or None."""
+        slot = self.handSlot(handNo)
+        if slot is None:
+            return None
+        features = self._features[slot]
+        if features.frameId != self.frameId:
+            features.update(self.frameId, slot, self.landmarks[slot], self._frameScale)
+        return features
+
+    def fingersUp(self, lmList=None):
+        if lmList is None:
+            if len(self.lmList) == 0:
+                return FINGER_STATES[0]
+            return self.features(self.positionHand).fingers
+        if len(lmList) == 0:
+            return FINGER_STATES[0]
         # Thumb
-        if self.lmList[self.tipIds[0]][1] > self.lmList[self.tipIds[0] - 1][1]:
-            fingers.append(1)
-        else:
-            fingers.append(0)
+        mask = 1 if lmList[self.tipIds[0]][1] > lmList[self.tipIds[0] - 1][1] else 0
 
         # Fingers
         for id in range(1, 5):
-            if self.lmList[self.tipIds[id]][2] < self.lmList[self.tipIds[id] - 2][2]:
-                fingers.append(1)
-            else:
-                fingers.append(0)
+            if lmList[self.tipIds[id]][2] < lmList[self.tipIds[id] - 2][2]:
+                mask |= 1 << id
 
-        return fingers
+        return FINGER_STATES[mask]
 
-    def findDistance(self, p1, p2, img, draw=True, r=15, t=3):
-        if not self.lmList:
+    def findDistance(self, p1, p2, img, draw=True, r=15, t=3, lmList=None):
+        features = None
+        if lmList is None:
+            lmList = self.lmList
+            if len(lmList):
+                features = self.features(self.positionHand)
+        if len(lmList) == 0:
             return 0, img, [0, 0, 0, 0, 0, 0]
-        x1, y1 = self.lmList[p1][1:]
-        x2, y2 = self.lmList[p2][1:]
+        x1, y1 = int(lmList[p1][1]), int(lmList[p1][2])
+        x2, y2 = int(lmList[p2][1]), int(lmList[p2][2])
         cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
 
         if draw:
-            cv2.line(img, (x1, y1), (x2, y2), (255, 0, 255), t)
-            cv2.circle(img, (x1, y1), r, (255, 0, 255), cv2.FILLED)
-            cv2.circle(img, (x2, y2), r, (255, 0, 255), cv2.FILLED)
-            cv2.circle(img, (cx, cy), r, (0, 0, 255), cv2.FILLED)
-        length = math.hypot(x2 - x1, y2 - y1)
+            self.gfx.line(img, (x1, y1), (x2, y2), (255, 0, 255), t)
+            self.gfx.circle(img, (x1, y1), r, (255, 0, 255), cv2.FILLED)
+            self.gfx.circle(img, (x2, y2), r, (255, 0, 255), cv2.FILLED)
+            self.gfx.circle(img, (cx, cy), r, (0, 0, 255), cv2.FILLED)
+        if features is not None:
+            length = features.tipPixelDistance(p1, p2)
+        else:
+            length = math.hypot(x2 - x1, y2 - y1)
 
         return length, img, [x1, y1, x2, y2, cx, cy]
 
 
+class replayDetector(handDetector):
+    """Feeds landmarks from a RecordingSource through the same tracking and smoothing."""
+
+    def __init__(self, source, maxHands=2, smooth=True):
+        self.source = source
+        super().__init__(maxHands=maxHands, smooth=smooth,
+                         backend=ReplayDetectorBackend(source, maxHands=maxHands))
+
+
 def main():
     pTime = 0
     cTime = 0
     cap = cv2.VideoCapture(1)
     detector = handDetector()
+    # per-frame cost (inference + tracking) grouped by number of hands in view
+    costs = {}
     while True:
         success, img = cap.read()
         if not success:
             break
-        img = detector.findHands(img)
-        lmList, bbox = detector.findPosition(img)
+        start = time.perf_counter()
+        img = detector.findHands(img, draw=False)
+        lmList, bbox = detector.findPosition(img, draw=False)
+        costs.setdefault(detector.handCount, []).append(time.perf_counter() - start)
+        for slot in detector.handOrder:
+            cv2.putText(img, f"#{detector.trackIds[slot]} {detector.handedness[slot]}",
+                        (int(detector.landmarks[slot, 0, 0] * img.shape[1]),
+                         int(detector.landmarks[slot, 0, 1] * img.shape[0])),
+                        cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
         if len(lmList) != 0:
             print(lmList[4])
 
@@ -140,6 +333,13 @@ def main():
     cap.release()
     cv2.destroyAllWindows()
 
+    for hands in sorted(costs):
+        frames = costs[hands]
+        print(f"{hands} hand(s): {1000 * sum(frames) / len(frames):.2f} ms/frame over {len(frames)} frames")
+    if 1 in costs and 2 in costs:
+        extra = sum(costs[2]) / len(costs[2]) - sum(costs[1]) / len(costs[1])
+        print(f"second hand adds {1000 * extra:.2f} ms/frame")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,325 @@
+"""
+Landmark streaming over UDP, so capture/detection and input injection can
+run on different machines.
+
+The capture box runs detection and publishes each frame's raw (unsmoothed)
+landmarks; the control box subscribes and feeds them through replayDetector
+(tracking, smoothing) into the usual mode controllers and backend:
+
+    # capture box
+    python core/headless.py --mode gesture --source 0 --publish 192.168.1.20:5005
+    # control box
+    python core/headless.py --mode gesture --source udp://0.0.0.0:5005 --backend real
+
+Each packet has a fixed size (284 bytes for two hands):
+
+    header   "<2sBBHHHIdd"  magic "GL", version, hand slots, session id,
+                            frame width, frame height, sequence number,
+                            capture time, send time (sender's perf_counter)
+    per slot uint8          0 = empty, else 1 + Sources.HANDEDNESS_CODES
+    per slot 21 x 3 int16   normalized x, y, z * 16384
+
+The subscriber only keeps the newest packet: queued older ones, repeats and
+out-of-order packets are dropped, and so is a packet whose one-way delay
+exceeds the best recent delay by more than maxLatency. The delay baseline is
+a windowed minimum, so the two machines' clocks never need to agree.
+
+    python core/LandmarkStream.py session.npz   # loopback run: bandwidth and added latency
+"""
+import random
+import select
+import socket
+import struct
+import sys
+import time
+
+import numpy as np
+
+from Sources import HANDEDNESS_CODES
+
+MAGIC = b"GL"
+VERSION = 1
+HEADER = struct.Struct("<2sBBHHHIdd")
+SCALE = 16384.0  # quantization steps per normalized unit; int16 covers [-2, 2)
+DEFAULT_PORT = 5005
+
+
+def parseAddress(text, defaultHost="127.0.0.1"):
+    """"host:port", ":port", "port" or "udp://host:port" -> (host, port)."""
+    if text.startswith("udp://"):
+        text = text[len("udp://"):]
+    host, _, port = text.rpartition(":")
+    return host or defaultHost, int(port or DEFAULT_PORT)
+
+
+def packetSize(hands):
+    return HEADER.size + hands + hands * 21 * 3 * 2
+
+
+class LandmarkCodec():
+    """Packs and unpacks one fixed-size packet in place (no per-frame allocation)."""
+
+    def __init__(self, hands=2):
+        self.hands = hands
+        self.buffer = bytearray(packetSize(hands))
+        self.view = memoryview(self.buffer)
+        self.slots = np.frombuffer(self.buffer, dtype=np.uint8, count=hands, offset=HEADER.size)
+        self.coords = np.frombuffer(self.buffer, dtype="<i2", count=hands * 63,
+                                    offset=HEADER.size + hands).reshape(hands, 21, 3)
+        self._scaled = np.zeros((hands, 21, 3))
+
+    def encode(self, landmarks, present, handedness, frameSize, seq, captureTime, session):
+        """handedness holds Sources.HANDEDNESS_CODES per slot; returns the packet view."""
+        np.multiply(landmarks[:self.hands], SCALE, out=self._scaled)
+        np.rint(self._scaled, out=self._scaled)
+        np.clip(self._scaled, -32768, 32767, out=self._scaled)
+        np.copyto(self.coords, self._scaled, casting="unsafe")
+        np.add(handedness[:self.hands], 1, out=self.slots, casting="unsafe")
+        self.slots[~present[:self.hands]] = 0
+        HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, self.hands, session, frameSize[0], frameSize[1],
+                         seq & 0xFFFFFFFF, captureTime, time.perf_counter())
+        return self.view
+
+    def header(self, size):
+        """(session, width, height, seq, captureTime, sendTime) of a received packet, or None."""
+        if size != len(self.buffer):
+            return None
+        magic, version, hands, session, width, height, seq, captureTime, sendTime = \
+            HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION or hands != self.hands:
+            return None
+        return session, width, height, seq, captureTime, sendTime
+
+    def decode(self, landmarks, present, handedness):
+        """Unpack the landmarks of the packet in the buffer into the given slot arrays."""
+        n = min(self.hands, len(present))
+        np.multiply(self.coords[:n], 1 / SCALE, out=landmarks[:n])
+        np.greater(self.slots[:n], 0, out=present[:n])
+        np.subtract(self.slots[:n], 1, out=handedness[:n], where=present[:n])
+        handedness[:n][~present[:n]] = 0
+
+
+class LandmarkPublisher():
+    """Sends the detector's raw landmarks every frame.
+
+    It has RecordingWriter's add()/save() interface, so it plugs into
+    runPipeline as the recorder.
+    """
+
+    def __init__(self, address, maxHands=2):
+        self.address = parseAddress(address) if isinstance(address, str) else address
+        self.maxHands = maxHands
+        self.codec = LandmarkCodec(maxHands)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.session = random.getrandbits(16)
+        self.seq = 0
+        self.bytes = 0
+        self.errors = 0
+        self.started = None
+        self.landmarks = np.zeros((maxHands, 21, 3))
+        self.present = np.zeros(maxHands, dtype=bool)
+        self.handedness = np.zeros(maxHands, dtype=np.uint8)
+
+    def add(self, detector, img, timestamp):
+        if self.started is None:
+            self.started = time.perf_counter()
+        hands = min(self.maxHands, detector.maxHands)
+        self.present[:] = False
+        self.landmarks[:hands] = detector.rawLandmarks[:hands]
+        self.present[:hands] = detector.present[:hands]
+        for slot in range(hands):
+            self.handedness[slot] = HANDEDNESS_CODES.get(detector.handedness[slot], 0)
+        packet = self.codec.encode(self.landmarks, self.present, self.handedness,
+                                   (img.shape[1], img.shape[0]), self.seq, timestamp, self.session)
+        try:
+            self.bytes += self.sock.sendto(packet, self.address)
+        except OSError as e:
+            # an unreachable subscriber must not stop detection
+            self.errors += 1
+            if self.errors == 1:
+                print(f"[LandmarkStream] send to {self.address[0]}:{self.address[1]} failed: {e}")
+        self.seq += 1
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            "packets": self.seq,
+            "packetBytes": len(self.codec.buffer),
+            "kbps": 8 * self.bytes / elapsed / 1000 if elapsed else 0.0,
+            "sendErrors": self.errors,
+        }
+
+    def save(self):
+        self.sock.close()
+        print(f"[LandmarkStream] published {self.stats()}")
+
+
+class StreamSource():
+    """Pipeline source fed by a LandmarkPublisher; pair it with replayDetector.
+
+    Frames are blank canvases of the sender's frame size; timestamps are the
+    sender's capture times shifted onto the local clock.
+    """
+
+    live = True
+
+    def __init__(self, address=("0.0.0.0", DEFAULT_PORT), width=640, height=480, maxHands=2,
+                 maxLatency=0.1, timeout=0.5, idleTimeout=None, baselineWindow=5.0):
+        self.address = parseAddress(address, "0.0.0.0") if isinstance(address, str) else address
+        self.maxLatency = maxLatency  # drop packets delayed this much beyond the best recent delay
+        self.timeout = timeout  # read() gives up after this long without a packet
+        self.idleTimeout = idleTimeout  # finished after this long without a packet (None: never)
+        self.baselineWindow = baselineWindow
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(self.address)
+        self.sock.setblocking(False)
+        self.codec = LandmarkCodec(maxHands)
+        self.canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        self.landmarks = np.zeros((maxHands, 21, 3))
+        self.present = np.zeros(maxHands, dtype=bool)
+        self.handedness = np.zeros(maxHands, dtype=np.uint8)
+        self.finished = False
+        self.session = None
+        self.lastSeq = -1
+        self.lastPacket = time.perf_counter()
+        # one-way delay baseline: minimum over the current and previous window
+        self.windowStart = self.lastPacket
+        self.windowMin = float("inf")
+        self.prevWindowMin = float("inf")
+        self.delays = []  # seconds above the baseline of each accepted packet
+        self.transits = []  # send -> receive on the raw clocks (a latency on the same host)
+        self.counts = {"received": 0, "accepted": 0, "late": 0, "reordered": 0, "superseded": 0,
+                       "lost": 0, "invalid": 0}
+        self.bytes = 0
+        self.started = None
+
+    def _receive(self):
+        """Decode the next valid packet waiting on the socket; returns (captureTime, transit) or None."""
+        while True:
+            try:
+                size = self.sock.recv_into(self.codec.buffer)
+            except (BlockingIOError, InterruptedError):
+                return None
+            received = time.perf_counter()
+            self.counts["received"] += 1
+            self.bytes += size
+            header = self.codec.header(size)
+            if header is None:
+                self.counts["invalid"] += 1
+                continue
+            session, width, height, seq, captureTime, sendTime = header
+            if session != self.session:
+                # a new or restarted publisher: its sequence and clock start over
+                self.session = session
+                self.lastSeq = seq - 1
+                self.windowMin = self.prevWindowMin = float("inf")
+            if seq <= self.lastSeq:
+                self.counts["reordered"] += 1
+                continue
+            self.counts["lost"] += seq - self.lastSeq - 1
+            self.lastSeq = seq
+
+            transit = received - sendTime
+            if received - self.windowStart > self.baselineWindow:
+                self.prevWindowMin, self.windowMin = self.windowMin, float("inf")
+                self.windowStart = received
+            self.windowMin = min(self.windowMin, transit)
+            baseline = min(self.windowMin, self.prevWindowMin)
+            delay = transit - baseline
+            if delay > self.maxLatency:
+                self.counts["late"] += 1
+                continue
+
+            if self.canvas.shape[:2] != (height, width):
+                self.canvas = np.zeros((height, width, 3), dtype=np.uint8)
+            self.codec.decode(self.landmarks, self.present, self.handedness)
+            self.delays.append(delay)
+            self.transits.append(transit)
+            # sender capture time on our clock, as if the packet had the best delay
+            return captureTime + baseline, transit
+
+    def read(self):
+        now = time.perf_counter()
+        if self.started is None:
+            self.started = now
+        ready, _, _ = select.select([self.sock], [], [], self.timeout)
+        latest = None
+        if ready:
+            while True:
+                packet = self._receive()
+                if packet is None:
+                    break
+                if latest is not None:
+                    # a newer packet was already queued: only the freshest landmarks matter
+                    self.counts["superseded"] += 1
+                latest = packet
+        now = time.perf_counter()
+        if latest is None:
+            if self.idleTimeout is not None and now - self.lastPacket > self.idleTimeout:
+                self.finished = True
+            return False, None, now
+        self.lastPacket = now
+        self.counts["accepted"] += 1
+        self.canvas.fill(0)
+        return True, self.canvas, latest[0]
+
+    def current(self):
+        """(landmarks, present, handedness) of the packet last read."""
+        return self.landmarks, self.present, self.handedness
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        stats = dict(self.counts)
+        stats["kbps"] = 8 * self.bytes / elapsed / 1000 if elapsed else 0.0
+        for name, values in (("delay", self.delays), ("transit", self.transits)):
+            if values:
+                ms = np.sort(np.asarray(values)) * 1000
+                stats[f"{name}_mean_ms"] = float(ms.mean())
+                stats[f"{name}_p95_ms"] = float(ms[int(0.95 * (len(ms) - 1))])
+        return stats
+
+    def release(self):
+        self.sock.close()
+
+
+def main(argv=None):
+    import argparse
+    import threading
+
+    from Backends import RecordingBackend
+    from Pipeline import PipelineHooks, runMode
+    from Sources import RecordingSource
+
+    parser = argparse.ArgumentParser(description="Loopback run: publish a recording and drive a mode from the stream.")
+    parser.add_argument("recording", help=".npz landmark recording")
+    parser.add_argument("--mode", default="gesture")
+    args = parser.parse_args(argv)
+
+    # loopback: the publisher replays the recording in real time and acts on it directly;
+    # the subscriber drives the same mode from the stream
+    source = StreamSource(("127.0.0.1", 0), idleTimeout=1.0)
+    publisher = LandmarkPublisher(source.sock.getsockname())
+    localBackend = RecordingBackend()
+    streamBackend = RecordingBackend()
+
+    def publish():
+        time.sleep(0.5)  # let the subscriber's pipeline start first
+        runMode(args.mode, source=RecordingSource(args.recording, realtime=True), backend=localBackend,
+                settings={"cursorRate": 0}, hooks=PipelineHooks(recorder=publisher))
+
+    thread = threading.Thread(target=publish, daemon=True)
+    thread.start()
+    metrics = runMode(args.mode, source=source, backend=streamBackend, settings={"cursorRate": 0})
+    thread.join()
+
+    received = source.stats()
+    print(f"[LandmarkStream] published {publisher.stats()}")
+    print(f"[LandmarkStream] received {received}")
+    print(f"[LandmarkStream] local actions {localBackend.counts()}, streamed {streamBackend.counts()}")
+    print(f"[LandmarkStream] added latency (send -> receive): mean {received.get('transit_mean_ms', 0):.2f} ms, "
+          f"p95 {received.get('transit_p95_ms', 0):.2f} ms; {received['kbps']:.1f} kbit/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Lightweight pipeline metrics.
+
+PipelineMetrics keeps per-stage latency samples in bounded windows (so a
+workday-long run does not grow memory), plus counters and gauges, and can
+summarize them as a JSON-friendly dict for benchmark output.
+"""
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+
+class PipelineMetrics():
+    def __init__(self, window=10000):
+        self.window = window
+        self.samples = {}  # stage -> deque of seconds
+        self.totals = {}  # stage -> (count, sum, max) over the whole run
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.frames = 0
+        self.allocations = None  # AllocationTracker, for benchmark runs
+
+    def record(self, stage, seconds):
+        with self.lock:
+            samples = self.samples.get(stage)
+            if samples is None:
+                samples = self.samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+            count, total, peak = self.totals.get(stage, (0, 0.0, 0.0))
+            self.totals[stage] = (count + 1, total + seconds, max(peak, seconds))
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def stageTotals(self):
+        """{stage: (count, total seconds, max seconds)} over the whole run."""
+        with self.lock:
+            return dict(self.totals)
+
+    def frame(self):
+        self.frames += 1
+        if self.allocations is not None:
+            self.allocations.frame()
+
+    def stageSummary(self, stage):
+        """Latency stats in milliseconds; percentiles cover the recent window."""
+        with self.lock:
+            window = sorted(self.samples.get(stage, ()))
+            count, total, peak = self.totals.get(stage, (0, 0.0, 0.0))
+        if not window:
+            return None
+
+        def pct(p):
+            return 1000 * window[min(len(window) - 1, int(p * len(window)))]
+
+        return {
+            "count": count,
+            "mean_ms": 1000 * total / count,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": 1000 * peak,
+        }
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        with self.lock:
+            stages = list(self.samples)
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        return {
+            "frames": self.frames,
+            "elapsed_s": elapsed,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "stages": {stage: self.stageSummary(stage) for stage in stages},
+            "counters": counters,
+            "gauges": gauges,
+            "allocations": self.allocations.summary() if self.allocations is not None else None,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def report(self):
+        s = self.summary()
+        print(f"[Metrics] {s['frames']} frames in {s['elapsed_s']:.1f} s ({s['fps']:.1f} fps)")
+        for stage, st in s["stages"].items():
+            print(f"[Metrics] {stage:>10}: mean {st['mean_ms']:.2f} ms, "
+                  f"p95 {st['p95_ms']:.2f} ms, max {st['max_ms']:.2f} ms")
+        for name, value in sorted(s["counters"].items()):
+            print(f"[Metrics] {name}: {value}")
+        for name, value in sorted(s["gauges"].items()):
+            print(f"[Metrics] {name}: {value}")
+        a = s["allocations"]
+        if a and a["frames"]:
+            print(f"[Metrics] allocations over {a['frames']} frames: "
+                  f"{a['blocksPerFrame']:+.2f} blocks/frame, {a['netBytesPerFrame']:+.1f} B/frame retained, "
+                  f"transient peak {a['meanPeakBytes'] / 1024:.1f} KiB/frame (max {a['maxPeakBytes'] / 1024:.1f})")
+            for line in a["top"]:
+                print(f"[Metrics]   {line}")
+
+
+class AllocationTracker():
+    """Per-frame allocation accounting with tracemalloc, for benchmark runs only.
+
+    Tracing starts after `warmup` frames (model graphs, pools and caches are
+    built on the first frames). Each frame then records the bytes it left
+    allocated and its transient peak; summary() also diffs snapshots taken at
+    the start and end of the traced window to count surviving blocks and name
+    the top allocating lines. A flat hot path shows ~0 blocks and bytes per
+    frame and a small, constant peak.
+    """
+
+    def __init__(self, warmup=30, top=5):
+        self.warmup = warmup
+        self.top = top
+        self.seen = 0
+        self.frames = 0
+        self.netBytes = 0
+        self.peakTotal = 0
+        self.peakMax = 0
+        self.lastCurrent = 0
+        self.firstSnapshot = None
+        self.lastSnapshot = None
+
+    def frame(self):
+        self.seen += 1
+        if self.seen < self.warmup:
+            return
+        if self.seen == self.warmup:
+            tracemalloc.start()
+            self.firstSnapshot = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            self.lastCurrent = tracemalloc.get_traced_memory()[0]
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.peakTotal += peak - self.lastCurrent
+        self.peakMax = max(self.peakMax, peak - self.lastCurrent)
+        self.netBytes += current - self.lastCurrent
+        self.lastCurrent = current
+        self.frames += 1
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            self.lastSnapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def summary(self):
+        if self.firstSnapshot is not None and self.lastSnapshot is None:
+            self.stop()
+        if not self.frames:
+            return {"frames": 0}
+        diff = []
+        if self.lastSnapshot is not None:
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+                       tracemalloc.Filter(False, __file__)]
+            diff = self.lastSnapshot.filter_traces(filters).compare_to(
+                self.firstSnapshot.filter_traces(filters), "lineno")
+        blocks = sum(stat.count_diff for stat in diff)
+        return {
+            "frames": self.frames,
+            "blocksPerFrame": blocks / self.frames,
+            "netBytesPerFrame": self.netBytes / self.frames,
+            "meanPeakBytes": self.peakTotal / self.frames,
+            "maxPeakBytes": self.peakMax,
+            "top": [str(stat) for stat in diff[:self.top] if stat.count_diff],
+        }
@@ -0,0 +1,138 @@
+"""
+Pre-spawned mode worker for the launcher's subprocess path.
+
+Starting `python core/<mode>.py` on every click pays for the interpreter,
+the cv2/mediapipe imports and the MediaPipe graphs before the first frame.
+The launcher instead keeps one of these workers waiting: it imports
+everything and builds the detectors (Warmup.prewarmer) as soon as it is
+spawned, then waits for a mode. Each worker runs at most one mode and exits
+afterwards, so every mode still gets a process of its own; the launcher
+spawns the next spare when the mode stops.
+
+Protocol: one JSON object per line.
+
+    stdin   {"run": "<mode>", "requestedAt": <time.time>}   start a mode (queued until warm)
+            {"warmCamera": [width, height]}                  open the camera ahead of a run
+            {"stop": true}                                   leave the mode (or the idle wait)
+            end of file                                      the launcher is gone: stop
+    stdout  {"ready": <ms spent warming up>}
+            {"started": "<mode>"}
+            {"status": "<message>"}                          watchdog events of the running mode
+            {"stopped": "<mode>", "frames": <n>}
+            {"error": "<message>"}
+
+requestedAt is the launcher's wall clock at the click. perf_counter values
+are not comparable between processes everywhere, so the worker converts it
+onto its own perf_counter for the start-up gauges (setup_ms, firstFrame_ms).
+
+A mode runs with the same PipelineHooks.forLaunch attachments as a
+threaded ModeRunner mode: calibrated and hot-reloaded profile settings,
+watchdog, flight recorder and shared hand state. Everything else the
+worker prints goes to stderr.
+"""
+import json
+import queue
+import sys
+import threading
+import time
+
+
+class ModeWorker():
+    def __init__(self, channel):
+        self.channel = channel  # protocol lines only
+        self.commands = queue.Queue()
+        self.stopFlag = threading.Event()
+        self.requestedAt = None  # the click, on this process's perf_counter, for the start-up gauges
+
+    def send(self, **message):
+        self.channel.write(json.dumps(message) + "\n")
+        self.channel.flush()
+
+    def listen(self, stream):
+        """Read commands until the launcher closes the pipe; runs on its own thread."""
+        for line in stream:
+            try:
+                command = json.loads(line)
+            except ValueError:
+                self.send(error=f"not a command: {line.strip()!r}")
+                continue
+            if command.get("stop"):
+                self.stopFlag.set()
+            self.commands.put(command)
+        self.stopFlag.set()
+        self.commands.put({"stop": True})
+
+    def warm(self):
+        from Warmup import prewarmer
+        t0 = time.perf_counter()
+        prewarmer.start()
+        prewarmer.ready.wait()
+        self.send(ready=1000 * (time.perf_counter() - t0))
+
+    def serve(self, source=None, backend=None, show=True):
+        """Wait for one run command and run that mode. source/backend: see Pipeline.runMode."""
+        from Warmup import prewarmer
+        while True:
+            command = self.commands.get()
+            if "warmCamera" in command and source is None:
+                prewarmer.warmCamera(*command["warmCamera"])
+            elif "run" in command:
+                break
+            elif command.get("stop"):
+                return 0
+
+        mode = command["run"]
+        sentAt = command.get("requestedAt")
+        if sentAt is not None:
+            self.requestedAt = time.perf_counter() - max(0.0, time.time() - sentAt)
+        from GestureModes import CONTROLLERS
+        from Pipeline import PipelineHooks, runMode
+        from Profiles import ProfileError
+        from Warmup import logColdStart
+        if mode not in CONTROLLERS:
+            self.send(error=f"unknown mode {mode!r}")
+            return 2
+        try:
+            hooks = PipelineHooks.forLaunch(mode, onEvent=lambda kind, message: self.send(status=message))
+        except ProfileError as e:
+            self.send(error=f"{mode} profile is invalid: {e}")
+            return 2
+        settings = hooks.profile.settings
+        warm = prewarmer.ready.is_set()
+        detector = None
+        try:
+            if source is None:
+                detector = prewarmer.takeDetector(settings)
+                source = prewarmer.takeCamera(settings["wCam"], settings["hCam"])
+            self.send(started=mode)
+            # runMode releases the camera, also when the mode fails to start
+            metrics = runMode(mode, source=source, backend=backend, detector=detector, show=show,
+                              stopFlag=self.stopFlag, requestedAt=self.requestedAt, hooks=hooks)
+        except Exception as e:
+            self.send(error=f"{mode} mode failed: {e}")
+            raise
+        finally:
+            hooks.close()
+            hooks.flight.wait()  # a dump still being written when the process exits would be lost
+        logColdStart(mode, metrics, warm)
+        self.send(stopped=mode, frames=metrics.frames)
+        return 0
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Warm worker process the launcher hands a mode to.")
+    parser.parse_args(argv)
+
+    # the pipe to the launcher carries protocol lines only; all other output goes to stderr
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+    worker = ModeWorker(channel)
+    threading.Thread(target=worker.listen, args=(sys.stdin,), name="WorkerCommands", daemon=True).start()
+    worker.warm()
+    return worker.serve()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
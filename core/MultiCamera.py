@@ -0,0 +1,497 @@
+"""
+Multi-camera fusion.
+
+A hand turned edge-on to one camera, or outside its view, is usually still
+visible to a second one. FusedCameraSource captures from two or more sources
+in parallel, one worker thread per camera running its own detector backend,
+maps every camera's landmarks into the first camera's normalized frame with
+a per-camera affine calibration, and fuses them per frame:
+
+  * detections of the same hand (same handedness, palms within
+    groupDistance) are averaged, weighted by detection confidence and, for
+    live cameras, by recency (exp(-age / recencyTau)); results older than
+    maxAge are ignored,
+  * the strongest maxHands groups become the fused hands.
+
+Like a recording or a landmark stream it provides current(), so the fused
+landmarks go through replayDetector's tracking and smoothing into any mode.
+Live cameras run freely and every new result produces a fused frame; files
+run in lockstep (frame i of every file per read) so recorded pairs stay in sync.
+
+    python core/headless.py --mode gesture --source 1+2 --backend real
+    python core/headless.py --mode gesture --source left.mp4+right.mp4
+    python core/MultiCamera.py --calibrate left.mp4 right.mp4   # fit and save the calibration
+    python core/MultiCamera.py --recording session.npz            # two simulated cameras
+
+Calibrations are fitted from frames where the primary and another camera
+both see one hand, and kept in camera_calibration.json in the user data dir.
+"""
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from AppPaths import userDataPath
+from DetectorBackends import DetectorResult, MediaPipeDetectorBackend
+from Sources import HANDEDNESS_CODES
+
+MIRRORED = {"Left": "Right", "Right": "Left", None: None}
+
+
+def sourceKey(spec):
+    return f"camera:{spec}" if str(spec).isdigit() else os.path.basename(str(spec))
+
+
+class CameraCalibration():
+    """Affine map from a camera's normalized (x, y) to the shared (primary camera) frame."""
+
+    def __init__(self, matrix=None):
+        self.matrix = np.eye(2, 3) if matrix is None else np.asarray(matrix, dtype=float).reshape(2, 3)
+
+    @property
+    def mirrored(self):
+        # a reflection swaps which hand looks left or right
+        return np.linalg.det(self.matrix[:, :2]) < 0
+
+    def apply(self, landmarks, out):
+        """Map (n, 21, 3) landmarks into out; z is kept."""
+        np.matmul(landmarks[..., :2], self.matrix[:, :2].T, out=out[..., :2])
+        out[..., :2] += self.matrix[:, 2]
+        out[..., 2] = landmarks[..., 2]
+        return out
+
+    @classmethod
+    def fit(cls, points, reference):
+        """Least-squares affine from (n, 2) points to matching reference points, outliers rejected."""
+        import cv2
+        matrix, _ = cv2.estimateAffine2D(np.asarray(points, dtype=np.float32),
+                                               np.asarray(reference, dtype=np.float32),
+                                               method=cv2.RANSAC, ransacReprojThreshold=0.02)
+        if matrix is None:
+            raise ValueError("not enough matching hand observations to calibrate")
+        calibration = cls(matrix)
+        residual = calibration.apply(np.c_[points, np.zeros(len(points))][None], np.zeros((1, len(points), 3)))
+        error = float(np.sqrt(((residual[0, :, :2] - reference) ** 2).sum(axis=1)).mean())
+        return calibration, error
+
+
+def loadCalibrations(path=None):
+    path = path or userDataPath("camera_calibration.json")
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {key: CameraCalibration(entry["matrix"]) for key, entry in data.items()}
+
+
+def saveCalibrations(calibrations, path=None, errors=None):
+    path = path or userDataPath("camera_calibration.json")
+    errors = errors or {}
+    data = {key: {"matrix": c.matrix.tolist(), "error": errors.get(key)} for key, c in calibrations.items()}
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+class CameraWorker():
+    """One camera: reads frames, detects on them and keeps the latest mapped result."""
+
+    def __init__(self, index, source, backend, calibration, primary=False):
+        self.index = index
+        self.source = source
+        self.backend = backend
+        self.calibration = calibration
+        self.primary = primary
+        self.result = DetectorResult(backend.maxHands)
+        self.mapped = np.zeros((backend.maxHands, 21, 3))
+        self.labels = [None] * backend.maxHands
+        self.frame = None
+        self.seq = 0
+        self.frames = 0
+        self.handFrames = 0
+        self.lossEvents = 0
+        self.doneTime = 0.0
+        self.hadHand = False
+        self.finished = False
+        self.thread = None
+
+    def step(self, lock):
+        """Capture and detect one frame; False when the source had nothing."""
+        success, img, timestamp = self.source.read()
+        if not success:
+            self.finished = self.source.finished
+            return False
+        result = self.backend.process(img, timestamp)
+        count = result.count
+        with lock:
+            self.result.copyFrom(result)
+            self.calibration.apply(result.landmarks[:count], self.mapped[:count])
+            flip = self.calibration.mirrored
+            for k in range(count):
+                self.labels[k] = MIRRORED[result.labels[k]] if flip else result.labels[k]
+            if self.primary:
+                if self.frame is None or self.frame.shape != img.shape:
+                    self.frame = np.empty_like(img)
+                np.copyto(self.frame, img)
+            if self.hadHand and count == 0:
+                self.lossEvents += 1
+            self.hadHand = count > 0
+            self.seq += 1
+            self.frames += 1
+            self.handFrames += count > 0
+            self.doneTime = time.perf_counter()
+        return True
+
+
+class FusedCameraSource():
+    live = False
+
+    def __init__(self, sources, backends, calibrations=None, maxHands=2, maxAge=0.1, recencyTau=0.05,
+                 groupDistance=0.15, timeout=0.5):
+        if len(sources) < 2:
+            raise ValueError("multi-camera fusion needs at least two sources")
+        calibrations = calibrations or [None] * len(sources)
+        self.workers = [CameraWorker(i, source, backend, calibration or CameraCalibration(), primary=i == 0)
+                        for i, (source, backend, calibration) in enumerate(zip(sources, backends, calibrations))]
+        self.live = all(getattr(source, "live", False) for source in sources)
+        self.maxHands = maxHands
+        self.maxAge = maxAge  # live results older than this are not fused
+        self.recencyTau = recencyTau
+        self.groupDistance = groupDistance  # normalized palm distance for "same hand" across cameras
+        self.timeout = timeout
+        self.lock = threading.Condition()
+        self.finished = False
+        self.landmarks = np.zeros((maxHands, 21, 3))
+        self.present = np.zeros(maxHands, dtype=bool)
+        self.handedness = np.zeros(maxHands, dtype=np.uint8)
+        self.canvas = None
+        self.lastSeq = 0
+        self.frames = 0
+        self.handFrames = 0
+        self.lossEvents = 0
+        self.hadHand = False
+        self.fuseTime = 0.0
+        self.waitTime = 0.0
+        self.ageSum = 0.0
+        self.ageCount = 0
+        self.stopEvent = threading.Event()
+        self.pool = None
+        if self.live:
+            for worker in self.workers:
+                worker.thread = threading.Thread(target=self._runWorker, args=(worker,),
+                                                 name=f"Camera{worker.index}", daemon=True)
+                worker.thread.start()
+        else:
+            self.pool = ThreadPoolExecutor(len(self.workers), thread_name_prefix="Camera")
+
+    def _runWorker(self, worker):
+        while not self.stopEvent.is_set():
+            if worker.step(self.lock):
+                with self.lock:
+                    self.lock.notify_all()
+            elif worker.finished:
+                break
+
+    def read(self):
+        if self.live:
+            with self.lock:
+                self.lock.wait_for(lambda: self._seq() != self.lastSeq or self.stopEvent.is_set(), self.timeout)
+                if self._seq() == self.lastSeq:
+                    return False, None, time.perf_counter()
+                self.lastSeq = self._seq()
+            now = time.perf_counter()
+        else:
+            # lockstep: frame i of every file, detected in parallel
+            done = list(self.pool.map(lambda worker: worker.step(self.lock), self.workers))
+            if not all(done):
+                self.finished = any(worker.finished for worker in self.workers)
+                return False, None, time.perf_counter()
+            times = [worker.doneTime for worker in self.workers]
+            self.waitTime += max(times) - min(times)
+            now = None
+
+        t0 = time.perf_counter()
+        with self.lock:
+            primary = self.workers[0]
+            timestamp = max(worker.result.timestamp for worker in self.workers) if self.live \
+                else primary.result.timestamp
+            self.fuse(now)
+            if primary.frame is not None:
+                if self.canvas is None or self.canvas.shape != primary.frame.shape:
+                    self.canvas = np.empty_like(primary.frame)
+                np.copyto(self.canvas, primary.frame)
+        self.fuseTime += time.perf_counter() - t0
+        if self.canvas is None:
+            return False, None, time.perf_counter()
+
+        hasHand = bool(self.present.any())
+        if self.hadHand and not hasHand:
+            self.lossEvents += 1
+        self.hadHand = hasHand
+        self.frames += 1
+        self.handFrames += hasHand
+        return True, self.canvas, timestamp
+
+    def _seq(self):
+        return sum(worker.seq for worker in self.workers)
+
+    def fuse(self, now=None):
+        """Combine the workers' latest results into landmarks/present/handedness (lock held).
+
+        now is None in lockstep, where every result belongs to the same frame.
+        """
+        candidates = []
+        for worker in self.workers:
+            result = worker.result
+            age = 0.0 if now is None else now - worker.doneTime
+            if age > self.maxAge:
+                continue
+            recency = 1.0 if now is None else math.exp(-age / self.recencyTau)
+            if now is not None and result.count:
+                self.ageSum += age
+                self.ageCount += 1
+            for k in range(result.count):
+                weight = result.scores[k] * recency
+                palm = (worker.mapped[k, 0, :2] + worker.mapped[k, 9, :2]) / 2
+                candidates.append((weight, worker.index, worker.mapped[k], worker.labels[k], palm))
+        candidates.sort(key=lambda c: -c[0])
+
+        groups = []  # [total weight, weighted landmark sum, label, palm, cameras]
+        for weight, camera, landmarks, label, palm in candidates:
+            for group in groups:
+                if camera in group[4] or (label is not None and group[2] is not None and label != group[2]):
+                    continue
+                if math.hypot(*(palm - group[3])) <= self.groupDistance:
+                    group[0] += weight
+                    group[1] += weight * landmarks
+                    group[4].add(camera)
+                    break
+            else:
+                groups.append([weight, weight * landmarks, label, palm, {camera}])
+        groups.sort(key=lambda g: -g[0])
+
+        self.present[:] = False
+        self.handedness[:] = 0
+        for slot, (weight, total, label, _, _) in enumerate(groups[:self.maxHands]):
+            np.divide(total, weight, out=self.landmarks[slot])
+            self.present[slot] = True
+            self.handedness[slot] = HANDEDNESS_CODES.get(label, 0)
+
+    def current(self):
+        """(landmarks, present, handedness) of the last fused frame."""
+        return self.landmarks, self.present, self.handedness
+
+    def stats(self):
+        frames = max(self.frames, 1)
+        stats = {
+            "frames": self.frames,
+            "fusedLoss": 1 - self.handFrames / frames,
+            "fusedLossEvents": self.lossEvents,
+            "cameraLoss": [1 - w.handFrames / max(w.frames, 1) for w in self.workers],
+            "cameraLossEvents": [w.lossEvents for w in self.workers],
+            "fuse_ms": 1000 * self.fuseTime / frames,
+        }
+        if self.live:
+            stats["resultAge_ms"] = 1000 * self.ageSum / max(self.ageCount, 1)
+        else:
+            stats["wait_ms"] = 1000 * self.waitTime / frames  # lockstep wait for the slowest camera
+        return stats
+
+    def release(self):
+        self.stopEvent.set()
+        with self.lock:
+            self.lock.notify_all()
+        for worker in self.workers:
+            try:
+                worker.source.release()
+            except Exception as e:
+                print(f"[MultiCamera] could not release camera {worker.index}: {e}")
+            if worker.thread is not None:
+                worker.thread.join(2)
+            worker.backend.close()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+
+
+def openFusedSource(specs, width=640, height=480, realtime=False, settings=None):
+    """A FusedCameraSource over openSource() specs with MediaPipe detection and saved calibrations."""
+    from Sources import openSource
+    settings = settings or {}
+    maxHands = settings.get("maxHands", 2)
+    calibrations = loadCalibrations()
+    sources, backends = [], []
+    for spec in specs:
+        sources.append(openSource(spec, width, height, realtime=realtime))
+        backends.append(MediaPipeDetectorBackend(
+            maxHands=maxHands, detectionCon=settings.get("detectionCon", 0.5),
+            trackCon=settings.get("trackCon", 0.5), modelComplexity=settings.get("modelComplexity", 1),
+            inputScale=settings.get("inputScale", 1.0)))
+    missing = [spec for spec in specs[1:] if sourceKey(spec) not in calibrations]
+    if missing:
+        print(f"[MultiCamera] no calibration for {', '.join(map(str, missing))}; "
+              "assuming they match the first camera (run MultiCamera.py --calibrate)")
+    return FusedCameraSource(sources, backends, [calibrations.get(sourceKey(spec)) for spec in specs],
+                             maxHands=maxHands)
+
+
+def calibrate(source, minPairs=30):
+    """Fit every camera to the primary from frames where both see exactly one hand."""
+    points = {worker.index: ([], []) for worker in source.workers[1:]}
+    while True:
+        success, _, _ = source.read()
+        if not success:
+            if source.finished:
+                break
+            continue
+        primary = source.workers[0]
+        if primary.result.count != 1:
+            continue
+        for worker in source.workers[1:]:
+            if worker.result.count == 1:
+                # fit against the raw (uncalibrated) landmarks
+                points[worker.index][0].append(worker.result.landmarks[0, :, :2].copy())
+                points[worker.index][1].append(primary.result.landmarks[0, :, :2].copy())
+    fits = {}
+    for index, (src, ref) in points.items():
+        if len(src) < minPairs:
+            print(f"[MultiCamera] camera {index}: only {len(src)} frames with a hand in both views")
+            continue
+        fits[index] = CameraCalibration.fit(np.concatenate(src), np.concatenate(ref))
+    return fits
+
+
+class BlankSource():
+    """Blank frames for simulated cameras (file-like: runs in lockstep)."""
+
+    live = False
+
+    def __init__(self, frames, size=(480, 640, 3)):
+        self.frames = frames
+        self.img = np.zeros(size, dtype=np.uint8)
+        self.index = 0
+        self.start = time.perf_counter()
+        self.finished = False
+
+    def read(self):
+        if self.index >= self.frames:
+            self.finished = True
+            return False, None, time.perf_counter()
+        self.index += 1
+        return True, self.img, self.start + (self.index - 1) / 30.0
+
+    def release(self):
+        pass
+
+
+def simulatedCameras(recording):
+    """Two simulated cameras replaying a recording with complementary dropouts; the second one
+    sees the scene mirrored and shifted. Returns (openPair, truth): openPair(calibrations) builds a
+    FusedCameraSource over them, truth is the second camera's true calibration."""
+    from DetectorBackends import StubDetectorBackend, scriptFromRecording
+
+    script = scriptFromRecording(recording)
+    frames = len(script)
+    # the second camera sees the scene mirrored, shifted and slightly scaled
+    truth = CameraCalibration([[-0.9, 0.05, 0.95], [0.02, 0.9, 0.06]])
+    inverse = CameraCalibration(np.linalg.inv(np.vstack([truth.matrix, [0, 0, 1]]))[:2])
+    second = []
+    for hands in script:
+        mapped = []
+        for landmarks, label in hands:
+            lm = inverse.apply(landmarks[None], np.zeros((1, 21, 3)))[0]
+            mapped.append((lm, MIRRORED[label], 0.8))
+        second.append(mapped)
+    first = [[(lm, label, 0.95) for lm, label in hands] for hands in script]
+    # each camera loses the hand for a while (turned edge-on), at different times
+    for i in range(frames // 4, frames // 4 + frames // 6):
+        first[i] = []
+    for i in range(frames // 2, frames // 2 + frames // 6):
+        second[i] = []
+
+    def openPair(calibrations):
+        return FusedCameraSource([BlankSource(frames), BlankSource(frames)],
+                                 [StubDetectorBackend(first, loop=False), StubDetectorBackend(second, loop=False)],
+                                 calibrations)
+
+    return openPair, truth
+
+
+def simulate(recording, mode):
+    """Calibrate the simulated pair, then compare the fused run with the recording replayed alone."""
+    from Backends import RecordingBackend
+    from Pipeline import runMode
+    from Sources import RecordingSource
+
+    openPair, truth = simulatedCameras(recording)
+    calibration, error = calibrate(openPair(None))[1]
+    print(f"[MultiCamera] calibration error {error:.5f}, "
+          f"largest coefficient off by {np.abs(calibration.matrix - truth.matrix).max():.5f}")
+    source = openPair([None, calibration])
+    backend = RecordingBackend()
+    runMode(mode, source=source, backend=backend, settings={"cursorRate": 0})
+    replayed = RecordingBackend()
+    runMode(mode, source=RecordingSource(recording), backend=replayed, settings={"cursorRate": 0})
+    print(f"[MultiCamera] {source.stats()}")
+    print(f"[MultiCamera] fused actions {backend.counts()}, recording {replayed.counts()}")
+    return 0
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Fuse hand tracking from several cameras or recorded videos.")
+    parser.add_argument("sources", nargs="*", help="camera indexes or video files (the first is the reference)")
+    parser.add_argument("--calibrate", action="store_true", help="fit and save calibrations from the sources")
+    parser.add_argument("--recording", help="simulate two cameras from a landmark recording")
+    parser.add_argument("--mode", default="gesture")
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.recording:
+        return simulate(args.recording, args.mode)
+    if len(args.sources) < 2:
+        parser.error("give at least two sources, or --recording to simulate them")
+
+    from GestureModes import modeSettings
+    settings = modeSettings(args.mode)
+    if args.calibrate:
+        source = openFusedSource(args.sources, settings["wCam"], settings["hCam"], settings=settings)
+        try:
+            fits = calibrate(source)
+        finally:
+            source.release()
+        calibrations, errors = loadCalibrations(), {}
+        for index, (calibration, error) in fits.items():
+            key = sourceKey(args.sources[index])
+            calibrations[key], errors[key] = calibration, error
+            print(f"[MultiCamera] {key}: mean error {error:.4f} (normalized), mirrored {calibration.mirrored}")
+        saveCalibrations(calibrations, errors=errors)
+        return 0 if len(fits) == len(args.sources) - 1 else 1
+
+    # compare each camera alone with the fused stream on the same run
+    from Backends import RecordingBackend
+    from Pipeline import runMode
+    source = openFusedSource(args.sources, settings["wCam"], settings["hCam"], settings=settings)
+    t0 = time.perf_counter()
+    metrics = runMode(args.mode, source=source, backend=RecordingBackend(), maxFrames=args.max_frames,
+                      settings={"cursorRate": 0})
+    elapsed = time.perf_counter() - t0
+    stats = source.stats()
+    print(f"[MultiCamera] {metrics.frames} fused frames in {elapsed:.1f} s ({metrics.frames / elapsed:.1f} fps)")
+    for index, spec in enumerate(args.sources):
+        print(f"[MultiCamera] {spec}: tracking lost {100 * stats['cameraLoss'][index]:.1f}% of frames, "
+              f"{stats['cameraLossEvents'][index]} drop(s)")
+    print(f"[MultiCamera] fused: tracking lost {100 * stats['fusedLoss']:.1f}% of frames, "
+          f"{stats['fusedLossEvents']} drop(s); fusion adds {stats['fuse_ms']:.2f} ms"
+          + (f", waiting for the slowest camera {stats['wait_ms']:.2f} ms" if "wait_ms" in stats else
+             f", results are {stats['resultAge_ms']:.1f} ms old"))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+"""
+Overlay compositor for the preview and the OpenCV window.
+
+With an overlay, controllers and the detector do not draw on the inference
+frame. FrameOverlay records their drawing calls; it has the cv2 signatures
+they already use (gfx.circle(img, ...), gfx.putText(img, ...)), and
+gfx.landmarks() replaces mpDraw.draw_landmarks. OverlayCompositor then renders
+the recording onto the output image at the output's scale (a downscaled
+preview, or the full frame for the window):
+
+  * rectangles and labels that are unchanged since the previous frame (the
+    frameR box, "Scroll Mode", "Dragging...") form the static layer. It is
+    pre-rendered with its mask, cached by content, and blended in one
+    masked copy,
+  * everything else (fingertip circles, pinch lines, the hand skeleton, a
+    changing FPS value) is drawn directly, at output resolution.
+
+    python core/Overlay.py session.npz   # per-frame cost: direct full-size drawing vs compositor
+"""
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# hand skeleton as polylines: thumb, fingers, palm
+HAND_CHAINS = [np.array(chain) for chain in (
+    [0, 1, 2, 3, 4], [0, 5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16], [0, 17, 18, 19, 20],
+    [5, 9, 13, 17],
+)]
+
+
+class FrameOverlay():
+    """One frame's annotations, in frame pixels (landmarks normalized), drawn later."""
+
+    FILLED = cv2.FILLED
+
+    def __init__(self, maxHands=2):
+        self.shapes = []  # ("circle" | "line", args)
+        self.stable = []  # ("rectangle" | "putText", args): candidates for the static layer
+        self.hands = np.zeros((maxHands, 21, 2))
+        self.handCount = 0
+        self.frameSize = (0, 0)
+
+    def begin(self, img):
+        self.shapes.clear()
+        self.stable.clear()
+        self.handCount = 0
+        self.frameSize = (img.shape[1], img.shape[0])
+
+    def circle(self, img, center, radius, color, thickness=1):
+        self.shapes.append(("circle", (tuple(center), radius, tuple(color), thickness)))
+
+    def line(self, img, pt1, pt2, color, thickness=1):
+        self.shapes.append(("line", (tuple(pt1), tuple(pt2), tuple(color), thickness)))
+
+    def rectangle(self, img, pt1, pt2, color, thickness=1):
+        self.stable.append(("rectangle", (tuple(pt1), tuple(pt2), tuple(color), thickness)))
+
+    def putText(self, img, text, org, fontFace, fontScale, color, thickness=1):
+        self.stable.append(("putText", (text, tuple(org), fontFace, fontScale, tuple(color), thickness)))
+
+    def landmarks(self, img, landmarks):
+        """Skeleton of one hand from normalized (21, 3) landmarks."""
+        if self.handCount < len(self.hands):
+            self.hands[self.handCount] = landmarks[:, :2]
+            self.handCount += 1
+
+
+class OverlayCompositor():
+    def __init__(self, cacheSize=8):
+        self.cacheSize = cacheSize
+        self.layers = OrderedDict()  # (size, scale, ops) -> (image, mask)
+        self.previous = frozenset()
+        self.hits = 0
+        self.misses = 0
+        self._points = np.zeros((21, 2), dtype=np.int32)
+
+    def render(self, out, overlay):
+        """Draw overlay onto out, scaled from overlay.frameSize to out's size."""
+        w, h = overlay.frameSize
+        if not w:
+            return out
+        scale = out.shape[1] / w
+        current = overlay.stable
+        # only ops seen unchanged last frame are worth caching; the rest are drawn directly
+        stable = tuple(op for op in current if op in self.previous)
+        self.previous = frozenset(current)
+        if stable:
+            image, mask = self._layer(out.shape, scale, stable)
+            cv2.copyTo(image, mask, out)
+        for op in current:
+            if op not in stable:
+                self._draw(out, scale, op)
+
+        for name, args in overlay.shapes:
+            if name == "circle":
+                center, radius, color, thickness = args
+                cv2.circle(out, self._pt(center, scale), max(1, round(radius * scale)), color,
+                           thickness if thickness < 0 else max(1, round(thickness * scale)))
+            else:
+                pt1, pt2, color, thickness = args
+                cv2.line(out, self._pt(pt1, scale), self._pt(pt2, scale), color,
+                         max(1, round(thickness * scale)))
+
+        size = np.array([out.shape[1], out.shape[0]])
+        for hand in overlay.hands[:overlay.handCount]:
+            np.multiply(hand, size, out=self._points, casting="unsafe")
+            cv2.polylines(out, [self._points[chain] for chain in HAND_CHAINS], False, (255, 255, 255),
+                          1, cv2.LINE_AA)
+            for x, y in self._points.tolist():
+                cv2.circle(out, (x, y), 2, (0, 0, 255), cv2.FILLED)
+        return out
+
+    def _layer(self, shape, scale, ops):
+        key = (shape, round(scale, 4), ops)
+        layer = self.layers.get(key)
+        if layer is not None:
+            self.layers.move_to_end(key)
+            self.hits += 1
+            return layer
+        self.misses += 1
+        image = np.zeros(shape, dtype=np.uint8)
+        for op in ops:
+            self._draw(image, scale, op)
+        mask = image.any(axis=2).astype(np.uint8)
+        self.layers[key] = image, mask
+        if len(self.layers) > self.cacheSize:
+            self.layers.popitem(last=False)
+        return image, mask
+
+    @staticmethod
+    def _pt(point, scale):
+        return round(point[0] * scale), round(point[1] * scale)
+
+    def _draw(self, out, scale, op):
+        name, args = op
+        if name == "rectangle":
+            pt1, pt2, color, thickness = args
+            cv2.rectangle(out, self._pt(pt1, scale), self._pt(pt2, scale), color,
+                          thickness if thickness < 0 else max(1, round(thickness * scale)))
+        else:
+            text, org, fontFace, fontScale, color, thickness = args
+            cv2.putText(out, text, self._pt(org, scale), fontFace, fontScale * scale, color,
+                        max(1, round(thickness * scale)))
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    from mediapipe.framework.formats import landmark_pb2
+    import mediapipe as mp
+
+    from Sources import RecordingSource
+
+    parser = argparse.ArgumentParser(description="Time preview annotation: full-size drawing vs the compositor.")
+    parser.add_argument("recording", help=".npz landmark recording")
+    parser.add_argument("--width", type=int, default=320, help="preview width")
+    args = parser.parse_args(argv)
+
+    source = RecordingSource(args.recording)
+    frames = []
+    while True:
+        success, img, _ = source.read()
+        if not success:
+            break
+        landmarks, present, _ = source.current()
+        frames.append([landmarks[slot].copy() for slot in np.flatnonzero(present)])
+    h, w = source.canvas.shape[:2]
+    size = (args.width, max(1, round(h * args.width / w)))
+    mpHands, mpDraw = mp.solutions.hands, mp.solutions.drawing_utils
+
+    def annotate(gfx, img, hands, drawSkeleton):
+        # what a gesture-mode frame draws: frameR box, skeleton, fingertip, pinch line, bbox, label
+        gfx.rectangle(img, (100, 100), (w - 100, h - 100), (255, 0, 255), 2)
+        for lm in hands:
+            drawSkeleton(img, lm)
+            pts = (lm[:, :2] * (w, h)).astype(int)
+            for x, y in pts.tolist():
+                gfx.circle(img, (x, y), 5, (255, 0, 255), cv2.FILLED)
+            gfx.rectangle(img, tuple(pts.min(axis=0) - 20), tuple(pts.max(axis=0) + 20), (0, 255, 0), 2)
+            gfx.line(img, tuple(pts[8]), tuple(pts[12]), (255, 0, 255), 3)
+            gfx.circle(img, tuple(pts[8]), 15, (255, 0, 255), cv2.FILLED)
+        gfx.putText(img, "Scroll Mode", (20, 100), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
+        gfx.putText(img, "30", (20, 50), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 0), 3)
+
+    def mediapipeSkeleton(img, lm):
+        proto = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z in lm:
+            proto.landmark.add(x=x, y=y, z=z)
+        mpDraw.draw_landmarks(img, proto, mpHands.HAND_CONNECTIONS)
+
+    img = np.zeros((h, w, 3), dtype=np.uint8)
+    t0 = time.perf_counter()
+    for hands in frames:
+        img.fill(0)
+        annotate(cv2, img, hands, mediapipeSkeleton)
+        cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    direct = (time.perf_counter() - t0) / len(frames)
+
+    overlay = FrameOverlay()
+    compositor = OverlayCompositor()
+    t0 = time.perf_counter()
+    for hands in frames:
+        img.fill(0)
+        overlay.begin(img)
+        annotate(overlay, img, hands, overlay.landmarks)
+        compositor.render(cv2.resize(img, size, interpolation=cv2.INTER_AREA), overlay)
+    composited = (time.perf_counter() - t0) / len(frames)
+
+    print(f"[Overlay] {len(frames)} frames at {w}x{h}, preview {size[0]}x{size[1]}")
+    print(f"[Overlay] full-size drawing + downscale: {1000 * direct:.3f} ms/frame")
+    print(f"[Overlay] compositor: {1000 * composited:.3f} ms/frame "
+          f"(static layer cache {compositor.hits} hits, {compositor.misses} misses)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,275 @@
+"""
+Frame pipeline shared by every entry point.
+
+runPipeline drives capture -> detection -> mode controller -> display for
+any source/detector/controller combination and records per-stage timings.
+runMode builds the usual combination for a mode name; the core scripts,
+ModeRunner, ModeWorker and the headless CLI all go through it. Optional
+attachments (recorder, preview, watchdog, profile, flight recorder, hand
+state) travel together in a PipelineHooks.
+"""
+import time
+import cv2
+
+import HandTrackingModule as htm
+from GestureModes import CONTROLLERS, modeSettings
+from Metrics import PipelineMetrics
+from Overlay import FrameOverlay, OverlayCompositor
+from Sources import openSource
+
+
+def createDetector(settings, source):
+    if hasattr(source, "current"):
+        # recordings and landmark streams carry landmarks, not pixels worth detecting on
+        return htm.replayDetector(source, maxHands=settings["maxHands"])
+    return htm.handDetector(maxHands=settings["maxHands"],
+                            detectionCon=settings["detectionCon"],
+                            trackCon=settings["trackCon"],
+                            modelComplexity=settings["modelComplexity"],
+                            inputScale=settings["inputScale"],
+                            asyncInference=settings["asyncInference"])
+
+
+class PipelineHooks():
+    """Optional attachments of one run; any of them may be None.
+
+    recorder   Sources.RecordingWriter or LandmarkStream.LandmarkPublisher;
+               sees every frame and is saved when the run ends.
+    preview    Preview.PreviewChannel; frames are only annotated when shown
+               in the OpenCV window or picked for the preview. Annotations
+               are recorded in an Overlay.FrameOverlay and rendered at the
+               output's size, so the inference frame itself is never drawn on.
+    watchdog   Watchdog.PipelineWatchdog; the loop reports its stages to it
+               and rebuilds the detector or controller when it asks.
+    profile    Profiles.ProfileWatcher; edits to the mode's profile file are
+               applied to the controller between two frames.
+    flight     FlightRecorder.FlightRecorder; it sees every frame and the
+               controller's discrete actions, and dumps the last seconds when
+               something trips it ("f" in the OpenCV window asks for a dump).
+    handState  HandState.HandStatePublisher; every frame's landmarks, finger
+               states and gesture go to shared memory for other local apps.
+
+    forLaunch() builds the set every mode the user starts gets, whether it
+    runs in a launcher thread (ModeRunner) or a warm worker (ModeWorker).
+    """
+
+    def __init__(self, recorder=None, preview=None, watchdog=None, profile=None, flight=None,
+                 handState=None):
+        self.recorder = recorder
+        self.preview = preview
+        self.watchdog = watchdog
+        self.profile = profile
+        self.flight = flight
+        self.handState = handState
+
+    @classmethod
+    def forLaunch(cls, mode, preview=None, onEvent=None):
+        """Profile (defaults + calibration + profiles/<mode>.json, hot-reloaded),
+        watchdog, flight recorder and shared hand state for a user-started mode.
+        onEvent(kind, message) gets the watchdog's events; stalls also trip the
+        flight recorder. Raises Profiles.ProfileError for an invalid profile."""
+        from FlightRecorder import FlightRecorder, unexpectedActions
+        from HandState import HandStatePublisher
+        from Profiles import ProfileWatcher
+        from Watchdog import PipelineWatchdog
+
+        profile = ProfileWatcher(mode)
+        settings = profile.settings
+        # always on: the last seconds are dumped on latency spikes, stalls and close/minimize hotkeys
+        flight = FlightRecorder(mode, maxHands=settings["maxHands"], watchActions=unexpectedActions(settings))
+
+        def watchdogEvent(kind, message):
+            if kind in ("stall", "abandoned"):
+                flight.trigger(f"watchdog {kind}")
+            if onEvent is not None:
+                onEvent(kind, message)
+
+        try:
+            # live hand state for local overlay/whiteboard/analytics apps (see core/HandState.py)
+            handState = HandStatePublisher(maxHands=settings["maxHands"])
+        except OSError as e:
+            print(f"[Pipeline] hand state not published: {e}")
+            handState = None
+        return cls(preview=preview, watchdog=PipelineWatchdog(onEvent=watchdogEvent), profile=profile,
+                   flight=flight, handState=handState)
+
+    def close(self):
+        """Free what the hooks hold open (the hand state mapping); safe to call again."""
+        if self.handState is not None:
+            self.handState.close()
+            self.handState = None
+
+
+def runPipeline(controller, source, detector, stopFlag=None, maxFrames=None, show=False,
+                metrics=None, windowName="Image", requestedAt=None, hooks=None):
+    """Run until the source ends, the user exits, stopFlag is set or maxFrames is reached.
+
+    requestedAt (perf_counter) is when the user asked for the mode; start-up
+    latencies are reported relative to it as setup_ms, firstFrame_ms and
+    firstMove_ms gauges. hooks is an optional PipelineHooks.
+    """
+    if hooks is None:
+        hooks = PipelineHooks()
+    recorder = hooks.recorder
+    preview = hooks.preview
+    watchdog = hooks.watchdog
+    profile = hooks.profile
+    flight = hooks.flight
+    handState = hooks.handState
+    if metrics is None:
+        metrics = PipelineMetrics()
+    if requestedAt is None:
+        requestedAt = time.perf_counter()
+    frames = 0
+    pTime = 0
+    controller.metrics = metrics
+    controller.requestedAt = requestedAt
+    backend = controller.backend
+    if flight is not None:
+        controller.backend = flight.wrap(backend)
+        flight.mode = controller.mode
+        flight.settings = controller.settings  # live: profile reloads show up in dumps
+    controller.start()
+    overlay = compositor = None
+    if show or preview is not None:
+        overlay = FrameOverlay(getattr(detector, "maxHands", 2))
+        compositor = OverlayCompositor()
+        controller.gfx = detector.gfx = overlay
+    metrics.gauge("setup_ms", 1000 * (time.perf_counter() - requestedAt))
+    if watchdog is not None:
+        watchdog.attach(source, controller.backend, metrics)
+        watchdog.start()
+    try:
+        while stopFlag is None or not stopFlag.is_set():
+            t0 = time.perf_counter()
+            if watchdog is not None:
+                watchdog.enter("capture")
+            success, img, frameTime = source.read()
+            t1 = time.perf_counter()
+            if watchdog is not None and watchdog.abandoned:
+                break
+            if not success:
+                if source.finished:
+                    break
+                continue
+            metrics.record("capture", t1 - t0)
+
+            if watchdog is not None:
+                watchdog.enter("detect")
+            previewFrame = preview is not None and preview.due(t1)
+            controller.draw = show or previewFrame
+            if controller.draw:
+                overlay.begin(img)
+            img = detector.findHands(img, draw=controller.draw, timestamp=frameTime)
+            t2 = time.perf_counter()
+            metrics.record("detect", t2 - t1)
+            if watchdog is not None and watchdog.abandoned:
+                break
+
+            if recorder is not None:
+                recorder.add(detector, img, frameTime)
+            if flight is not None:
+                flight.add(detector, img, frameTime)
+
+            if watchdog is not None:
+                watchdog.enter("act")
+            controller.backend.beginFrame(frames, frameTime)
+            keepRunning = controller.process(img, detector, frameTime)
+            if handState is not None:
+                handState.publish(detector, controller, img, frameTime)
+            t3 = time.perf_counter()
+            metrics.record("act", t3 - t2)
+            metrics.record("frame", t3 - t0)
+            metrics.frame()
+            frames += 1
+            if frames == 1:
+                metrics.gauge("firstFrame_ms", 1000 * (t3 - requestedAt))
+            if flight is not None:
+                flight.endFrame(detector, t0, t1, t2, t3)
+
+            if watchdog is not None:
+                watchdog.frameDone(frameTime)
+                for stage in watchdog.takeRestarts():
+                    if stage == "detect":
+                        detector.restart()
+                    elif stage == "act":
+                        controller.close()
+                        controller.start()
+                    print(f"[Pipeline] restarted {stage} stage")
+
+            if profile is not None:
+                changes = profile.poll(t3)
+                if changes:
+                    controller.configure(changes)
+
+            if previewFrame:
+                preview.publish(img, t3, overlay)
+                metrics.record("preview", time.perf_counter() - t3)
+
+            if show:
+                if watchdog is not None:
+                    watchdog.enter("display")
+                cTime = time.time()
+                fps = 1 / (cTime - pTime) if pTime > 0 else 0
+                pTime = cTime
+                overlay.putText(img, str(int(fps)), (20, 50), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 0), 3)
+                cv2.imshow(windowName, compositor.render(img, overlay))
+                # allow exit with Esc
+                key = cv2.waitKey(1) & 0xFF
+                if key == 27:
+                    break
+                if key == ord("f") and flight is not None:
+                    flight.trigger("key")
+
+            if not keepRunning:
+                metrics.gauge("exitFrame", frames - 1)
+                break
+            if maxFrames is not None and frames >= maxFrames:
+                break
+    finally:
+        if watchdog is not None:
+            watchdog.stop()
+        controller.close()
+        controller.backend = backend
+        if flight is not None and flight.pending is not None:
+            # requested while a stage hung (watchdog) or on the last frame
+            flight.dump()
+        if overlay is not None:
+            detector.gfx = cv2
+        source.release()
+        if recorder is not None:
+            recorder.save()
+        hooks.close()
+        if show:
+            cv2.destroyAllWindows()
+    return metrics
+
+
+def runMode(mode, source=None, backend=None, settings=None, stopFlag=None, maxFrames=None,
+            show=False, metrics=None, realtime=False, detector=None, requestedAt=None, hooks=None):
+    """Run a mode by name. source is a Sources object or a spec for openSource;
+    backend defaults to real OS input; detector may be a prewarmed one.
+    With a profile in hooks, its settings are used and kept up to date.
+    The source is released when the run ends, also if it fails to start."""
+    if requestedAt is None:
+        requestedAt = time.perf_counter()
+    opened = None if source is None or isinstance(source, (int, str)) else source
+    try:
+        if hooks is not None and hooks.profile is not None:
+            settings = dict(hooks.profile.settings, **(settings or {}))
+        settings = modeSettings(mode, settings)
+        if opened is None:
+            opened = openSource(source, settings["wCam"], settings["hCam"], realtime=realtime, settings=settings)
+        if backend is None:
+            from Backends import RealBackend
+            backend = RealBackend()
+        if detector is None:
+            detector = createDetector(settings, opened)
+        controller = CONTROLLERS[mode](backend, settings, draw=show)
+    except BaseException:
+        # runPipeline never ran, so nothing else releases the camera
+        if opened is not None:
+            opened.release()
+        raise
+    return runPipeline(controller, opened, detector, stopFlag=stopFlag, maxFrames=maxFrames,
+                       show=show, metrics=metrics, requestedAt=requestedAt, hooks=hooks)
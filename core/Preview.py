@@ -0,0 +1,72 @@
+"""
+Live preview channel from the pipeline to a UI.
+
+runPipeline asks due() once per frame. Only when a viewer is visible and the
+rate cap allows it does that frame get annotated and published as a small
+copy, so a hidden preview costs nothing and a visible one costs a few
+downscaled frames per second. Annotations are rendered onto the small copy
+(see Overlay.py), not drawn at full size. The channel is bounded and drops
+the oldest frame, so a slow UI never backs up the pipeline.
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from Overlay import OverlayCompositor
+
+
+class PreviewChannel():
+    def __init__(self, maxFps=10, width=320, maxFrames=2):
+        self.interval = 1.0 / maxFps
+        self.width = width
+        self.frames = deque(maxlen=maxFrames)
+        self.lock = threading.Lock()
+        self.visible = threading.Event()
+        self.lastPublish = 0.0
+        self.published = 0
+        self.dropped = 0
+        self.compositor = OverlayCompositor()
+
+    def setVisible(self, visible):
+        if visible:
+            self.visible.set()
+        else:
+            self.visible.clear()
+            with self.lock:
+                self.frames.clear()
+
+    def due(self, now=None):
+        """True if the next frame should be annotated and published."""
+        if not self.visible.is_set():
+            return False
+        if now is None:
+            now = time.perf_counter()
+        return now - self.lastPublish >= self.interval
+
+    def publish(self, img, now=None, overlay=None):
+        """Queue a downscaled copy of img (BGR) with overlay's annotations."""
+        if now is None:
+            now = time.perf_counter()
+        h, w = img.shape[:2]
+        height = max(1, round(h * self.width / w))
+        small = cv2.resize(img, (self.width, height), interpolation=cv2.INTER_AREA)
+        if overlay is not None:
+            self.compositor.render(small, overlay)
+        with self.lock:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(small)
+        self.lastPublish = now
+        self.published += 1
+
+    def latest(self):
+        """Newest queued frame (older ones are discarded), or None."""
+        with self.lock:
+            if not self.frames:
+                return None
+            frame = self.frames.pop()
+            self.dropped += len(self.frames)
+            self.frames.clear()
+        return frame
@@ -0,0 +1,199 @@
+"""
+Per-mode profile files, validated once and hot-reloaded between frames.
+
+A profile is profiles/<mode>.json in the user data dir, the file Tuner.py
+writes. Its "settings" object overrides any of the mode's settings (see
+GestureModes.DEFAULT_SETTINGS), e.g.
+
+    {"settings": {"smoothening": 5, "clickDistance": 24, "closeKeys": ["ctrl", "w"]}}
+
+Effective settings are, lowest precedence first: the built-in defaults, the
+mode's defaults, the user's calibration (Calibration.py), the profile file,
+explicit overrides (command line). loadModeSettings() validates and merges
+them once; controllers copy the result into attributes, so the frame loop
+never looks anything up.
+
+ProfileWatcher checks the file's mtime at most once per interval from the
+pipeline thread. A changed, valid file is applied atomically between two
+frames through ModeController.configure() without reopening the camera or
+rebuilding the detector; an invalid one is reported and ignored. Settings
+that need a new capture or detector (RESTART_KEYS) are only picked up when
+the mode is started again.
+
+    python core/Profiles.py gesture   # validate the profile, print the effective settings
+"""
+import json
+import os
+import time
+
+from AppPaths import userDataPath
+from GestureModes import modeSettings
+
+# camera and detector settings: changing them means reopening or rebuilding those
+RESTART_KEYS = frozenset({"wCam", "hCam", "maxHands", "detectionCon", "trackCon", "modelComplexity",
+                          "inputScale", "asyncInference"})
+
+# (min, max) for numeric settings; everything else numeric must be >= 0
+RANGES = {
+    "wCam": (1, None),
+    "hCam": (1, None),
+    "smoothening": (1, None),
+    "maxHands": (1, 4),
+    "detectionCon": (0, 1),
+    "trackCon": (0, 1),
+    "modelComplexity": (0, 1),
+    "inputScale": (0.1, 1),
+}
+
+
+class ProfileError(ValueError):
+    pass
+
+
+def profilePath(mode):
+    return userDataPath("profiles", f"{mode}.json")
+
+
+def validate(mode, settings, source="profile"):
+    """Check names, types and ranges against the mode's defaults; returns a coerced copy."""
+    if not isinstance(settings, dict):
+        raise ProfileError(f"{source}: 'settings' must be an object")
+    defaults = modeSettings(mode)
+    checked = {}
+    for key, value in settings.items():
+        if key not in defaults:
+            raise ProfileError(f"{source}: unknown setting '{key}' for {mode} mode")
+        default = defaults[key]
+        if key == "cursorTarget":
+            if value not in ("virtual", "primary") and not (isinstance(value, int) and value >= 0):
+                raise ProfileError(f"{source}: cursorTarget must be 'virtual', 'primary' or a monitor index")
+        elif isinstance(default, bool):
+            if not isinstance(value, bool):
+                raise ProfileError(f"{source}: {key} must be true or false")
+        elif isinstance(default, (int, float)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ProfileError(f"{source}: {key} must be a number")
+            if isinstance(default, int) and value != int(value):
+                raise ProfileError(f"{source}: {key} must be a whole number")
+            value = type(default)(value)
+            lo, hi = RANGES.get(key, (0, None))
+            if value < lo or (hi is not None and value > hi):
+                bound = f">= {lo}" if hi is None else f"between {lo} and {hi}"
+                raise ProfileError(f"{source}: {key} must be {bound}, got {value}")
+        elif isinstance(default, list):
+            if not value or not isinstance(value, list) or not all(isinstance(v, str) and v for v in value):
+                raise ProfileError(f"{source}: {key} must be a list of key names")
+        elif isinstance(default, str):
+            if not isinstance(value, str) or not value:
+                raise ProfileError(f"{source}: {key} must be a non-empty string")
+        checked[key] = value
+    return checked
+
+
+def readProfile(mode, path):
+    """Validated settings from a profile file; {} if it does not exist."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise ProfileError(f"{path}: {e}")
+    if not isinstance(data, dict):
+        raise ProfileError(f"{path}: expected a JSON object")
+    return validate(mode, data.get("settings", {}), source=path)
+
+
+def loadModeSettings(mode, path=None, calibrated=True, overrides=None):
+    """Effective settings: defaults < calibration < profile at path < overrides."""
+    settings = modeSettings(mode)
+    if calibrated:
+        from Calibration import calibratedSettings
+        settings.update(calibratedSettings(settings["wCam"], settings["hCam"]))
+    if path is not None:
+        settings.update(readProfile(mode, path))
+    if overrides:
+        settings.update(overrides)
+    return settings
+
+
+class ProfileWatcher():
+    """Effective settings of one mode, reloaded when its profile file changes."""
+
+    def __init__(self, mode, path=None, calibrated=True, overrides=None, interval=1.0):
+        self.mode = mode
+        self.path = profilePath(mode) if path is None else path
+        self.calibrated = calibrated
+        self.overrides = dict(overrides or {})
+        self.interval = interval
+        self.signature = self._signature()
+        self.settings = loadModeSettings(mode, self.path, calibrated, self.overrides)
+        self.lastCheck = time.perf_counter()
+        self.reloads = 0
+        self.rejected = None  # signature of the last invalid file, reported once
+
+    def _signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll(self, now=None):
+        """Changed settings to apply now, or None. Cheap enough to call every frame."""
+        if now is None:
+            now = time.perf_counter()
+        if now - self.lastCheck < self.interval:
+            return None
+        self.lastCheck = now
+        signature = self._signature()
+        if signature == self.signature or signature == self.rejected:
+            return None
+        try:
+            settings = loadModeSettings(self.mode, self.path, self.calibrated, self.overrides)
+        except ProfileError as e:
+            # often a half-written file; the next save changes the signature again
+            print(f"[Profiles] ignoring invalid profile: {e}")
+            self.rejected = signature
+            return None
+        self.signature = signature
+        self.rejected = None
+        changes = {key: value for key, value in settings.items() if self.settings[key] != value}
+        pending = sorted(changes.keys() & RESTART_KEYS)
+        if pending:
+            print(f"[Profiles] {', '.join(pending)} apply when the mode is restarted")
+            for key in pending:
+                del changes[key]
+        if not changes:
+            return None
+        self.settings.update(changes)
+        self.reloads += 1
+        print(f"[Profiles] reloaded {self.mode}: {changes}")
+        return changes
+
+
+def main(argv=None):
+    import argparse
+
+    from GestureModes import MODE_SETTINGS
+
+    parser = argparse.ArgumentParser(description="Check a mode's profile and print its effective settings.")
+    parser.add_argument("mode", choices=sorted(MODE_SETTINGS))
+    parser.add_argument("--profile", help="profile file (default: profiles/<mode>.json in the user data dir)")
+    parser.add_argument("--uncalibrated", action="store_true", help="leave the user's calibration out")
+    args = parser.parse_args(argv)
+
+    path = profilePath(args.mode) if args.profile is None else args.profile
+    try:
+        settings = loadModeSettings(args.mode, path, calibrated=not args.uncalibrated)
+    except ProfileError as e:
+        print(f"[Profiles] {e}")
+        return 1
+    print(f"[Profiles] {args.mode} with {path if os.path.exists(path) else 'no profile file'}:")
+    for key, value in sorted(settings.items()):
+        print(f"  {key} = {value!r}{'   (on restart)' if key in RESTART_KEYS else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,168 @@
+"""
+Camera-to-desktop cursor mapping.
+
+CursorMapper folds the active region (the frameR box), mirroring, optional
+aspect correction and the target monitor rectangle into one affine transform
+that is built once and only rebuilt when the camera resolution or the
+display layout changes. Mapping a point is then a multiply-add per axis.
+
+Monitor rectangles come from the Win32 API so the cursor can reach every
+screen of a multi-monitor desktop; elsewhere we fall back to the primary
+screen reported by autopy.
+"""
+import sys
+import time
+
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _user32 = ctypes.windll.user32
+    SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN = 76, 77
+    SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN = 78, 79
+    SM_CMONITORS = 80
+    MONITORINFOF_PRIMARY = 1
+
+    class _MONITORINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.DWORD),
+                    ("rcMonitor", wintypes.RECT),
+                    ("rcWork", wintypes.RECT),
+                    ("dwFlags", wintypes.DWORD)]
+
+    _MonitorEnumProc = ctypes.WINFUNCTYPE(ctypes.c_int, wintypes.HMONITOR, wintypes.HDC,
+                                          ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+else:
+    _user32 = None
+
+
+def getDisplayLayout():
+    """Return monitor rectangles (x, y, w, h) in desktop pixels, primary first."""
+    if _user32 is None:
+        import autopy
+        w, h = autopy.screen.size()
+        return [(0, 0, int(w), int(h))]
+
+    monitors = []
+
+    def callback(hMonitor, hdc, rect, data):
+        info = _MONITORINFO()
+        info.cbSize = ctypes.sizeof(_MONITORINFO)
+        if _user32.GetMonitorInfoW(hMonitor, ctypes.byref(info)):
+            r = info.rcMonitor
+            primary = bool(info.dwFlags & MONITORINFOF_PRIMARY)
+            monitors.append((not primary, r.left, r.top, r.right - r.left, r.bottom - r.top))
+        return 1
+
+    _user32.EnumDisplayMonitors(None, None, _MonitorEnumProc(callback), 0)
+    monitors.sort()
+    return [m[1:] for m in monitors]
+
+
+def layoutSignature():
+    """Cheap value that changes whenever monitors are added, removed or moved."""
+    if _user32 is None:
+        return None
+    return tuple(_user32.GetSystemMetrics(i) for i in (SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN,
+                                                      SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN,
+                                                      SM_CMONITORS))
+
+
+def getCursorMover():
+    """Return a move(x, y) function that accepts coordinates anywhere on the desktop.
+
+    autopy.mouse.move refuses points outside the primary screen, so on Windows
+    we call SetCursorPos directly.
+    """
+    if _user32 is None:
+        import autopy
+        return autopy.mouse.move
+
+    setCursorPos = _user32.SetCursorPos
+
+    def move(x, y):
+        setCursorPos(int(x), int(y))
+
+    return move
+
+
+def targetRect(layout, target):
+    """Resolve a target ("primary", "virtual" or a monitor index) to (x, y, w, h)."""
+    if target == "virtual":
+        x0 = min(m[0] for m in layout)
+        y0 = min(m[1] for m in layout)
+        x1 = max(m[0] + m[2] for m in layout)
+        y1 = max(m[1] + m[3] for m in layout)
+        return x0, y0, x1 - x0, y1 - y0
+    if target == "primary":
+        return layout[0]
+    index = int(target)
+    if 0 <= index < len(layout):
+        return layout[index]
+    # configured monitor is gone (unplugged); fall back to the primary one
+    return layout[0]
+
+
+class CursorMapper():
+    def __init__(self, camSize, frameR=100, target="virtual", mirror=True, keepAspect=False,
+                 layoutPollInterval=2.0, layoutFunc=getDisplayLayout, signatureFunc=layoutSignature):
+        self.frameR = frameR
+        self.target = target
+        self.mirror = mirror
+        self.keepAspect = keepAspect
+        self.layoutPollInterval = layoutPollInterval
+        # the output backend decides which desktop we are mapping onto
+        self.layoutFunc = layoutFunc
+        self.signatureFunc = signatureFunc
+
+        self.camSize = None
+        self.layout = None
+        self.signature = signatureFunc()
+        self.lastPoll = time.perf_counter()
+        self.rebuild(camSize, layoutFunc())
+
+    def rebuild(self, camSize, layout):
+        wCam, hCam = camSize
+        tx, ty, tw, th = targetRect(layout, self.target)
+
+        # active region inside the camera frame
+        rx0, ry0 = self.frameR, self.frameR
+        rx1, ry1 = wCam - self.frameR, hCam - self.frameR
+        sx = tw / max(rx1 - rx0, 1)
+        sy = th / max(ry1 - ry0, 1)
+        if self.keepAspect:
+            # equal gain on both axes; the region shrinks along the slack axis
+            sx = sy = max(sx, sy)
+        if self.mirror:
+            sx = -sx
+
+        # region centre -> target centre
+        cxCam, cyCam = (rx0 + rx1) / 2, (ry0 + ry1) / 2
+        cxScr, cyScr = tx + tw / 2, ty + th / 2
+        self._ax, self._bx = sx, cxScr - sx * cxCam
+        self._ay, self._by = sy, cyScr - sy * cyCam
+
+        self.bounds = (tx, ty, tx + tw, ty + th)
+        self.camSize = (wCam, hCam)
+        self.layout = layout
+
+    def update(self, wCam, hCam):
+        """Rebuild if the frame size or display layout changed. Returns True on rebuild."""
+        layout = self.layout
+        now = time.perf_counter()
+        if now - self.lastPoll >= self.layoutPollInterval:
+            self.lastPoll = now
+            signature = self.signatureFunc()
+            if signature != self.signature:
+                self.signature = signature
+                layout = self.layoutFunc()
+        if (wCam, hCam) == self.camSize and layout is self.layout:
+            return False
+        self.rebuild((wCam, hCam), layout)
+        return True
+
+    def map(self, x, y):
+        """Map one camera pixel to desktop coordinates, clamped to the target."""
+        xmin, ymin, xmax, ymax = self.bounds
+        sx = self._ax * x + self._bx
+        sy = self._ay * y + self._by
+        return min(max(sx, xmin), xmax - 1), min(max(sy, ymin), ymax - 1)
@@ -0,0 +1,68 @@
+"""
+Velocity-based scrolling.
+
+The camera loop turns the finger height into a continuous scroll velocity
+(wheel units per second) and hands it to ScrollEngine. The cursor output
+thread calls tick() at its own fixed rate; the engine integrates the
+velocity into a fractional accumulator and emits one coalesced wheel event
+per emit interval, carrying the remainder over. Scroll speed therefore no
+longer depends on the camera FPS and slow speeds do not truncate to zero.
+"""
+import threading
+import time
+
+
+class ScrollEngine():
+    def __init__(self, scrollFunc, maxSpeed=450, emitRate=20, curve=1.5, timeout=0.25):
+        # scrollFunc(units) injects one wheel event (pyautogui.scroll)
+        self.scrollFunc = scrollFunc
+        self.maxSpeed = maxSpeed  # wheel units per second at the edge of the region
+        self.emitInterval = 1.0 / emitRate
+        self.curve = curve  # >1 gives finer control near the centre
+        self.timeout = timeout  # velocity is dropped if not refreshed this often
+
+        self.lock = threading.Lock()
+        self.velocity = 0.0
+        self.updated = 0.0
+        self.accum = 0.0
+        self.lastTick = None
+        self.nextEmit = 0.0
+        self.eventCount = 0
+
+    def velocityFor(self, y, top, bottom):
+        """Finger height inside [top, bottom] -> velocity; above centre scrolls up."""
+        half = (bottom - top) / 2
+        offset = ((top + half) - y) / half
+        offset = min(max(offset, -1.0), 1.0)
+        speed = self.maxSpeed * abs(offset) ** self.curve
+        return speed if offset >= 0 else -speed
+
+    def setVelocity(self, velocity, timestamp=None):
+        with self.lock:
+            self.velocity = velocity
+            self.updated = timestamp if timestamp is not None else time.perf_counter()
+
+    def release(self):
+        """Stop scrolling and drop any fractional remainder."""
+        with self.lock:
+            self.velocity = 0.0
+            self.accum = 0.0
+
+    def tick(self, now):
+        """Integrate and, once per emit interval, send the whole ticks accumulated."""
+        with self.lock:
+            velocity = self.velocity
+            if now - self.updated > self.timeout:
+                velocity = self.velocity = 0.0
+            if self.lastTick is not None and velocity:
+                self.accum += velocity * (now - self.lastTick)
+            self.lastTick = now
+            if now < self.nextEmit:
+                return
+            self.nextEmit = now + self.emitInterval
+            units = int(self.accum)
+            if not units:
+                return
+            self.accum -= units
+        self.scrollFunc(units)
+        self.eventCount += 1
@@ -0,0 +1,305 @@
+"""
+Soak test: replay recordings through the full pipeline for hours and check
+that memory, threads and latency stay flat.
+
+Each pass reopens the source and builds a fresh controller (so start/stop
+and reopen paths are exercised too), with output going to a bounded fake
+backend. A sampler thread records RSS, the tracemalloc heap and its top
+growing allocators, thread count, fps and per-stage mean latency every
+--interval seconds. After a warm-up the run fails (exit code 1) if any of
+them grows or drifts past its limit. When alternating sources of different
+cost (a recording and a video), keep --interval well above one pass so each
+sample sees the same mix.
+
+Examples:
+    python core/Soak.py --source session.npz --duration 4h --report soak.json
+    python core/Soak.py --source a.npz --source b.mp4 --duration 30m --interval 30 --preview
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+
+def currentRss():
+    """Resident set size in bytes, or None if it cannot be read on this platform."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def parseDuration(text):
+    """'4h', '30m', '90s' or plain seconds."""
+    text = str(text).strip().lower()
+    units = {"h": 3600, "m": 60, "s": 1}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+class SoakSampler():
+    def __init__(self, metrics, interval=60.0, trace=True, top=5):
+        self.metrics = metrics
+        self.interval = interval
+        self.trace = trace
+        self.top = top
+        self.samples = []
+        self.baseline = None  # tracemalloc snapshot at the end of the warm-up
+        self.stopEvent = threading.Event()
+        self.thread = None
+        self.lastTotals = {}
+        self.lastFrames = 0
+        self.lastTime = None
+        self.started = None
+
+    def start(self):
+        if self.trace:
+            tracemalloc.start()
+        self.started = self.lastTime = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, name="SoakSampler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopEvent.set()
+        if self.thread is not None:
+            self.thread.join()
+        # partial interval after the pipeline stopped: reported, not analyzed
+        self.sample()["final"] = True
+        if self.trace:
+            tracemalloc.stop()
+
+    def markWarm(self):
+        """Allocator growth is reported relative to this point."""
+        if self.trace:
+            self.baseline = tracemalloc.take_snapshot()
+
+    def _run(self):
+        while not self.stopEvent.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        now = time.perf_counter()
+        totals = self.metrics.stageTotals()
+        frames = self.metrics.frames
+        elapsed = now - self.lastTime
+        stages = {}
+        for stage, (count, total, peak) in totals.items():
+            lastCount, lastTotal, lastPeak = self.lastTotals.get(stage, (0, 0.0, 0.0))
+            if count > lastCount:
+                stages[stage] = 1000 * (total - lastTotal) / (count - lastCount)
+        entry = {
+            "t": now - self.started,
+            "rssMB": (currentRss() or 0) / 2**20,
+            "threads": threading.active_count(),
+            "fps": (frames - self.lastFrames) / elapsed if elapsed > 0 else 0.0,
+            "frames": frames,
+            "stageMeans_ms": stages,
+        }
+        if self.trace and tracemalloc.is_tracing():
+            entry["heapMB"] = tracemalloc.get_traced_memory()[0] / 2**20
+            if self.baseline is not None:
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [tracemalloc.Filter(False, tracemalloc.__file__)])
+                growth = snapshot.compare_to(self.baseline, "lineno")[:self.top]
+                entry["topGrowth"] = [str(stat) for stat in growth if stat.size_diff > 0]
+        self.samples.append(entry)
+        self.lastTotals, self.lastFrames, self.lastTime = totals, frames, now
+        print(f"[Soak] {entry['t'] / 60:6.1f} min  rss {entry['rssMB']:7.1f} MB  "
+              f"heap {entry.get('heapMB', 0):6.1f} MB  threads {entry['threads']:2d}  "
+              f"{entry['fps']:7.1f} fps  frame {stages.get('frame', 0):.2f} ms")
+        return entry
+
+
+def mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
+
+
+def analyze(samples, warmup, limits):
+    """Compare the start and end of the post-warm-up window; returns (failures, stats)."""
+    steady = [s for s in samples if s["t"] >= warmup and s["frames"] > 0 and not s.get("final")]
+    if len(steady) < 4:
+        return ["not enough samples after warm-up (run longer or lower --interval)"], {}
+    quarter = max(1, len(steady) // 4)
+    head, tail = steady[:quarter], steady[-quarter:]
+
+    stats = {
+        "samples": len(steady),
+        "rssGrowthMB": mean(s["rssMB"] for s in tail) - mean(s["rssMB"] for s in head),
+        "threadGrowth": max(s["threads"] for s in tail) - max(s["threads"] for s in head),
+        "fpsStart": mean(s["fps"] for s in head),
+        "fpsEnd": mean(s["fps"] for s in tail),
+    }
+    if "heapMB" in steady[0]:
+        stats["heapGrowthMB"] = mean(s["heapMB"] for s in tail) - mean(s["heapMB"] for s in head)
+    hours = (steady[-1]["t"] - steady[0]["t"]) / 3600
+    if hours > 0:
+        stats["rssSlopeMBPerHour"] = (steady[-1]["rssMB"] - steady[0]["rssMB"]) / hours
+    drift = {}
+    for stage in steady[0]["stageMeans_ms"]:
+        start = mean(s["stageMeans_ms"].get(stage, 0.0) for s in head)
+        end = mean(s["stageMeans_ms"].get(stage, 0.0) for s in tail)
+        # sub-millisecond stages are mostly timer noise; only real slowdowns count
+        if start > 0 and end - start > limits["minLatencyDelta_ms"]:
+            drift[stage] = end / start - 1
+    stats["latencyDrift"] = drift
+
+    failures = []
+    if stats["rssGrowthMB"] > limits["rssGrowthMB"]:
+        failures.append(f"RSS grew {stats['rssGrowthMB']:.1f} MB (limit {limits['rssGrowthMB']} MB)")
+    if stats.get("heapGrowthMB", 0) > limits["heapGrowthMB"]:
+        failures.append(f"Python heap grew {stats['heapGrowthMB']:.1f} MB (limit {limits['heapGrowthMB']} MB)")
+    if stats["threadGrowth"] > limits["threadGrowth"]:
+        failures.append(f"thread count grew by {stats['threadGrowth']} (limit {limits['threadGrowth']})")
+    for stage, value in drift.items():
+        if value > limits["latencyDrift"]:
+            failures.append(f"{stage} latency drifted {100 * value:+.0f}% "
+                            f"(limit {100 * limits['latencyDrift']:.0f}%)")
+    if stats["fpsStart"] > 0 and stats["fpsEnd"] < stats["fpsStart"] * (1 - limits["latencyDrift"]):
+        failures.append(f"fps fell from {stats['fpsStart']:.1f} to {stats['fpsEnd']:.1f}")
+    return failures, stats
+
+
+def parseArgs(argv=None):
+    from GestureModes import CONTROLLERS
+    parser = argparse.ArgumentParser(description="Replay recordings through the pipeline for hours "
+                                                 "and fail on resource growth or latency drift.")
+    parser.add_argument("--source", action="append", required=True,
+                        help=".npz recording or video file; repeat to alternate between several")
+    parser.add_argument("--mode", choices=sorted(CONTROLLERS), default="gesture")
+    parser.add_argument("--duration", default="1h", help="e.g. 4h, 30m, 600 (seconds)")
+    parser.add_argument("--interval", type=float, default=60.0, help="seconds between samples")
+    parser.add_argument("--warmup", default=None, help="ignored start of the run (default: 10%% of it)")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded rate")
+    parser.add_argument("--cursor-rate", type=int, default=0,
+                        help="cursor output rate in Hz (default 0: synchronous, as for accelerated replays)")
+    parser.add_argument("--preview", action="store_true", help="also publish and consume preview frames")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="skip heap tracing (less overhead)")
+    parser.add_argument("--max-rss-growth", type=float, default=50.0, help="MB")
+    parser.add_argument("--max-heap-growth", type=float, default=20.0, help="MB")
+    parser.add_argument("--max-thread-growth", type=int, default=2)
+    parser.add_argument("--max-latency-drift", type=float, default=0.25, help="fraction, e.g. 0.25 = +25%%")
+    parser.add_argument("--min-latency-delta", type=float, default=0.5,
+                        help="ms a stage must slow down by before drift is checked")
+    parser.add_argument("--report", metavar="JSON", help="write samples and verdict here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+
+    from Backends import RecordingBackend
+    from GestureModes import modeSettings
+    from Metrics import PipelineMetrics
+    from Pipeline import PipelineHooks, createDetector, runMode
+    from Preview import PreviewChannel
+    from Sources import RecordingSource, openSource
+
+    duration = parseDuration(args.duration)
+    warmup = parseDuration(args.warmup) if args.warmup is not None else 0.1 * duration
+    settings = modeSettings(args.mode, {"cursorRate": args.cursor_rate})
+    metrics = PipelineMetrics(window=1000)
+    sampler = SoakSampler(metrics, args.interval, trace=not args.no_tracemalloc)
+    stopFlag = threading.Event()
+    deadline = threading.Timer(duration, stopFlag.set)
+    deadline.daemon = True
+    warmTimer = threading.Timer(warmup, sampler.markWarm)
+    warmTimer.daemon = True
+
+    preview = None
+    if args.preview:
+        preview = PreviewChannel(maxFps=30)
+        preview.setVisible(True)
+
+        def consume():
+            while not stopFlag.wait(0.1):
+                preview.latest()
+        threading.Thread(target=consume, name="SoakPreview", daemon=True).start()
+
+    sampler.start()
+    deadline.start()
+    warmTimer.start()
+    passes = 0
+    actions = {}
+    liveDetector = None
+    try:
+        while not stopFlag.is_set():
+            spec = args.source[passes % len(args.source)]
+            source = openSource(spec, settings["wCam"], settings["hCam"], realtime=args.realtime)
+            if isinstance(source, RecordingSource):
+                detector = createDetector(settings, source)
+            else:
+                # one live detector is reused between runs, as ModeRunner does
+                if liveDetector is None:
+                    liveDetector = createDetector(settings, source)
+                liveDetector.reset()
+                detector = liveDetector
+            backend = RecordingBackend(maxEvents=1000)
+            runMode(args.mode, source=source, backend=backend, settings=settings, stopFlag=stopFlag,
+                    metrics=metrics, detector=detector, hooks=PipelineHooks(preview=preview))
+            for action, n in backend.counts().items():
+                actions[action] = actions.get(action, 0) + n
+            passes += 1
+    except KeyboardInterrupt:
+        print("[Soak] interrupted")
+    finally:
+        stopFlag.set()
+        deadline.cancel()
+        warmTimer.cancel()
+        sampler.stop()
+
+    limits = {
+        "rssGrowthMB": args.max_rss_growth,
+        "heapGrowthMB": args.max_heap_growth,
+        "threadGrowth": args.max_thread_growth,
+        "latencyDrift": args.max_latency_drift,
+        "minLatencyDelta_ms": args.min_latency_delta,
+    }
+    failures, stats = analyze(sampler.samples, warmup, limits)
+    print(f"[Soak] {passes} passes, {metrics.frames} frames, actions {actions}")
+    for key, value in stats.items():
+        print(f"[Soak] {key}: {value}")
+    last = sampler.samples[-1] if sampler.samples else {}
+    for line in last.get("topGrowth", []):
+        print(f"[Soak]   {line}")
+    for failure in failures:
+        print(f"[Soak] FAIL: {failure}")
+    if not failures:
+        print("[Soak] PASS")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"args": vars(args), "passes": passes, "actions": actions, "limits": limits,
+                       "stats": stats, "failures": failures, "samples": sampler.samples}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
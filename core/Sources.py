@@ -0,0 +1,276 @@
+"""
+Frame sources for the pipeline.
+
+Every source has the same small interface:
+
+    success, img, timestamp = source.read()
+    source.finished   # True once a file or recording is exhausted
+    source.live       # timestamps are capture times on the perf_counter clock
+    source.release()
+
+CameraSource wraps a live webcam, VideoFileSource plays a video file and
+RecordingSource replays a landmark recording (see RecordingWriter) so modes
+can run on machines without a camera or MediaPipe model download.
+LandmarkStream.StreamSource receives landmarks from another machine and
+MultiCamera.FusedCameraSource fuses several cameras.
+"""
+import time
+import numpy as np
+import cv2
+
+from CaptureNegotiator import CaptureNegotiator
+
+
+def openSource(spec, width=640, height=480, realtime=False, settings=None):
+    """Build a source from a CLI-style spec: camera index, video path, .npz recording,
+    udp://host:port landmark stream, or several cameras/videos joined with "+" for
+    multi-camera fusion (settings configure its detectors)."""
+    if "+" in str(spec):
+        from MultiCamera import openFusedSource
+        return openFusedSource(str(spec).split("+"), width, height, realtime=realtime, settings=settings)
+    if str(spec).startswith("udp://"):
+        from LandmarkStream import StreamSource
+        return StreamSource(spec, width, height)
+    if spec is None or str(spec).isdigit():
+        return CameraSource(None if spec is None else int(spec), width, height)
+    if str(spec).endswith(".npz"):
+        return RecordingSource(spec, realtime=realtime)
+    return VideoFileSource(spec, realtime=realtime)
+
+
+class FramePool():
+    """Round-robin frame buffers that cap.read() decodes into.
+
+    A frame stays valid until len(buffers) more frames have been read, which
+    covers the pipeline (one frame in flight) plus the previous frame.
+    """
+
+    def __init__(self, size=2):
+        self.buffers = [None] * size
+        self.index = 0
+
+    def read(self, cap):
+        buf = self.buffers[self.index]
+        if buf is None:
+            success, img = cap.read()
+        else:
+            success, img = cap.read(image=buf)
+        if success and img is not None and img.size:
+            # OpenCV reallocates if the frame size changed; keep whatever it returned
+            self.buffers[self.index] = img
+            self.index = (self.index + 1) % len(self.buffers)
+        return success, img
+
+
+class CameraSource():
+    live = True
+
+    def __init__(self, index=None, width=640, height=480, maxFailures=3, negotiate=True):
+        # index None: the camera that opened last time, else try 1 (common with
+        # multiple cameras), fall back to 0
+        self.index = index
+        self.width = width
+        self.height = height
+        self.maxFailures = maxFailures
+        self.failures = 0
+        self.finished = False
+        self.pool = FramePool()
+        # pick format/fps/buffering once per device (see CaptureNegotiator.py)
+        self.negotiator = CaptureNegotiator() if negotiate else None
+        self.profile = None
+        self.restartRequested = False  # set by requestRestart() from another thread
+        self.cap = self._open(index)
+
+    def _open(self, index):
+        if index is not None:
+            candidates = [index]
+        elif self.negotiator is not None:
+            candidates = self.negotiator.indexOrder()
+        else:
+            candidates = [1, 0]
+        for i in candidates:
+            cap = cv2.VideoCapture(i)
+            if cap.isOpened():
+                if self.negotiator is not None:
+                    self.profile = self.negotiator.configure(cap, i, self.width, self.height)
+                else:
+                    cap.set(3, self.width)
+                    cap.set(4, self.height)
+                self.index = i
+                return cap
+            cap.release()
+        raise RuntimeError(f"Unable to open camera (tried index {' and '.join(map(str, candidates))}). "
+                           "Check camera connection or change the index.")
+
+    def read(self):
+        # self.cap is only ever replaced here, on the thread that reads from it
+        if self.restartRequested:
+            self.restartRequested = False
+            self._reopen()
+        success, img = self.pool.read(self.cap)
+        timestamp = time.perf_counter()
+        if not success or img is None or img.size == 0:
+            self.failures += 1
+            if self.failures >= self.maxFailures:
+                print("Warning: empty frames captured. Reinitializing camera and retrying...")
+                self.failures = 0
+                self._reopen()
+            time.sleep(0.1)
+            return False, None, timestamp
+        self.failures = 0
+        return True, img, timestamp
+
+    def _reopen(self):
+        try:
+            self.cap.release()
+        except Exception:
+            pass
+        try:
+            self.cap = self._open(self.index)
+        except RuntimeError as e:
+            print(e)
+
+    def requestRestart(self):
+        """Ask for the camera to be reopened (any thread, e.g. the watchdog's); the
+        reading thread reopens it on its next read, once a blocked read has returned."""
+        self.restartRequested = True
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource():
+    live = False
+
+    def __init__(self, path, realtime=False):
+        # realtime=False replays as fast as possible on a synthetic clock
+        self.path = path
+        self.realtime = realtime
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Unable to open video file {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.pool = FramePool()
+        self.index = 0
+        self.start = time.perf_counter()
+        self.finished = False
+
+    def read(self):
+        success, img = self.pool.read(self.cap)
+        if not success:
+            self.finished = True
+            return False, None, time.perf_counter()
+        timestamp = self.start + self.index / self.fps
+        self.index += 1
+        if self.realtime:
+            delay = timestamp - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return True, img, timestamp
+
+    def release(self):
+        self.cap.release()
+
+
+class RecordingSource():
+    """Replays a landmark recording; frames are blank canvases of the recorded size."""
+
+    live = False
+
+    def __init__(self, path, realtime=False, loop=False):
+        data = np.load(path, allow_pickle=False)
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.timestamps = data["timestamps"]
+        self.landmarks = data["landmarks"]
+        self.present = data["present"]
+        self.handedness = data["handedness"]
+        self.frames = data["frames"] if "frames" in data.files else None
+        w, h = (int(v) for v in data["frameSize"])
+        self.canvas = np.zeros((h, w, 3), dtype=np.uint8)
+        self.index = -1
+        self.start = time.perf_counter()
+        self.offset = 0.0
+        self.finished = False
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def read(self):
+        self.index += 1
+        if self.index >= len(self.timestamps):
+            if not self.loop or not len(self.timestamps):
+                self.finished = True
+                return False, None, time.perf_counter()
+            # keep the clock monotonic across loops
+            self.offset += self.timestamps[-1] - self.timestamps[0] + (1 / 30)
+            self.index = 0
+        timestamp = self.start + self.offset + (self.timestamps[self.index] - self.timestamps[0])
+        if self.realtime:
+            delay = timestamp - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        if self.frames is not None:
+            h, w = self.canvas.shape[:2]
+            frame = self.frames[self.index]
+            if frame.shape[:2] == (h, w):
+                np.copyto(self.canvas, frame)
+            else:
+                cv2.resize(frame, (w, h), dst=self.canvas)
+        else:
+            self.canvas.fill(0)
+        return True, self.canvas, timestamp
+
+    def current(self):
+        """(landmarks, present, handedness) recorded for the frame last read."""
+        i = self.index
+        return self.landmarks[i], self.present[i], self.handedness[i]
+
+    def release(self):
+        pass
+
+
+HANDEDNESS_CODES = {None: 0, "Left": 1, "Right": 2}
+HANDEDNESS_LABELS = {code: label for label, code in HANDEDNESS_CODES.items()}
+
+
+class RecordingWriter():
+    """Collects raw (unsmoothed) detector output per frame and saves it as .npz."""
+
+    def __init__(self, path, maxHands=2):
+        self.path = path
+        self.maxHands = maxHands
+        self.timestamps = []
+        self.landmarks = []
+        self.present = []
+        self.handedness = []
+        self.frameSize = None
+
+    def add(self, detector, img, timestamp):
+        if self.frameSize is None:
+            self.frameSize = (img.shape[1], img.shape[0])
+        hands = min(self.maxHands, detector.maxHands)
+        landmarks = np.zeros((self.maxHands, 21, 3), dtype=np.float32)
+        present = np.zeros(self.maxHands, dtype=bool)
+        handedness = np.zeros(self.maxHands, dtype=np.uint8)
+        landmarks[:hands] = detector.rawLandmarks[:hands]
+        present[:hands] = detector.present[:hands]
+        for slot in range(hands):
+            handedness[slot] = HANDEDNESS_CODES.get(detector.handedness[slot], 0)
+        self.timestamps.append(timestamp)
+        self.landmarks.append(landmarks)
+        self.present.append(present)
+        self.handedness.append(handedness)
+
+    def save(self):
+        if not self.timestamps:
+            return
+        np.savez_compressed(self.path,
+                            timestamps=np.asarray(self.timestamps, dtype=np.float64),
+                            landmarks=np.stack(self.landmarks),
+                            present=np.stack(self.present),
+                            handedness=np.stack(self.handedness),
+                            frameSize=np.asarray(self.frameSize))
+        print(f"[Recording] saved {len(self.timestamps)} frames to {self.path}")
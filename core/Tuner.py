@@ -0,0 +1,346 @@
+"""
+Parameter sweep tuner.
+
+Replays labelled recordings through a mode for every combination (grid) or a
+random sample of parameter settings, on all cores, and scores each setting:
+
+  * precision / recall of discrete actions (click, mouseDown, mouseUp, key
+    presses, hotkeys and the exit gesture) against the labels, matched within
+    --tolerance frames,
+  * cursor jitter: RMS of the frame-to-frame change in cursor velocity, in px,
+  * cursor lag, in ms: the mean delay of the cursor path behind the raw
+    index tip, measured on the replay (see cursorLag),
+  * mean per-frame cost.
+
+Labels use the headless event format, in a sidecar next to the recording:
+record with `headless.py --record s.npz`, replay with
+`headless.py --source s.npz --events s.npz.labels.json`, then delete the
+events that were not intended (moves and scrolls are ignored).
+
+The recommended setting per mode is the cheapest one whose F1 is within
+--f1-slack of the best, ties broken by jitter. It is written to
+profiles/<mode>.json in the user data dir, where modes pick it up (see
+Profiles.py); an existing profile is only replaced with --force.
+
+Detector parameters (detectionCon, trackCon, modelComplexity, inputScale)
+only matter when MediaPipe runs on pixels: pass --detect and use videos or
+recordings saved with frames.
+
+Examples:
+    python core/Tuner.py --mode gesture --recording s.npz
+    python core/Tuner.py --mode gaming --recording play.mp4 --detect --search random --samples 40
+    python core/Tuner.py --mode normal --recording s.npz --param smoothening=3,5,7,9,12
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from AppPaths import userDataPath
+
+
+PARAM_GRID = {
+    "frameR": [60, 80, 100, 120],
+    "smoothening": [3, 5, 7, 9],
+    "clickDistance": [15, 20, 25, 30],
+    "exitMargin": [30, 40, 50],
+}
+
+DETECTOR_GRID = {
+    "detectionCon": [0.5, 0.7],
+    "trackCon": [0.5, 0.7],
+    "modelComplexity": [0, 1],
+    "inputScale": [1.0, 0.75, 0.5],
+}
+
+DISCRETE_ACTIONS = ("click", "mouseDown", "mouseUp", "press", "hotkey", "exit")
+
+
+def labelsPath(recording):
+    return recording + ".labels.json"
+
+
+def loadLabels(recording):
+    """[(frame, actionKey)] from the recording's sidecar, sorted by frame."""
+    with open(labelsPath(recording)) as f:
+        events = json.load(f)
+    labels = [(e["frame"], actionKey(e["action"], e.get("args", ()))) for e in events
+              if e["action"] in DISCRETE_ACTIONS]
+    return sorted(labels)
+
+
+def actionKey(action, args):
+    # keys and hotkeys are only the same action with the same keys
+    if action in ("press", "hotkey"):
+        return f"{action}:{'+'.join(str(a) for a in args)}"
+    return action
+
+
+def matchEvents(predicted, labels, tolerance):
+    """Greedy nearest match per action; returns (true positives, predicted count, label count)."""
+    unmatched = list(labels)
+    hits = 0
+    for frame, key in sorted(predicted):
+        best = None
+        for i, (labelFrame, labelKey) in enumerate(unmatched):
+            if labelKey == key and abs(labelFrame - frame) <= tolerance:
+                if best is None or abs(labelFrame - frame) < abs(unmatched[best][0] - frame):
+                    best = i
+        if best is not None:
+            unmatched.pop(best)
+            hits += 1
+    return hits, len(predicted), len(labels)
+
+
+def cursorJitter(moves):
+    """RMS second difference of the cursor path, px per frame^2."""
+    if len(moves) < 3:
+        return 0.0
+    total = 0.0
+    for (x0, y0), (x1, y1), (x2, y2) in zip(moves, moves[1:], moves[2:]):
+        total += (x2 - 2 * x1 + x0) ** 2 + (y2 - 2 * y1 + y0) ** 2
+    return (total / (len(moves) - 2)) ** 0.5
+
+
+class TipTrace():
+    """Pipeline recorder hook: the pointer hand's raw index tip and the time of every frame."""
+
+    def __init__(self):
+        self.tips = []  # normalized (x, y), or None without a hand
+        self.times = []
+
+    def add(self, detector, img, timestamp):
+        order = detector.handOrder
+        if order:
+            tip = detector.rawLandmarks[order[0], 8]
+            self.tips.append((float(tip[0]), float(tip[1])))
+        else:
+            self.tips.append(None)
+        self.times.append(timestamp)
+
+    def save(self):
+        pass
+
+
+def cursorLag(tips, moves, taps=30):
+    """Mean delay, in frames, of the cursor behind the raw index tip, or None.
+
+    moves maps frame -> cursor (x, y). Per axis, the cursor's per-frame
+    velocity is fitted (least squares) as a weighted sum of the tip's
+    velocity over the last `taps` frames; the lag is the centroid of those
+    weights. Scale and mirroring of the screen mapping cancel out, and
+    exponential smoothing by 1/s comes out at s - 1 frames.
+    """
+    import numpy as np
+
+    rows, targets = [], []
+    for frame in sorted(moves):
+        if frame - 1 not in moves or frame - taps < 0 or frame >= len(tips):
+            continue
+        window = tips[frame - taps:frame + 1]
+        if any(tip is None for tip in window):
+            continue
+        window = np.array(window)
+        rows.append(window[:0:-1] - window[-2::-1])  # tip velocity at frame, frame - 1, ...
+        (x0, y0), (x1, y1) = moves[frame - 1], moves[frame]
+        targets.append((x1 - x0, y1 - y0))
+    if len(rows) < 2 * taps:
+        return None
+    rows = np.array(rows)  # (samples, taps, 2)
+    targets = np.array(targets, dtype=float)
+    lags = []
+    for axis in range(2):
+        a = rows[:, :, axis]
+        b = targets[:, axis]
+        weights, _, rank, _ = np.linalg.lstsq(a, b, rcond=1e-6)
+        total = weights.sum()
+        # a tip moving at constant speed cannot tell one delay from another
+        if rank == taps and abs(total) > 1e-6 * np.abs(weights).sum():
+            lags.append(float(np.arange(taps) @ weights / total))
+    return sum(lags) / len(lags) if lags else None
+
+
+_detectors = {}  # per worker process: detector key -> live detector
+
+
+def _detectorFor(settings, source, detect):
+    from Pipeline import createDetector
+    from Sources import RecordingSource
+    from Warmup import detectorKey
+    if isinstance(source, RecordingSource) and not (detect and source.frames is not None):
+        return createDetector(settings, source)
+    key = detectorKey(settings)
+    detector = _detectors.get(key)
+    if detector is None:
+        # a recording with frames still goes through MediaPipe when --detect is given
+        import HandTrackingModule as htm
+        detector = _detectors[key] = htm.handDetector(
+            maxHands=settings["maxHands"], detectionCon=settings["detectionCon"],
+            trackCon=settings["trackCon"], modelComplexity=settings["modelComplexity"],
+            inputScale=settings["inputScale"], asyncInference=settings["asyncInference"])
+    detector.reset()
+    return detector
+
+
+def evaluate(job):
+    """Score one parameter setting on every recording (runs in a worker process)."""
+    mode, overrides, recordings, tolerance, detect = job
+    from Backends import RecordingBackend
+    from GestureModes import modeSettings
+    from Pipeline import PipelineHooks, runMode
+    from Sources import openSource
+
+    settings = modeSettings(mode, dict(overrides, cursorRate=0))
+    hits = predictedCount = labelCount = 0
+    jitters = []
+    lags = []
+    frameCost = []
+    for path, labels in recordings:
+        source = openSource(path, settings["wCam"], settings["hCam"])
+        detector = _detectorFor(settings, source, detect)
+        backend = RecordingBackend()
+        trace = TipTrace()
+        metrics = runMode(mode, source=source, backend=backend, settings=settings, detector=detector,
+                          hooks=PipelineHooks(recorder=trace))
+        predicted = [(frame, actionKey(action, args)) for frame, _, _, action, args in backend.events
+                     if action in DISCRETE_ACTIONS]
+        if "exitFrame" in metrics.gauges:
+            predicted.append((metrics.gauges["exitFrame"], "exit"))
+        h, p, n = matchEvents(predicted, labels, tolerance)
+        hits, predictedCount, labelCount = hits + h, predictedCount + p, labelCount + n
+        moves = [(frame, args) for frame, _, _, action, args in backend.events if action == "move"]
+        jitters.append(cursorJitter([args for _, args in moves]))
+        lag = cursorLag(trace.tips, dict(moves))
+        if lag is not None and len(trace.times) > 1:
+            # frames to ms on the recording's own clock
+            intervals = sorted(b - a for a, b in zip(trace.times, trace.times[1:]))
+            lags.append(1000 * lag * intervals[len(intervals) // 2])
+        frame = metrics.stageSummary("frame")
+        if frame:
+            frameCost.append(frame["mean_ms"])
+
+    precision = hits / predictedCount if predictedCount else (1.0 if not labelCount else 0.0)
+    recall = hits / labelCount if labelCount else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "settings": overrides,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "jitter_px": sum(jitters) / len(jitters) if jitters else 0.0,
+        "lag_ms": sum(lags) / len(lags) if lags else None,
+        "frame_ms": sum(frameCost) / len(frameCost) if frameCost else 0.0,
+    }
+
+
+def parseParam(text):
+    name, _, values = text.partition("=")
+    parsed = []
+    for v in values.split(","):
+        try:
+            parsed.append(int(v))
+        except ValueError:
+            parsed.append(float(v))
+    return name, parsed
+
+
+def settingsToTry(grid, search, samples, seed=0):
+    names = sorted(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if search == "random" and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+
+def recommend(results, f1Slack):
+    """The cheapest result whose F1 is within f1Slack of the best, or None without results."""
+    if not results:
+        return None
+    best = max(r["f1"] for r in results)
+    good = [r for r in results if r["f1"] >= best - f1Slack]
+    return min(good, key=lambda r: (round(r["frame_ms"], 1), r["jitter_px"], -r["f1"]))
+
+
+def parseArgs(argv=None):
+    from GestureModes import CONTROLLERS
+    parser = argparse.ArgumentParser(description="Sweep gesture parameters over labelled recordings.")
+    parser.add_argument("--mode", action="append", choices=sorted(CONTROLLERS), required=True,
+                        help="mode to tune; repeat for several")
+    parser.add_argument("--recording", action="append", required=True,
+                        help="recording (.npz) or video with a <path>.labels.json sidecar; repeatable")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=50, help="settings tried by --search random")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2",
+                        help="override the values tried for a parameter")
+    parser.add_argument("--detect", action="store_true",
+                        help="run MediaPipe on frames and sweep detector parameters too")
+    parser.add_argument("--tolerance", type=int, default=5, help="frames an action may be early or late")
+    parser.add_argument("--f1-slack", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--report", metavar="JSON", help="write every result here")
+    parser.add_argument("--no-save", action="store_true", help="do not write the recommended profiles")
+    parser.add_argument("--force", action="store_true", help="replace existing (possibly hand-edited) profiles")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+    recordings = []
+    for path in args.recording:
+        try:
+            recordings.append((path, loadLabels(path)))
+        except OSError:
+            print(f"[Tuner] {path} has no labels file ({labelsPath(path)}); see Tuner.py --help")
+            return 1
+
+    grid = dict(PARAM_GRID)
+    if args.detect:
+        grid.update(DETECTOR_GRID)
+    for text in args.param:
+        name, values = parseParam(text)
+        grid[name] = values
+    combos = settingsToTry(grid, args.search, args.samples)
+
+    report = {}
+    with multiprocessing.Pool(args.workers) as pool:
+        for mode in args.mode:
+            jobs = [(mode, combo, recordings, args.tolerance, args.detect) for combo in combos]
+            t0 = time.perf_counter()
+            results = pool.map(evaluate, jobs)
+            print(f"[Tuner] {mode}: {len(jobs)} settings x {len(recordings)} recording(s) "
+                  f"in {time.perf_counter() - t0:.1f} s on {args.workers} worker(s)")
+            results.sort(key=lambda r: (-r["f1"], r["frame_ms"], r["jitter_px"]))
+            for r in results[:10]:
+                lag = "?" if r["lag_ms"] is None else f"{r['lag_ms']:.0f}"
+                print(f"[Tuner]   P {r['precision']:.2f} R {r['recall']:.2f} F1 {r['f1']:.2f}  "
+                      f"jitter {r['jitter_px']:5.2f} px  lag {lag:>4} ms  "
+                      f"{r['frame_ms']:6.2f} ms/frame  {r['settings']}")
+            best = recommend(results, args.f1_slack)
+            if best is None:
+                print(f"[Tuner] {mode}: no settings to compare")
+                continue
+            print(f"[Tuner] {mode} recommended: {best['settings']}")
+            report[mode] = {"recommended": best, "results": results}
+            if not args.no_save:
+                path = userDataPath("profiles", f"{mode}.json")
+                if os.path.exists(path) and not args.force:
+                    print(f"[Tuner] {path} exists; kept it (pass --force to replace it)")
+                    continue
+                with open(path, "w") as f:
+                    json.dump({"mode": mode, "settings": best["settings"],
+                               "measured": {k: v for k, v in best.items() if k != "settings"},
+                               "recordings": args.recording}, f, indent=2)
+                print(f"[Tuner] wrote {path}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Cold-start prewarming.
+
+Starting a mode used to import cv2/mediapipe/pyautogui, build the MediaPipe
+graph and probe the camera only after the user clicked start. The launcher
+now calls prewarmer.start() as soon as it opens (imports + detector graphs in
+a background thread) and prewarmer.warmCamera() when an instruction window
+appears. ModeRunner then takes the warm detector and camera instead of
+building new ones, and hands the detector back afterwards so the next start
+is warm too.
+
+Each run's start-up timings are appended to coldstart.jsonl in the user data
+dir so regressions show up over time.
+"""
+import json
+import threading
+import time
+
+from AppPaths import userDataPath
+
+
+# handDetector arguments that decide whether a warm detector can be reused
+DETECTOR_FIELDS = ("maxHands", "detectionCon", "trackCon", "modelComplexity", "inputScale",
+                   "asyncInference")
+
+
+def detectorKey(settings):
+    """Pool key of a modeSettings dict, or of a detector built from one."""
+    if isinstance(settings, dict):
+        return tuple(settings[field] for field in DETECTOR_FIELDS)
+    return tuple(getattr(settings, field) for field in DETECTOR_FIELDS)
+
+
+class Prewarmer():
+    def __init__(self, cameraHoldTime=30.0):
+        self.cameraHoldTime = cameraHoldTime  # release an unclaimed camera after this long
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.thread = None
+        self.detectors = {}  # key -> list of idle detectors
+        self.timings = {}
+        self.camera = None
+        self.cameraThread = None
+        self.cameraTimer = None
+
+    def start(self, modes=("gesture", "normal", "presentation", "gaming")):
+        """Import the heavy modules and build one detector per distinct mode config."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._warm, args=(modes,), name="Prewarm",
+                                           daemon=True)
+        self.thread.start()
+
+    def _warm(self, modes):
+        try:
+            t0 = time.perf_counter()
+            import cv2  # noqa: F401
+            import numpy  # noqa: F401
+            import mediapipe  # noqa: F401
+            import Pipeline  # noqa: F401
+            from Backends import RealBackend  # noqa: F401
+            try:
+                import pyautogui  # noqa: F401
+                import mouse  # noqa: F401
+            except Exception as e:
+                # no display (headless box): the real backend will fail later anyway
+                print(f"[Prewarm] input libraries unavailable: {e}")
+            t1 = time.perf_counter()
+            self.timings["import_ms"] = 1000 * (t1 - t0)
+
+            from GestureModes import modeSettings
+            keys = []
+            for mode in modes:
+                key = detectorKey(modeSettings(mode))
+                if key not in keys:
+                    keys.append(key)
+            blank = numpy.zeros((480, 640, 3), dtype=numpy.uint8)
+            for key in keys:
+                detector = self._build(key)
+                # the graph initializes lazily on its first frame
+                detector.findHands(blank, draw=False)
+                detector.reset()
+                with self.lock:
+                    self.detectors.setdefault(key, []).append(detector)
+            self.timings["detector_ms"] = 1000 * (time.perf_counter() - t1)
+            print(f"[Prewarm] ready: imports {self.timings['import_ms']:.0f} ms, "
+                  f"{len(keys)} detector(s) {self.timings['detector_ms']:.0f} ms")
+        except Exception as e:
+            print(f"[Prewarm] failed: {e}")
+        finally:
+            self.ready.set()
+
+    @staticmethod
+    def _build(key):
+        import HandTrackingModule as htm
+        return htm.handDetector(**dict(zip(DETECTOR_FIELDS, key)))
+
+    def takeDetector(self, settings, timeout=15.0):
+        """A warm detector for these settings, or a freshly built one."""
+        if self.thread is not None:
+            self.ready.wait(timeout)
+        key = detectorKey(settings)
+        with self.lock:
+            idle = self.detectors.get(key)
+            detector = idle.pop() if idle else None
+        if detector is None:
+            return self._build(key)
+        detector.reset()
+        return detector
+
+    def returnDetector(self, detector):
+        """Keep a detector's MediaPipe graph alive for the next run."""
+        from DetectorBackends import MediaPipeDetectorBackend
+        backend = getattr(detector, "backend", None)
+        # only MediaPipe graphs are worth keeping; replay and stub detectors are cheap
+        backend = getattr(backend, "inner", backend)
+        if not isinstance(backend, MediaPipeDetectorBackend):
+            return
+        with self.lock:
+            self.detectors.setdefault(detectorKey(detector), []).append(detector)
+
+    def warmCamera(self, width=640, height=480, index=None):
+        """Open the camera in the background; released again if nobody takes it."""
+        with self.lock:
+            if self.camera is not None or (self.cameraThread and self.cameraThread.is_alive()):
+                return
+            self.cameraThread = threading.Thread(target=self._openCamera, args=(width, height, index),
+                                                 name="PrewarmCamera", daemon=True)
+        self.cameraThread.start()
+
+    def _openCamera(self, width, height, index):
+        from Sources import CameraSource
+        t0 = time.perf_counter()
+        try:
+            camera = CameraSource(index, width, height)
+            # the first read wakes the sensor up and is by far the slowest
+            camera.read()
+        except Exception as e:
+            print(f"[Prewarm] camera unavailable: {e}")
+            return
+        self.timings["camera_ms"] = 1000 * (time.perf_counter() - t0)
+        with self.lock:
+            self.camera = camera
+            self.cameraTimer = threading.Timer(self.cameraHoldTime, self.releaseCamera)
+            self.cameraTimer.daemon = True
+            self.cameraTimer.start()
+
+    def takeCamera(self, width=640, height=480, timeout=5.0):
+        """The warm camera if it matches, else None (the caller opens its own)."""
+        thread = self.cameraThread
+        if thread is not None:
+            thread.join(timeout)
+        with self.lock:
+            camera, self.camera = self.camera, None
+            if self.cameraTimer is not None:
+                self.cameraTimer.cancel()
+                self.cameraTimer = None
+        if camera is not None and (camera.width, camera.height) != (width, height):
+            camera.release()
+            camera = None
+        return camera
+
+    def releaseCamera(self):
+        with self.lock:
+            camera, self.camera = self.camera, None
+            if self.cameraTimer is not None:
+                self.cameraTimer.cancel()
+                self.cameraTimer = None
+        if camera is not None:
+            camera.release()
+
+
+prewarmer = Prewarmer()
+
+
+def logColdStart(mode, metrics, warm):
+    """Append this run's start-up timings to coldstart.jsonl and print them."""
+    entry = {"time": time.time(), "mode": mode, "warm": warm}
+    entry.update(prewarmer.timings)
+    entry.update({k: v for k, v in metrics.gauges.items() if k in ("setup_ms", "firstFrame_ms",
+                                                                    "firstMove_ms")})
+    print("[ColdStart] " + ", ".join(f"{k} {v:.0f}" if isinstance(v, float) else f"{k} {v}"
+                                     for k, v in entry.items() if k != "time"))
+    try:
+        with open(userDataPath("metrics", "coldstart.jsonl"), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"[ColdStart] could not write metrics: {e}")
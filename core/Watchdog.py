@@ -0,0 +1,157 @@
+"""
+Pipeline watchdog.
+
+runPipeline reports which stage it is in (capture, detect, act, display)
+and when a frame completes. A monitor thread flags a stage that has not
+finished within stallTimeout. It then:
+
+  * counts the stall in the metrics and reports it through onEvent (the
+    launcher shows it in its status label),
+  * force-releases the mouse button so a drag is never left held,
+  * restarts the stage: a stalled capture is reopened, a detector or
+    controller rebuilt, on the pipeline thread as soon as the stuck call
+    returns. The watchdog never touches the capture, detector or controller
+    itself: the pipeline thread may still be inside them.
+
+If the same stall outlasts abandonTimeout, the watchdog gives up on the
+pipeline: it releases the buttons and reports "abandoned" so the owner can
+start a fresh pipeline. The stuck thread exits, releasing the camera, when it
+wakes up.
+
+Frame age (capture time to end of act) is recorded for live sources, and
+frames older than frameAgeLimit are counted as stale.
+
+    python -m pytest tests/test_watchdog.py   # injected capture, detect and backend stalls
+"""
+import threading
+import time
+
+
+class PipelineWatchdog():
+    def __init__(self, stallTimeout=2.0, abandonTimeout=10.0, frameAgeLimit=0.5, checkInterval=0.1,
+                 onEvent=None):
+        self.stallTimeout = stallTimeout
+        self.abandonTimeout = abandonTimeout
+        self.frameAgeLimit = frameAgeLimit
+        self.checkInterval = checkInterval
+        self.onEvent = onEvent  # onEvent(kind, message); kind is "stall", "recovered", "stale" or "abandoned"
+        self.lock = threading.Lock()
+        self.stage = None
+        self.since = 0.0
+        self.flagged = False  # the current stage entry has been reported
+        self.recovering = False  # a stall happened since the last completed frame
+        self.pendingRestarts = set()
+        self.source = None
+        self.backend = None
+        self.metrics = None
+        self.stalls = 0
+        self.staleFrames = 0
+        self.abandoned = False
+        self.status = None
+        self.stopEvent = threading.Event()
+        self.thread = None
+
+    def attach(self, source, backend, metrics=None):
+        self.source = source
+        self.backend = backend
+        self.metrics = metrics
+
+    def start(self):
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self._run, name="Watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopEvent.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def enter(self, stage):
+        """The pipeline thread is now in `stage` (repeated calls keep the original start time)."""
+        with self.lock:
+            if stage != self.stage:
+                self.stage = stage
+                self.since = time.perf_counter()
+                self.flagged = False
+
+    def frameDone(self, frameTime):
+        now = time.perf_counter()
+        with self.lock:
+            recovered = self.recovering
+            self.stage = None
+            self.flagged = False
+            self.recovering = False
+        if recovered:
+            self._event("recovered", "✅ Pipeline recovered")
+        if getattr(self.source, "live", False):
+            age = now - frameTime
+            if self.metrics is not None:
+                self.metrics.record("frameAge", age)
+            if age > self.frameAgeLimit:
+                self.staleFrames += 1
+                if self.metrics is not None:
+                    self.metrics.count("staleFrames")
+                if self.staleFrames == 1 or self.staleFrames % 100 == 0:
+                    self._event("stale", f"⚠ Frames are {1000 * age:.0f} ms old")
+
+    def takeRestarts(self):
+        """Stages the pipeline should rebuild now that control is back on its thread."""
+        with self.lock:
+            stages, self.pendingRestarts = self.pendingRestarts, set()
+        return stages
+
+    def _run(self):
+        while not self.stopEvent.wait(self.checkInterval):
+            self.check()
+
+    def check(self, now=None):
+        if now is None:
+            now = time.perf_counter()
+        with self.lock:
+            stage, since, flagged = self.stage, self.since, self.flagged
+            if stage is None:
+                return
+            stalled = not flagged and now - since > self.stallTimeout
+            if stalled:
+                self.flagged = True
+                self.recovering = True
+                if stage != "capture":
+                    self.pendingRestarts.add(stage)
+        elapsed = now - since
+        if stalled:
+            self.stalls += 1
+            if self.metrics is not None:
+                self.metrics.count("stalls")
+                self.metrics.count(f"stall.{stage}")
+            self.releaseButtons()
+            if stage == "capture" and hasattr(self.source, "requestRestart"):
+                self.source.requestRestart()
+            self._event("stall", f"⚠ {stage} stalled for {elapsed:.1f} s, restarting it")
+        if elapsed > self.abandonTimeout and not self.abandoned:
+            self.abandon(f"{stage} stuck for {elapsed:.0f} s")
+
+    def releaseButtons(self):
+        if self.backend is None:
+            return
+        try:
+            self.backend.mouseUp('left')
+        except Exception as e:
+            print(f"[Watchdog] could not release mouse button: {e}")
+
+    def abandon(self, reason):
+        """Give up on the pipeline thread: free the buttons it may be holding. The
+        thread releases its source itself when it wakes and sees abandoned."""
+        self.abandoned = True
+        self.releaseButtons()
+        if self.metrics is not None:
+            self.metrics.count("abandoned")
+        self._event("abandoned", f"❌ Pipeline abandoned: {reason}")
+
+    def _event(self, kind, message):
+        self.status = message
+        print(f"[Watchdog] {message}")
+        if self.onEvent is not None:
+            try:
+                self.onEvent(kind, message)
+            except Exception as e:
+                print(f"[Watchdog] event handler failed: {e}")
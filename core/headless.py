@@ -0,0 +1,139 @@
+"""
+Command-line runner for any mode, with no launcher and (by default) no window.
+
+Examples:
+    python core/headless.py --mode gesture --source 0 --backend real --show
+    python core/headless.py --mode gaming --source session.mp4 --backend fake --benchmark bench.json
+    python core/headless.py --mode gesture --source session.npz --max-frames 500 --events events.json
+    python core/headless.py --mode normal --source 0 --backend fake --record session.npz
+    python core/headless.py --mode gesture --source session.mp4 --max-frames 600 --allocations
+    python core/headless.py --mode gesture --source 0 --publish 192.168.1.20:5005
+    python core/headless.py --mode gesture --source udp://0.0.0.0:5005 --backend real
+    python core/headless.py --mode gesture --source 0 --backend real --show --flight
+    python core/headless.py --mode gesture --source 0 --backend real --hand-state
+
+--source takes a camera index, a video file, a .npz landmark recording, a
+udp://host:port landmark stream (see LandmarkStream.py) or several cameras
+or videos joined with "+" (see MultiCamera.py).
+Files replay as fast as possible unless --realtime is given.
+"""
+import argparse
+import sys
+
+from GestureModes import CONTROLLERS
+
+
+def parseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="Run a gesture mouse mode from the command line.")
+    parser.add_argument("--mode", choices=sorted(CONTROLLERS), default="gesture")
+    parser.add_argument("--source", default=None,
+                        help="camera index, video file or .npz recording (default: camera 1, then 0)")
+    parser.add_argument("--backend", choices=["real", "fake"], default="fake",
+                        help="'real' injects input into the OS, 'fake' only records it")
+    parser.add_argument("--show", action="store_true", help="open the annotated OpenCV window")
+    parser.add_argument("--realtime", action="store_true", help="pace file sources at their recorded rate")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--cursor-rate", type=int, default=None,
+                        help="cursor output rate in Hz; 0 moves once per frame (default: 0 for files, "
+                             "mode setting for cameras)")
+    parser.add_argument("--benchmark", metavar="JSON", help="write per-stage timing summary here")
+    parser.add_argument("--events", metavar="JSON", help="write the fake backend's event log here")
+    parser.add_argument("--record", metavar="NPZ", help="save detected landmarks as a replayable recording")
+    parser.add_argument("--publish", metavar="HOST:PORT",
+                        help="stream detected landmarks to a udp:// source on another machine")
+    parser.add_argument("--calibrated", action="store_true",
+                        help="apply the saved per-user calibration (see Calibration.py)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="JSON",
+                        help="apply a profile file and reload it when it changes (default file: "
+                             "profiles/<mode>.json in the user data dir; see Profiles.py)")
+    parser.add_argument("--flight", action="store_true",
+                        help="keep the last seconds in a flight recorder and dump them on latency spikes "
+                             "or close/minimize hotkeys (see FlightRecorder.py)")
+    parser.add_argument("--hand-state", nargs="?", const="", metavar="PATH",
+                        help="publish landmarks, finger states and the gesture to shared memory for "
+                             "other local apps (default file: see HandState.py)")
+    parser.add_argument("--allocations", action="store_true",
+                        help="trace per-frame allocations with tracemalloc after a warm-up (slower)")
+    args = parser.parse_args(argv)
+    if args.record and args.publish:
+        parser.error("--record and --publish cannot be combined")
+    return args
+
+
+def main(argv=None):
+    args = parseArgs(argv)
+
+    from Backends import openBackend
+    from Metrics import AllocationTracker, PipelineMetrics
+    from Pipeline import PipelineHooks, runMode
+    from Profiles import ProfileError, ProfileWatcher, loadModeSettings, profilePath
+    from Sources import RecordingWriter, openSource
+
+    profileFile = None if args.profile is None else (args.profile or profilePath(args.mode))
+    try:
+        settings = loadModeSettings(args.mode, profileFile, calibrated=args.calibrated)
+    except ProfileError as e:
+        print(f"[Headless] {e}", file=sys.stderr)
+        return 2
+    source = openSource(args.source, settings["wCam"], settings["hCam"], realtime=args.realtime,
+                        settings=settings)
+    overrides = {}
+    if args.cursor_rate is not None:
+        overrides["cursorRate"] = args.cursor_rate
+    elif not source.live and not args.realtime:
+        # accelerated replays run on a synthetic clock; the output thread would not keep up
+        overrides["cursorRate"] = 0
+
+    backend = openBackend(args.backend)
+    recorder = None
+    if args.record:
+        recorder = RecordingWriter(args.record, maxHands=settings["maxHands"])
+    elif args.publish:
+        from LandmarkStream import LandmarkPublisher
+        recorder = LandmarkPublisher(args.publish, maxHands=settings["maxHands"])
+
+    metrics = None
+    if args.allocations:
+        # a short latency window fills up during warm-up, so it does not show as growth
+        metrics = PipelineMetrics(window=100)
+        metrics.allocations = AllocationTracker(warmup=150)
+
+    profile = None
+    if profileFile is not None:
+        profile = ProfileWatcher(args.mode, profileFile, calibrated=args.calibrated, overrides=overrides)
+    else:
+        overrides = dict(settings, **overrides)
+    flight = None
+    if args.flight:
+        from FlightRecorder import FlightRecorder, unexpectedActions
+        flight = FlightRecorder(args.mode, maxHands=settings["maxHands"],
+                                watchActions=unexpectedActions(settings))
+    handState = None
+    if args.hand_state is not None:
+        from HandState import HandStatePublisher
+        handState = HandStatePublisher(args.hand_state or None, maxHands=settings["maxHands"])
+        print(f"[Headless] publishing hand state to {handState.path}")
+    metrics = runMode(args.mode, source=source, backend=backend, settings=overrides,
+                      maxFrames=args.max_frames, show=args.show, metrics=metrics,
+                      hooks=PipelineHooks(recorder=recorder, profile=profile, flight=flight,
+                                          handState=handState))
+    if flight is not None:
+        flight.wait()
+
+    metrics.report()
+    if args.benchmark:
+        metrics.save(args.benchmark)
+    if args.events:
+        if hasattr(backend, "save"):
+            backend.save(args.events)
+        else:
+            print("--events needs --backend fake", file=sys.stderr)
+    if hasattr(source, "stats"):
+        print(f"[Headless] stream: {source.stats()}")
+    if hasattr(backend, "counts"):
+        print(f"[Headless] actions: {backend.counts()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
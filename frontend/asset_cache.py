@@ -0,0 +1,117 @@
+"""
+Process-wide cache for launcher assets.
+
+The instruction windows all show the same animated GIF. GifFrames decodes
+and resizes it once on a background thread; the Tk PhotoImages are created
+once on the Tk thread the first time a window needs them and then shared by
+every window. GifAnimator is the single after() loop that advances all
+visible GIF labels and stops itself when the last one is destroyed.
+"""
+import os
+import sys
+import threading
+from PIL import Image, ImageTk, ImageSequence
+
+
+def asset_path(name):
+    """Path of a file in assets/, both from source and in the PyInstaller bundle"""
+    if getattr(sys, 'frozen', False):
+        return os.path.join(sys._MEIPASS, "assets", name)
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets", name))
+
+
+class GifFrames:
+    """Decoded, resized frames of one GIF, loaded once per process"""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.images = None  # PIL frames, filled by the loader thread
+        self.photos = None  # ImageTk frames, created on the Tk thread
+        self.error = None
+        self.loaded = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def preload(self):
+        """Start decoding in the background (safe to call repeatedly)"""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._load, name="GifLoader", daemon=True)
+        self.thread.start()
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(self.path)
+            with Image.open(self.path) as gif:
+                self.images = [frame.convert("RGBA").resize(self.size)
+                               for frame in ImageSequence.Iterator(gif)]
+        except Exception as e:
+            self.error = e
+            print(f"Error loading GIF: {e}")
+        finally:
+            self.loaded.set()
+
+    def get_photos(self):
+        """Shared PhotoImages, or None while decoding. Call from the Tk thread only."""
+        if self.photos is None:
+            self.preload()
+            if not self.loaded.is_set() or not self.images:
+                return None
+            self.photos = [ImageTk.PhotoImage(image) for image in self.images]
+        return self.photos
+
+
+class GifAnimator:
+    """One after() loop that animates every attached label"""
+
+    def __init__(self, root, interval=100):
+        self.root = root
+        self.interval = interval
+        self.labels = {}  # label -> [frames, index]
+        self.job = None
+
+    def attach(self, label, frames):
+        self.labels[label] = [frames, 0]
+        label.bind("<Destroy>", lambda e, l=label: self.detach(l), add="+")
+        if self.job is None:
+            self._tick()
+
+    def detach(self, label):
+        self.labels.pop(label, None)
+        if not self.labels and self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
+    def _tick(self):
+        self.job = None
+        for label, state in list(self.labels.items()):
+            frames, index = state
+            photos = frames.get_photos()
+            if photos is None:
+                if frames.loaded.is_set():
+                    # decoding failed; nothing to animate
+                    self.labels.pop(label, None)
+                continue
+            try:
+                label.config(image=photos[index])
+            except Exception:
+                self.labels.pop(label, None)
+                continue
+            state[1] = (index + 1) % len(photos)
+        if self.labels:
+            self.job = self.root.after(self.interval, self._tick)
+
+
+INSTRUCTION_GIF = GifFrames(asset_path("test.gif"), (200, 150))
+
+_animator = None
+
+
+def get_animator(root):
+    global _animator
+    if _animator is None:
+        _animator = GifAnimator(root)
+    return _animator
@@ -3,7 +3,10 @@ import os
 import subprocess
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk, ImageSequence
+from PIL import Image, ImageTk
+
+from asset_cache import INSTRUCTION_GIF, get_animator
+from mode_workers import WarmWorker
 
 # Import mode runner for threading-based execution
 try:
@@ -15,10 +18,36 @@ except ImportError as e:
     print(f"[Launcher] Warning: mode_runners not found ({e}), using subprocess mode")
 
 
-class InstructionWindowNormal(tk.Toplevel):
+# launcher scripts and the mode a warm worker runs for each
+SCRIPT_MODES = {
+    "AI_virtual_Mouse.py": "gesture",
+    "normal_mode.py": "normal",
+    "PresentationMode.py": "presentation",
+    "gamingMode.py": "gaming",
+}
+
+
+class InstructionWindow(tk.Toplevel):
+    """Shared parts of the per-mode instruction windows"""
+
     def __init__(self, launcher):
         super().__init__()
         self.launcher = launcher
+        # Start opening the camera while the user reads the instructions
+        launcher.prewarm_camera()
+
+    def create_gif_label(self):
+        # Frames come from the process-wide cache; until the background decode
+        # finishes the label holds an empty placeholder of the same size.
+        self.gif_placeholder = tk.PhotoImage(width=200, height=150)
+        self.gif_label = tk.Label(self, bg="#1e1e2f", image=self.gif_placeholder)
+        self.gif_label.pack(pady=10)
+        get_animator(self.launcher).attach(self.gif_label, INSTRUCTION_GIF)
+
+
+class InstructionWindowNormal(InstructionWindow):
+    def __init__(self, launcher):
+        super().__init__(launcher)
         self.title("Normal Mouse Instructions")
         self.geometry("450x650")
         self.configure(bg="#1e1e2f")
@@ -59,43 +88,15 @@ class InstructionWindowNormal(tk.Toplevel):
                        relief=tk.FLAT, padx=20, pady=10, cursor="hand2")
         btn.pack(pady=10)
         
-    def create_gif_label(self):
-        # Detect if running as PyInstaller bundle
-        if getattr(sys, 'frozen', False):
-            bundle_dir = sys._MEIPASS
-            gif_path = os.path.join(bundle_dir, "assets", "test.gif")
-        else:
-            gif_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets", "test.gif"))
-        
-        if os.path.exists(gif_path):
-            try:
-                self.gif_image = Image.open(gif_path)
-                self.gif_frames = [ImageTk.PhotoImage(frame.copy().resize((200, 150))) 
-                                  for frame in ImageSequence.Iterator(self.gif_image)]
-                
-                self.gif_label = tk.Label(self, bg="#1e1e2f")
-                self.gif_label.pack(pady=10)
-                self.current_frame = 0
-                self.animate_gif()
-            except Exception as e:
-                print(f"Error loading GIF: {e}")
-    
-    def animate_gif(self):
-        if hasattr(self, 'gif_frames') and self.gif_frames:
-            self.gif_label.config(image=self.gif_frames[self.current_frame])
-            self.current_frame = (self.current_frame + 1) % len(self.gif_frames)
-            self.after(100, self.animate_gif)
-    
     def start_normal_mode(self):
         self.launcher.stop_process()
         self.launcher.launch_mode("normal_mode.py", "Normal Mode")
         self.destroy()
 
 
-class InstructionWindowGesture(tk.Toplevel):
+class InstructionWindowGesture(InstructionWindow):
     def __init__(self, launcher):
-        super().__init__()
-        self.launcher = launcher
+        super().__init__(launcher)
         self.title("Gesture Mouse Instructions")
         self.geometry("450x650")
         self.configure(bg="#1e1e2f")
@@ -132,43 +133,15 @@ class InstructionWindowGesture(tk.Toplevel):
                        relief=tk.FLAT, padx=20, pady=10, cursor="hand2")
         btn.pack(pady=10)
     
-    def create_gif_label(self):
-        # Detect if running as PyInstaller bundle
-        if getattr(sys, 'frozen', False):
-            bundle_dir = sys._MEIPASS
-            gif_path = os.path.join(bundle_dir, "assets", "test.gif")
-        else:
-            gif_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets", "test.gif"))
-        
-        if os.path.exists(gif_path):
-            try:
-                self.gif_image = Image.open(gif_path)
-                self.gif_frames = [ImageTk.PhotoImage(frame.copy().resize((200, 150))) 
-                                  for frame in ImageSequence.Iterator(self.gif_image)]
-                
-                self.gif_label = tk.Label(self, bg="#1e1e2f")
-                self.gif_label.pack(pady=10)
-                self.current_frame = 0
-                self.animate_gif()
-            except Exception as e:
-                print(f"Error loading GIF: {e}")
-    
-    def animate_gif(self):
-        if hasattr(self, 'gif_frames') and self.gif_frames:
-            self.gif_label.config(image=self.gif_frames[self.current_frame])
-            self.current_frame = (self.current_frame + 1) % len(self.gif_frames)
-            self.after(100, self.animate_gif)
-        
     def start_gesture_mode(self):
         self.launcher.stop_process()
         self.launcher.launch_mode("AI_virtual_Mouse.py", "Gesture Mode")
         self.destroy()
 
 
-class InstructionWindowPresentation(tk.Toplevel):
+class InstructionWindowPresentation(InstructionWindow):
     def __init__(self, launcher):
-        super().__init__()
-        self.launcher = launcher
+        super().__init__(launcher)
         self.title("Presentation Instructions")
         self.geometry("450x650")
         self.configure(bg="#1e1e2f")
@@ -205,43 +178,15 @@ class InstructionWindowPresentation(tk.Toplevel):
                        relief=tk.FLAT, padx=20, pady=10, cursor="hand2")
         btn.pack(pady=10)
     
-    def create_gif_label(self):
-        # Detect if running as PyInstaller bundle
-        if getattr(sys, 'frozen', False):
-            bundle_dir = sys._MEIPASS
-            gif_path = os.path.join(bundle_dir, "assets", "test.gif")
-        else:
-            gif_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets", "test.gif"))
-        
-        if os.path.exists(gif_path):
-            try:
-                self.gif_image = Image.open(gif_path)
-                self.gif_frames = [ImageTk.PhotoImage(frame.copy().resize((200, 150))) 
-                                  for frame in ImageSequence.Iterator(self.gif_image)]
-                
-                self.gif_label = tk.Label(self, bg="#1e1e2f")
-                self.gif_label.pack(pady=10)
-                self.current_frame = 0
-                self.animate_gif()
-            except Exception as e:
-                print(f"Error loading GIF: {e}")
-    
-    def animate_gif(self):
-        if hasattr(self, 'gif_frames') and self.gif_frames:
-            self.gif_label.config(image=self.gif_frames[self.current_frame])
-            self.current_frame = (self.current_frame + 1) % len(self.gif_frames)
-            self.after(100, self.animate_gif)
-        
     def start_presentation_mode(self):
         self.launcher.stop_process()
         self.launcher.launch_mode("PresentationMode.py", "Presentation Mode")
         self.destroy()
 
 
-class InstructionWindowGaming(tk.Toplevel):
+class InstructionWindowGaming(InstructionWindow):
     def __init__(self, launcher):
-        super().__init__()
-        self.launcher = launcher
+        super().__init__(launcher)
         self.title("Gaming Instructions")
         self.geometry("450x650")
         self.configure(bg="#1e1e2f")
@@ -266,7 +211,8 @@ class InstructionWindowGaming(tk.Toplevel):
             "👉 Optimized for gaming:\n"
             "• High-speed sensitivity\n"
             "• Rapid response gestures\n"
-            "• Enhanced precision\n\n"
+            "• Enhanced precision\n"
+            "• Air tap: flick the pointing finger down to click\n\n"
             "🖱 Use STOP button to terminate the mode.\n"
             "⚙ Ensure stable lighting for best tracking.")
         text.config(state=tk.DISABLED)
@@ -278,33 +224,6 @@ class InstructionWindowGaming(tk.Toplevel):
                        relief=tk.FLAT, padx=20, pady=10, cursor="hand2")
         btn.pack(pady=10)
     
-    def create_gif_label(self):
-        # Detect if running as PyInstaller bundle
-        if getattr(sys, 'frozen', False):
-            bundle_dir = sys._MEIPASS
-            gif_path = os.path.join(bundle_dir, "assets", "test.gif")
-        else:
-            gif_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "assets", "test.gif"))
-        
-        if os.path.exists(gif_path):
-            try:
-                self.gif_image = Image.open(gif_path)
-                self.gif_frames = [ImageTk.PhotoImage(frame.copy().resize((200, 150))) 
-                                  for frame in ImageSequence.Iterator(self.gif_image)]
-                
-                self.gif_label = tk.Label(self, bg="#1e1e2f")
-                self.gif_label.pack(pady=10)
-                self.current_frame = 0
-                self.animate_gif()
-            except Exception as e:
-                print(f"Error loading GIF: {e}")
-    
-    def animate_gif(self):
-        if hasattr(self, 'gif_frames') and self.gif_frames:
-            self.gif_label.config(image=self.gif_frames[self.current_frame])
-            self.current_frame = (self.current_frame + 1) % len(self.gif_frames)
-            self.after(100, self.animate_gif)
-        
     def start_gaming_mode(self):
         self.launcher.stop_process()
         self.launcher.launch_mode("gamingMode.py", "Gaming Mode")
@@ -315,12 +234,19 @@ class MouseLauncher(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Gesture Mouse Launcher")
-        self.geometry("420x500")
+        self.geometry("420x680")
         self.configure(bg="#1e1e2f")
         self.resizable(False, False)
         
-        self.process = None
+        self.process = None  # subprocess-mode worker (WarmWorker) or plain script process
+        self.spare = None  # warm worker waiting for the next subprocess-mode launch
+        self.worker_job = None
         self.instruction_window = None
+        self.preview_visible = False
+        self.preview_photo = None
+        self.preview_job = None
+        self.status_job = None
+        self.shown_status = None
         
         # Use threading-based mode runner if available (for EXE)
         if USE_THREADING:
@@ -330,6 +256,15 @@ class MouseLauncher(tk.Tk):
         
         self.create_widgets()
         
+        # Decode the instruction GIF before the first window asks for it
+        INSTRUCTION_GIF.preload()
+        
+        # Warm imports and the hand detector once the window is up
+        if self.mode_runner:
+            self.after(200, self.mode_runner.prewarm)
+        else:
+            self.after(200, self.spawn_spare)
+        
     def create_widgets(self):
         # Title
         title = tk.Label(self, text="🖱️ Gesture Mouse Controller", 
@@ -357,7 +292,10 @@ class MouseLauncher(tk.Tk):
             ("🧭 Normal Mode", self.run_normal_mode),
             ("🖼 Presentation Mode", self.run_presentation_mode),
             ("🎮 Gaming Mode", self.run_gaming_mode),
+            ("🎯 Calibrate", self.run_calibration),
             ("⏹ Stop Running Mode", self.stop_process),
+            ("💾 Save Last Seconds", self.save_flight),
+            ("📷 Camera Preview", self.toggle_preview),
             ("📘 View Instructions", self.show_instructions),
         ]
         
@@ -371,6 +309,45 @@ class MouseLauncher(tk.Tk):
             # Hover effects
             btn.bind("<Enter>", lambda e, b=btn: b.config(bg="#1e65c2"))
             btn.bind("<Leave>", lambda e, b=btn: b.config(bg="#2d89ef"))
+        
+        # Preview panel (packed only while visible)
+        self.preview_label = tk.Label(self, text="Start a mode to see the camera.",
+                                      font=("Segoe UI", 10), padx=40, pady=100,
+                                      bg="#2c2c40", fg="#e0e0e0")
+    
+    def toggle_preview(self):
+        if not self.mode_runner:
+            self.label.config(text="⚠ Preview needs threaded modes.")
+            return
+        channel = self.mode_runner.preview_channel()
+        self.preview_visible = not self.preview_visible
+        channel.setVisible(self.preview_visible)
+        if self.preview_visible:
+            self.geometry("420x950")
+            self.preview_label.pack(pady=(0, 15))
+            self.update_preview()
+        else:
+            if self.preview_job is not None:
+                self.after_cancel(self.preview_job)
+                self.preview_job = None
+            self.preview_label.pack_forget()
+            self.geometry("420x680")
+    
+    def update_preview(self):
+        """Show the newest preview frame; polls only while the panel is visible"""
+        self.preview_job = None
+        if not self.preview_visible:
+            return
+        frame = self.mode_runner.preview_channel().latest()
+        if frame is not None:
+            h, w = frame.shape[:2]
+            image = Image.frombuffer("RGB", (w, h), frame.tobytes(), "raw", "BGR", 0, 1)
+            if self.preview_photo is None or (self.preview_photo.width(), self.preview_photo.height()) != (w, h):
+                self.preview_photo = ImageTk.PhotoImage(image)
+                self.preview_label.config(image=self.preview_photo, width=w, height=h, padx=0, pady=0)
+            else:
+                self.preview_photo.paste(image)
+        self.preview_job = self.after(100, self.update_preview)
     
     def launch_mode(self, script_name, mode_name):
         # Use threading-based execution if available (for bundled EXE)
@@ -392,6 +369,9 @@ class MouseLauncher(tk.Tk):
             if success:
                 print(f"[Launcher] {mode_name} started successfully")
                 self.label.config(text=f"✅ {mode_name} is running!")
+                self.shown_status = None
+                if self.status_job is None:
+                    self.status_job = self.after(500, self.poll_mode_status)
             else:
                 print(f"[Launcher] Failed to start {mode_name}")
                 self.label.config(text="⚙️ Another mode is already running!")
@@ -399,68 +379,24 @@ class MouseLauncher(tk.Tk):
         
         # Fallback to subprocess mode (for development)
         if self.process is None:
-            # Detect if running as PyInstaller bundle
-            if getattr(sys, 'frozen', False):
-                # Running as compiled executable
-                bundle_dir = sys._MEIPASS
-                base_dir = bundle_dir
-                python_exec = sys.executable
-                
-                # Script is bundled in the core directory
-                script_path = os.path.join(bundle_dir, "core", script_name)
-                
-                if not os.path.exists(script_path):
-                    self.label.config(text=f"❌ {script_name} not found in bundle!")
-                    print(f"Expected at: {script_path}")
-                    return
-                
-                # Set PYTHONPATH to include core directory for imports
-                env = os.environ.copy()
-                env['PYTHONPATH'] = os.path.join(bundle_dir, 'core')
-                
-            else:
-                # Running from source
-                base_dir = os.path.dirname(os.path.abspath(__file__))
-                
-                # Try to find Python executable (check multiple common locations)
-                python_paths = [
-                    sys.executable,  # Current Python interpreter
-                    os.path.join(base_dir, "venv", "Scripts", "python.exe"),
-                    os.path.join(base_dir, "..", "venv", "Scripts", "python.exe"),
-                    "python",  # System Python
-                ]
-                
-                python_exec = None
-                for path in python_paths:
-                    if path == "python" or os.path.exists(path):
-                        python_exec = path
-                        break
-                
-                if python_exec is None:
-                    self.label.config(text="❌ Python executable not found!")
+            # Hand the mode to the pre-spawned, already imported worker
+            spare, self.spare = self.spare, None
+            if spare is not None and spare.alive and script_name in SCRIPT_MODES:
+                if spare.run(SCRIPT_MODES[script_name]):
+                    self.process = spare
+                    self.label.config(text=f"✅ {mode_name} is running!")
+                    self.shown_status = None
+                    print(f"[Launcher] {mode_name} handed to warm worker pid {spare.process.pid}")
+                    if self.worker_job is None:
+                        self.worker_job = self.after(500, self.poll_worker)
                     return
-                
-                # Try to find the script in multiple locations
-                script_paths = [
-                    os.path.join(base_dir, script_name),
-                    os.path.join(base_dir, "..", script_name),
-                    os.path.join(base_dir, "core", script_name),
-                    os.path.join(base_dir, "..", "core", script_name),
-                ]
-                
-                script_path = None
-                for path in script_paths:
-                    if os.path.exists(path):
-                        script_path = path
-                        break
-                
-                if script_path is None:
-                    self.label.config(text=f"❌ {script_name} not found!")
-                    print(f"Searched in: {script_paths}")
-                    return
-                
-                env = os.environ.copy()
-            
+            if spare is not None:
+                spare.stop(timeout=1)
+
+            found = self.find_core_script(script_name)
+            if found is None:
+                return
+            python_exec, script_path, env = found
             try:
                 # Launch the script
                 self.process = subprocess.Popen([python_exec, script_path], env=env)
@@ -472,6 +408,138 @@ class MouseLauncher(tk.Tk):
         else:
             self.label.config(text="⚙️ Another mode is already running!")
     
+    def find_core_script(self, script_name):
+        """(python executable, path of core/<script_name>, env) for a subprocess, or None"""
+        # Detect if running as PyInstaller bundle
+        if getattr(sys, 'frozen', False):
+            # Running as compiled executable
+            bundle_dir = sys._MEIPASS
+            base_dir = bundle_dir
+            python_exec = sys.executable
+            
+            # Script is bundled in the core directory
+            script_path = os.path.join(bundle_dir, "core", script_name)
+            
+            if not os.path.exists(script_path):
+                self.label.config(text=f"❌ {script_name} not found in bundle!")
+                print(f"Expected at: {script_path}")
+                return None
+            
+            # Set PYTHONPATH to include core directory for imports
+            env = os.environ.copy()
+            env['PYTHONPATH'] = os.path.join(bundle_dir, 'core')
+            
+        else:
+            # Running from source
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+            
+            # Try to find Python executable (check multiple common locations)
+            python_paths = [
+                sys.executable,  # Current Python interpreter
+                os.path.join(base_dir, "venv", "Scripts", "python.exe"),
+                os.path.join(base_dir, "..", "venv", "Scripts", "python.exe"),
+                "python",  # System Python
+            ]
+            
+            python_exec = None
+            for path in python_paths:
+                if path == "python" or os.path.exists(path):
+                    python_exec = path
+                    break
+            
+            if python_exec is None:
+                self.label.config(text="❌ Python executable not found!")
+                return None
+            
+            # Try to find the script in multiple locations
+            script_paths = [
+                os.path.join(base_dir, script_name),
+                os.path.join(base_dir, "..", script_name),
+                os.path.join(base_dir, "core", script_name),
+                os.path.join(base_dir, "..", "core", script_name),
+            ]
+            
+            script_path = None
+            for path in script_paths:
+                if os.path.exists(path):
+                    script_path = path
+                    break
+            
+            if script_path is None:
+                self.label.config(text=f"❌ {script_name} not found!")
+                print(f"Searched in: {script_paths}")
+                return None
+            
+            env = os.environ.copy()
+        return python_exec, script_path, env
+
+    def spawn_spare(self):
+        """Keep one warm worker waiting for the next subprocess-mode launch"""
+        if self.mode_runner or (self.spare is not None and self.spare.alive):
+            return
+        found = self.find_core_script("ModeWorker.py")
+        if found is None:
+            return
+        python_exec, script_path, env = found
+        try:
+            self.spare = WarmWorker(python_exec, script_path, env)
+        except Exception as e:
+            self.spare = None
+            print(f"[Launcher] could not spawn a warm worker: {e}")
+
+    def prewarm_camera(self):
+        """Start opening the camera while an instruction window is shown"""
+        if self.mode_runner:
+            self.mode_runner.prewarm_camera()
+        elif self.spare is not None and self.process is None:
+            self.spare.warm_camera()
+
+    def poll_worker(self):
+        """Show the worker's watchdog messages; after a mode ends by itself, get the next spare ready"""
+        self.worker_job = None
+        worker = self.process
+        if not isinstance(worker, WarmWorker):
+            return
+        if worker.alive:
+            message = worker.status_message
+            if message and message != self.shown_status:
+                self.shown_status = message
+                self.label.config(text=message)
+            self.worker_job = self.after(500, self.poll_worker)
+            return
+        self.process = None
+        self.label.config(text=f"⚠ {worker.error}" if worker.error else "🛑 Mode exited.")
+        self.spawn_spare()
+
+    def poll_mode_status(self):
+        """Show watchdog messages (stalls, recoveries) from the running mode"""
+        self.status_job = None
+        runner = self.mode_runner
+        message = runner.status_message
+        if message and message != self.shown_status:
+            self.shown_status = message
+            self.label.config(text=message)
+        if runner.thread and runner.thread.is_alive():
+            self.status_job = self.after(500, self.poll_mode_status)
+    
+    def run_calibration(self):
+        if not self.mode_runner:
+            self.label.config(text="⚠ Calibration needs threaded modes.")
+            return
+        if self.mode_runner.start(self.mode_runner.run_calibration):
+            self.label.config(text="🎯 Calibrating: follow the prompts.")
+            self.shown_status = None
+            if self.status_job is None:
+                self.status_job = self.after(500, self.poll_mode_status)
+        else:
+            self.label.config(text="⚙️ Stop the running mode first.")
+    
+    def save_flight(self):
+        if self.mode_runner and self.mode_runner.save_flight():
+            self.label.config(text="💾 Saving the last seconds to the flight folder.")
+        else:
+            self.label.config(text="⚠ No mode running.")
+    
     def run_gesture_mouse(self):
         self.instruction_window = InstructionWindowGesture(self)
     
@@ -484,7 +552,7 @@ class MouseLauncher(tk.Tk):
     def run_gaming_mode(self):
         self.instruction_window = InstructionWindowGaming(self)
     
-    def stop_process(self):
+    def stop_process(self, respawn=True):
         # Stop threading-based mode if using mode runner
         if USE_THREADING and self.mode_runner:
             self.mode_runner.stop()
@@ -494,8 +562,11 @@ class MouseLauncher(tk.Tk):
         # Stop subprocess-based mode
         if self.process:
             try:
-                self.process.terminate()
-                self.process.wait(timeout=5)  # Wait up to 5 seconds
+                if isinstance(self.process, WarmWorker):
+                    self.process.stop()  # graceful: the worker releases the camera and exits
+                else:
+                    self.process.terminate()
+                    self.process.wait(timeout=5)  # Wait up to 5 seconds
             except subprocess.TimeoutExpired:
                 self.process.kill()  # Force kill if it doesn't terminate
             except Exception as e:
@@ -505,6 +576,8 @@ class MouseLauncher(tk.Tk):
                 self.label.config(text="🛑 Process stopped.")
         else:
             self.label.config(text="⚠ No process running.")
+        if respawn:
+            self.spawn_spare()
     
     def show_instructions(self):
         info = tk.Toplevel(self)
@@ -534,7 +607,10 @@ class MouseLauncher(tk.Tk):
     
     def on_closing(self):
         """Handle window close event"""
-        self.stop_process()
+        self.stop_process(respawn=False)
+        if self.spare is not None:
+            self.spare.stop(timeout=1)
+            self.spare = None
         self.destroy()
 
 
@@ -1,8 +1,9 @@
 """
 Mode runners for the gesture mouse controller.
-These functions wrap the core mode scripts to run them in threads instead of subprocesses.
+These functions run the core mode pipeline in threads instead of subprocesses.
 """
 import threading
+import time
 import sys
 import os
 
@@ -24,21 +25,42 @@ class ModeRunner:
     def __init__(self):
         self.thread = None
         self.stop_flag = threading.Event()
+        self.requested_at = None
+        self.preview = None
+        self.watchdog = None
+        self.flight = None
+        self.status_message = None  # latest watchdog message, shown by the launcher
+        self.restarts = 0
+        self.max_restarts = 3
         print("[ModeRunner] Initialized")
+
+    def preview_channel(self):
+        """Channel the running mode publishes preview frames to (created on first use)"""
+        if self.preview is None:
+            from Preview import PreviewChannel
+            self.preview = PreviewChannel()
+        return self.preview
+
+    def prewarm(self):
+        """Start importing and building detectors in the background"""
+        from Warmup import prewarmer
+        prewarmer.start()
+
+    def prewarm_camera(self):
+        """Open the camera in the background ahead of a likely start"""
+        from Warmup import prewarmer
+        prewarmer.start()
+        prewarmer.warmCamera()
     
-    def run_gesture_mode(self):
-        """Run AI virtual mouse mode"""
-        print("[ModeRunner] Starting gesture mode...")
+    def run_mode(self, mode):
+        """Run a mode (see core/GestureModes.py) until stop() or the exit gesture"""
+        print(f"[ModeRunner] Starting {mode} mode...")
         self.stop_flag.clear()
-        
+
         try:
-            import cv2
-            import numpy as np
-            import HandTrackingModule as htm
-            import time
-            import autopy
-            import pyautogui
-            import mouse
+            from Pipeline import PipelineHooks, runMode
+            from Profiles import ProfileError
+            from Warmup import prewarmer, logColdStart
             print("[ModeRunner] All imports successful")
         except Exception as e:
             print(f"[ModeRunner] Import error: {e}")
@@ -46,254 +68,117 @@ class ModeRunner:
             traceback.print_exc()
             return
 
-        wCam, hCam = 640, 480
-        frameR = 100
-        smoothening = 9
-        pTime = 0
-        plocX, plocY = 0, 0
-        clocX, clocY = 0, 0
-
-        cap = cv2.VideoCapture(1)
-        if not cap.isOpened():
-            cap.release()
-            cap = cv2.VideoCapture(0)
-            if not cap.isOpened():
-                print("Unable to open camera")
-                return
-
-        cap.set(3, wCam)
-        cap.set(4, hCam)
-        detector = htm.handDetector(maxHands=1)
-        wScr, hScr = autopy.screen.size()
-
-        while not self.stop_flag.is_set():
-            success, img = cap.read()
-            if not success or img is None:
-                time.sleep(0.1)
-                continue
-
-            img = detector.findHands(img)
-            lmList, bbox = detector.findPosition(img)
-
-            if len(lmList) != 0:
-                x1, y1 = lmList[8][1:]
-                x2, y2 = lmList[12][1:]
-
-                fingers = detector.fingersUp()
-                cv2.rectangle(img, (frameR, frameR), (wCam - frameR, hCam - frameR), (255, 0, 255), 2)
-
-                # Moving mode
-                if fingers[1] == 1 and fingers[2] == 0:
-                    x3 = np.interp(x1, (frameR, wCam - frameR), (0, wScr))
-                    y3 = np.interp(y1, (frameR, hCam - frameR), (0, hScr))
-                    clocX = plocX + (x3 - plocX) / smoothening
-                    clocY = plocY + (y3 - plocY) / smoothening
-                    autopy.mouse.move(wScr - clocX, clocY)
-                    cv2.circle(img, (x1, y1), 15, (255, 0, 255), cv2.FILLED)
-                    plocX, plocY = clocX, clocY
-
-                # Clicking mode
-                if fingers[1] == 1 and fingers[2] == 1:
-                    length, img, lineInfo = detector.findDistance(8, 12, img)
-                    if length < 20:
-                        cv2.circle(img, (lineInfo[4], lineInfo[5]), 15, (0, 255, 0), cv2.FILLED)
-                        mouse.click('left')
-                        time.sleep(0.25)
-
-                # Dragging mode
-                if fingers == [0, 0, 0, 0, 0]:
-                    pyautogui.mouseDown(button='left')
-                    time.sleep(0.5)
-                    cv2.putText(img, "Dragging...", (20, 100), cv2.FONT_HERSHEY_PLAIN, 2, (0, 0, 255), 2)
-                elif fingers == [1, 1, 1, 1, 1]:
-                    mouse.release('left')
-                    cv2.putText(img, "Released", (20, 100), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
-
-                # Scroll mode
-                if fingers[1] == 1 and fingers[2] == 1 and fingers[3] == 0 and fingers[4] == 0 and fingers[0] == 0:
-                    scrollSpeed = np.interp(y1, (frameR, hCam - frameR), (-15, 15))
-                    cv2.putText(img, "Scroll Mode", (20, 100), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
-                    pyautogui.scroll(-int(scrollSpeed))
-
-                # Exit gesture
-                if len(lmList) > 4:
-                    thumb_tip_y = lmList[4][2]
-                    thumb_base_y = lmList[3][2]
-                    if thumb_tip_y > thumb_base_y + 40:
-                        cv2.putText(img, "Thumbs Down - Exiting...", (20, 150), cv2.FONT_HERSHEY_PLAIN, 2, (0, 0, 255), 2)
-                        time.sleep(1)
-                        break
-
-                # Minimize
-                if fingers == [1, 0, 0, 0, 1]:
-                    pyautogui.hotkey('win', 'm')
-                    time.sleep(1.5)
-                    cv2.putText(img, "→ Minimize", (200, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
-                
-                # Close
-                if fingers == [1, 1, 0, 0, 1] or fingers == [1, 0, 0, 1, 1]:
-                    pyautogui.hotkey('ctrl', 'w')
-                    time.sleep(2)
-                    cv2.putText(img, "→ Close", (200, 100), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
-
-            cTime = time.time()
-            fps = 1 / (cTime - pTime) if pTime > 0 else 0
-            pTime = cTime
-            cv2.putText(img, str(int(fps)), (20, 50), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 0), 3)
-
-            # Camera window hidden - running in background
-            if cv2.waitKey(1) & 0xFF == 27:
-                break
-
-        print("[ModeRunner] Normal mode stopped, cleaning up...")
-        cap.release()
-        cv2.destroyAllWindows()
-    
-    def run_presentation_mode(self):
-        """Run presentation mode"""
-        self.stop_flag.clear()
-        
         try:
-            import cv2
-            import numpy as np
-            import HandTrackingModule as htm
-            import time
-            import autopy
-            import pyautogui
-            import mouse
-        except Exception as e:
-            print(f"Import error: {e}")
+            # the same profile, watchdog, flight recorder and hand state a warm worker gets
+            on_event = lambda kind, message: self._on_watchdog(mode, kind, message)
+            hooks = PipelineHooks.forLaunch(mode, preview=self.preview_channel(), onEvent=on_event)
+        except ProfileError as e:
+            print(f"[ModeRunner] {e}")
+            self.status_message = f"⚠ {mode} profile is invalid: {e}"
             return
-
-        wCam, hCam = 640, 480
-        frameR = 100
-        smoothening = 9
-        pTime = 0
-        plocX, plocY = 0, 0
-        clocX, clocY = 0, 0
-
-        cap = cv2.VideoCapture(1)
-        if not cap.isOpened():
-            cap.release()
-            cap = cv2.VideoCapture(0)
-            if not cap.isOpened():
-                return
-
-        cap.set(3, wCam)
-        cap.set(4, hCam)
-        detector = htm.handDetector(maxHands=1)
-        wScr, hScr = autopy.screen.size()
-
-        while not self.stop_flag.is_set():
-            success, img = cap.read()
-            if not success or img is None:
-                time.sleep(0.1)
-                continue
-
-            img = detector.findHands(img)
-            lmList, bbox = detector.findPosition(img)
-
-            fingers = detector.fingersUp()
-
-            # Next Slide: Index + Middle fingers (2 fingers)
-            if fingers == [0, 1, 1, 0, 0]:
-                pyautogui.press('right')
-                time.sleep(1.5)
-
-            # Previous Slide: Only Index finger
-            elif fingers == [0, 1, 0, 0, 0]:
-                pyautogui.press('left')
-                time.sleep(1.5)
-
-            if cv2.waitKey(1) & 0xFF == 27:
-                break
-
-        cap.release()
-        cv2.destroyAllWindows()
-    
-    def run_gaming_mode(self):
-        """Run gaming mode"""
+        settings = hooks.profile.settings
+        warm = prewarmer.ready.is_set()
+        detector = None
+        self.watchdog = hooks.watchdog
+        self.flight = hooks.flight
+        try:
+            # Reuse the MediaPipe graph and camera the launcher warmed up
+            detector = prewarmer.takeDetector(settings)
+            source = prewarmer.takeCamera(settings["wCam"], settings["hCam"])
+            # Camera window hidden - running in background; runMode releases the camera
+            metrics = runMode(mode, source=source, detector=detector, stopFlag=self.stop_flag,
+                              requestedAt=self.requested_at, hooks=hooks)
+            logColdStart(mode, metrics, warm)
+        except Exception as e:
+            print(f"[ModeRunner] {mode} mode failed: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            hooks.close()
+            # a detector the watchdog gave up on may still be stuck in its graph
+            if not hooks.watchdog.abandoned:
+                prewarmer.returnDetector(detector)
+        print(f"[ModeRunner] {mode} mode stopped")
+
+    def run_calibration(self):
+        """Guide the user through calibration; prompts and the result go to status_message"""
+        print("[ModeRunner] Starting calibration...")
         self.stop_flag.clear()
-        
+        from Calibration import CalibrationError, describe, runCalibration, saveCalibration
+        from GestureModes import modeSettings
+        from Sources import openSource
+        from Warmup import prewarmer
+
+        settings = modeSettings("normal")
+        detector = None
+        source = None
         try:
-            import cv2
-            import numpy as np
-            import HandTrackingModule as htm
-            import time
-            import autopy
-            import pyautogui
-            import mouse
+            detector = prewarmer.takeDetector(settings)
+            # the warm camera if an instruction window opened one, else our own (as runMode does)
+            source = prewarmer.takeCamera(settings["wCam"], settings["hCam"])
+            if source is None:
+                source = openSource(None, settings["wCam"], settings["hCam"])
+            profile = runCalibration(source, detector, stopFlag=self.stop_flag,
+                                     preview=self.preview_channel(),
+                                     onPrompt=lambda text: setattr(self, "status_message", f"🎯 {text}"))
+            if profile is not None:
+                print(f"[ModeRunner] Calibration: {describe(profile, settings['wCam'], settings['hCam'])}")
+                saveCalibration(profile)
+                self.status_message = "✅ Calibrated. Settings apply to the next mode."
+        except CalibrationError as e:
+            self.status_message = f"⚠ Calibration failed: {e}"
         except Exception as e:
-            print(f"Import error: {e}")
-            return
-
-        wCam, hCam = 640, 480
-        frameR = 100
-        smoothening = 9
-        pTime = 0
-        plocX, plocY = 0, 0
-        clocX, clocY = 0, 0
-
-        cap = cv2.VideoCapture(1)
-        if not cap.isOpened():
-            cap.release()
-            cap = cv2.VideoCapture(0)
-            if not cap.isOpened():
+            print(f"[ModeRunner] calibration failed: {e}")
+            import traceback
+            traceback.print_exc()
+            self.status_message = "❌ Calibration failed; see the console."
+        finally:
+            if source is not None:
+                source.release()
+            prewarmer.returnDetector(detector)
+        print("[ModeRunner] Calibration stopped")
+
+    def _on_watchdog(self, mode, kind, message):
+        """Watchdog events arrive on its thread; the launcher polls status_message"""
+        self.status_message = message
+        if kind == "abandoned" and not self.stop_flag.is_set():
+            if self.restarts >= self.max_restarts:
+                self.status_message = f"❌ {mode} mode keeps hanging; stopped."
                 return
+            # run the mode again in a fresh thread; the stuck one releases its camera when it wakes
+            self.restarts += 1
+            print(f"[ModeRunner] Restarting {mode} mode ({self.restarts}/{self.max_restarts})")
+            self.thread = threading.Thread(target=self._rerun_mode, args=(mode, self.thread), daemon=True)
+            self.thread.start()
+
+    def _rerun_mode(self, mode, stuck):
+        # give a thread that is about to wake the chance to free the camera before it is reopened
+        if stuck is not None:
+            stuck.join(timeout=2)
+        self.run_mode(mode)
+
+    def save_flight(self):
+        """Dump the running mode's last seconds (see core/FlightRecorder.py)"""
+        if self.flight is None or not (self.thread and self.thread.is_alive()):
+            return False
+        self.flight.trigger("manual")
+        return True
 
-        cap.set(3, wCam)
-        cap.set(4, hCam)
-        detector = htm.handDetector(maxHands=1)
-        wScr, hScr = autopy.screen.size()
-
-        while not self.stop_flag.is_set():
-            success, img = cap.read()
-            if not success or img is None:
-                time.sleep(0.1)
-                continue
-
-            img = detector.findHands(img)
-            lmList, bbox = detector.findPosition(img)
-
-            if len(lmList) != 0:
-                x1, y1 = lmList[8][1:]
-                x2, y2 = lmList[12][1:]
-
-                fingers = detector.fingersUp()
-                cv2.rectangle(img, (frameR, frameR), (wCam - frameR, hCam - frameR), (255, 0, 255), 2)
-
-                if fingers[1] == 1:
-                    x3 = np.interp(x1, (frameR, wCam - frameR), (0, wScr))
-                    y3 = np.interp(y1, (frameR, hCam - frameR), (0, hScr))
-                    clocX = plocX + (x3 - plocX) / smoothening
-                    clocY = plocY + (y3 - plocY) / smoothening
-                    autopy.mouse.move(wScr - clocX, clocY)
-                    plocX, plocY = clocX, clocY
-
-                if fingers == [0, 0, 0, 0, 0]:
-                    pyautogui.mouseDown(button='left')
-                    time.sleep(0.5)
-                elif fingers == [1, 1, 1, 1, 1]:
-                    mouse.release('left')
-
-                if fingers[1] == 1 and fingers[2] == 1:
-                    length, img, lineInfo = detector.findDistance(8, 12, img)
-                    if length < 20:
-                        mouse.click('left')
-                        time.sleep(0.25)
+    def run_gesture_mode(self):
+        """Run AI virtual mouse mode"""
+        self.run_mode("gesture")
 
-                if len(lmList) > 4:
-                    thumb_tip_y = lmList[4][2]
-                    thumb_base_y = lmList[3][2]
-                    if thumb_tip_y > thumb_base_y + 40:
-                        time.sleep(1)
-                        break
+    def run_normal_mode(self):
+        """Run normal mouse mode"""
+        self.run_mode("normal")
 
-            if cv2.waitKey(1) & 0xFF == 27:
-                break
+    def run_presentation_mode(self):
+        """Run presentation mode"""
+        self.run_mode("presentation")
 
-        cap.release()
-        cv2.destroyAllWindows()
+    def run_gaming_mode(self):
+        """Run gaming mode"""
+        self.run_mode("gaming")
     
     def start(self, mode_func):
         """Start a mode in a new thread"""
@@ -302,6 +187,9 @@ class ModeRunner:
             return False
         
         print(f"[ModeRunner] Starting thread for {mode_func.__name__}")
+        self.requested_at = time.perf_counter()
+        self.status_message = None
+        self.restarts = 0
         self.thread = threading.Thread(target=mode_func, daemon=True)
         self.thread.start()
         return True
@@ -312,6 +200,9 @@ class ModeRunner:
         self.stop_flag.set()
         if self.thread:
             self.thread.join(timeout=2)
+            if self.thread.is_alive() and self.watchdog is not None:
+                # stuck in a stage: at least free the mouse buttons it holds
+                self.watchdog.abandon("did not stop within 2 s")
         
         # Force close any OpenCV windows
         import cv2
@@ -0,0 +1,93 @@
+"""
+Warm worker processes for the launcher's subprocess path.
+A spare core/ModeWorker.py is spawned ahead of time, imports everything and
+builds its detectors, and is handed a mode over its stdin when the user clicks.
+"""
+import json
+import subprocess
+import threading
+import time
+
+
+class WarmWorker:
+    """One core/ModeWorker.py process: spawned early, runs one mode, then exits"""
+
+    def __init__(self, python_exec, script_path, env=None):
+        self.mode = None
+        self.ready = threading.Event()
+        self.finished = threading.Event()
+        self.error = None
+        self.status_message = None  # latest watchdog message of the running mode
+        self.lock = threading.Lock()
+        self.process = subprocess.Popen([python_exec, script_path], env=env, stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, text=True, bufsize=1)
+        threading.Thread(target=self._read_events, daemon=True).start()
+        print(f"[WarmWorker] spawned pid {self.process.pid}")
+
+    def _read_events(self):
+        # the worker's stdout carries protocol lines only (its logs go to stderr)
+        try:
+            for line in self.process.stdout:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if "ready" in event:
+                    print(f"[WarmWorker] pid {self.process.pid} warm after {event['ready']:.0f} ms")
+                    self.ready.set()
+                elif "status" in event:
+                    self.status_message = event["status"]
+                elif "error" in event:
+                    self.error = event["error"]
+                    print(f"[WarmWorker] {self.error}")
+                elif "stopped" in event:
+                    print(f"[WarmWorker] {event['stopped']} mode stopped after {event['frames']} frames")
+        finally:
+            self.finished.set()
+
+    def _send(self, **message):
+        with self.lock:
+            try:
+                self.process.stdin.write(json.dumps(message) + "\n")
+                self.process.stdin.flush()
+                return True
+            except (OSError, ValueError):
+                return False  # the worker already exited
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    @property
+    def running(self):
+        """A mode was handed over and the worker has not exited yet"""
+        return self.mode is not None and self.alive
+
+    def warm_camera(self, width=640, height=480):
+        """Open the camera in the worker ahead of a likely start"""
+        self._send(warmCamera=[width, height])
+
+    def run(self, mode):
+        """Hand the worker its mode; it starts as soon as its warm-up is done"""
+        if self.mode is not None:
+            return False
+        self.mode = mode
+        # wall clock: the worker converts it onto its own perf_counter
+        return self._send(run=mode, requestedAt=time.time())
+
+    def stop(self, timeout=5):
+        """Ask the worker to leave its mode and exit; terminate it if it does not"""
+        self._send(stop=True)
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            print(f"[WarmWorker] pid {self.process.pid} did not stop; terminating")
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# core modules import each other by their flat names, as the scripts in core/ do;
+# frontend modules are imported the way launcher.py imports them
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, "core"), os.path.join(ROOT, "frontend")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(autouse=True)
+def userData(tmp_path, monkeypatch):
+    """A private user data dir (AppPaths), so tests never read or write the real profiles."""
+    home = tmp_path / "user_data"
+    home.mkdir()
+    monkeypatch.setenv("GESTURE_MOUSE_HOME", str(home))
+    return home
+
+
+@pytest.fixture(scope="session")
+def clickSession(tmp_path_factory):
+    """A synthesized recording of a hand gliding between targets and pinch-clicking at each
+    (AirTap.synthesizeClicks): (path, capture times at which each click starts)."""
+    from AirTap import synthesizeClicks
+    path = str(tmp_path_factory.mktemp("recordings") / "pinch.npz")
+    return path, synthesizeClicks(path, "pinch", clicks=2)
@@ -0,0 +1,85 @@
+"""Stand-ins with injected stalls, for the watchdog and pipelining tests."""
+import threading
+import time
+
+import numpy as np
+
+from Backends import RecordingBackend
+
+
+class DelayedSource():
+    """Live-looking blank frames at `fps` with injected read stalls ({frame index: seconds}).
+
+    Like CameraSource, a requested restart happens on the next read.
+    """
+    live = True
+
+    def __init__(self, frames=150, fps=30.0, delays=None, size=(480, 640, 3)):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.delays = dict(delays or {})
+        self.img = np.zeros(size, dtype=np.uint8)
+        self.index = 0
+        self.wake = threading.Event()
+        self.restartRequested = False
+        self.restarts = 0
+        self.finished = False
+
+    def read(self):
+        if self.restartRequested:
+            self.restartRequested = False
+            self.restarts += 1
+        if self.index >= self.frames:
+            self.finished = True
+            return False, None, time.perf_counter()
+        delay = self.delays.pop(self.index, 0)
+        self.wake.clear()
+        self.wake.wait(delay + self.interval)
+        self.index += 1
+        return True, self.img, time.perf_counter()
+
+    def requestRestart(self):
+        self.restartRequested = True
+
+    def release(self):
+        self.wake.set()
+
+
+class DelayedDetector():
+    """No hands, with injected stalls in findHands ({call index: seconds})."""
+
+    def __init__(self, delays=None, maxHands=2):
+        self.delays = dict(delays or {})
+        self.calls = 0
+        self.restarts = 0
+        self.maxHands = maxHands
+        self.handCount = 0
+        self.handOrder = []
+        self.landmarks = np.zeros((maxHands, 21, 3))
+        self.lmList = ()
+
+    def findHands(self, img, draw=True, timestamp=None):
+        time.sleep(self.delays.pop(self.calls, 0))
+        self.calls += 1
+        return img
+
+    def findPosition(self, img, handNo=0, draw=True):
+        return (), []
+
+    def fingersUp(self, lmList=None):
+        return [0, 0, 0, 0, 0]
+
+    def restart(self):
+        self.restarts += 1
+
+
+class DelayedBackend(RecordingBackend):
+    """RecordingBackend whose beginFrame blocks on given frames ({frame index: seconds})."""
+
+    def __init__(self, delays=None, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = dict(delays or {})
+
+    def beginFrame(self, index, timestamp):
+        time.sleep(self.delays.pop(index, 0))
+        super().beginFrame(index, timestamp)
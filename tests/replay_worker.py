@@ -0,0 +1,38 @@
+"""
+A ModeWorker replaying a recording in real time into the fake backend, spawned
+by tests/test_mode_worker.py the way the launcher spawns core/ModeWorker.py.
+It also reports the click-to-first-frame latency on the protocol pipe.
+
+    python tests/replay_worker.py session.npz [--cold]   # --cold: no warm-up before the run
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "core"))
+
+from Backends import RecordingBackend  # noqa: E402
+from ModeWorker import ModeWorker  # noqa: E402
+from Sources import RecordingSource  # noqa: E402
+
+
+def main(recording, cold=False):
+    channel = sys.stdout
+    sys.stdout = sys.stderr
+    worker = ModeWorker(channel)
+    threading.Thread(target=worker.listen, args=(sys.stdin,), daemon=True).start()
+    if not cold:
+        worker.warm()
+
+    class ReportingBackend(RecordingBackend):
+        def beginFrame(self, frame, frameTime):
+            super().beginFrame(frame, frameTime)
+            if frame == 0:
+                worker.send(firstFrame_ms=1000 * (time.perf_counter() - worker.requestedAt))
+
+    return worker.serve(source=RecordingSource(recording, realtime=True), backend=ReportingBackend(), show=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1], cold="--cold" in sys.argv[2:]))
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from AirTap import _TEMPLATE, AirTapDetector, evaluate, synthesizeClicks
+
+CLICKS = 6
+
+
+def feed(detector, strokes, fps=30.0, shift=None):
+    """Events for a pointing hand whose index tip moves down by each stroke (hand sizes) in turn."""
+    events = []
+    for i, stroke in enumerate(strokes):
+        hand = np.zeros((21, 3))
+        hand[:, :2] = _TEMPLATE
+        hand[8, 1] += stroke
+        if shift is not None:
+            hand[:, :2] += shift[i]
+        events.append(detector.update(hand, i / fps))
+    return [(i, event) for i, event in enumerate(events) if event]
+
+
+def test_quick_flick_presses_and_releases():
+    detector = AirTapDetector()
+    assert feed(detector, [0, 0, 0, 0.3, 0.6, 0.3, 0, 0]) == [(5, "press"), (6, "release")]
+    assert detector.taps == 1 and not detector.active
+
+
+def test_slow_push_and_curl_are_not_taps():
+    detector = AirTapDetector()
+    assert feed(detector, [0, 0] + [0.11 * k for k in range(1, 9)] + [0.88] * 4) == []  # past maxStroke
+    assert detector.rejected == 1
+    detector = AirTapDetector()
+    assert feed(detector, [0, 0, 0.8, 1.6, 0.8, 0]) == []  # travel past maxTravel: another pose
+    assert detector.rejected == 1
+
+
+def test_moving_the_whole_hand_is_not_a_tap():
+    shift = [(0.0, 0.2 * k) for k in range(8)]  # the hand drops fast, the finger does not move on it
+    assert feed(AirTapDetector(), [0] * 8, shift=shift) == []
+
+
+def test_losing_the_hand_releases_a_press():
+    detector = AirTapDetector()
+    assert feed(detector, [0, 0, 0.3, 0.6, 0.5]) == [(4, "press")]
+    assert detector.update(None, 5 / 30.0) == "release"
+    assert not detector.active
+
+
+@pytest.fixture(scope="module")
+def sessions(tmp_path_factory):
+    """Tap and pinch sessions, each replayed with air taps on and off."""
+    tmp = tmp_path_factory.mktemp("clicks")
+    results = {}
+    for method in ("pinch", "tap"):
+        path = str(tmp / f"{method}.npz")
+        onsets = synthesizeClicks(path, method, clicks=CLICKS)
+        results[method] = evaluate(path, onsets, airTap=method == "tap")
+        results[f"{method}, other method"] = evaluate(path, onsets, airTap=method != "tap")
+    return results
+
+
+def test_every_tap_clicks_once(sessions):
+    assert sessions["tap"]["clicks"] == CLICKS
+    assert sessions["tap"]["spurious"] == 0
+
+
+def test_taps_click_sooner_and_closer_than_pinches(sessions):
+    tap, pinch = sessions["tap"], sessions["pinch"]
+    assert tap["clicks"] and pinch["clicks"]
+    assert tap["latency_ms"] < pinch["latency_ms"]
+    assert tap["cursorError_px"] < pinch["cursorError_px"]
+
+
+def test_methods_do_not_trigger_each_other(sessions):
+    # pinches still click with air taps on, and nothing more; taps alone never pinch
+    pinch, pinchWithTaps = sessions["pinch"], sessions["pinch, other method"]
+    assert (pinchWithTaps["clicks"], pinchWithTaps["spurious"]) == (pinch["clicks"], pinch["spurious"])
+    assert sessions["tap, other method"]["clicks"] == 0
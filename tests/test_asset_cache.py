@@ -0,0 +1,114 @@
+import threading
+
+from PIL import Image
+
+import asset_cache
+from asset_cache import GifAnimator, GifFrames
+
+
+class FakePhoto():
+    created = 0
+
+    def __init__(self, image):
+        FakePhoto.created += 1
+        self.image = image
+
+
+class FakeRoot():
+    def __init__(self):
+        self.jobs = {}
+
+    def after(self, ms, func):
+        job = len(self.jobs) + 1
+        self.jobs[job] = func
+        return job
+
+    def after_cancel(self, job):
+        self.jobs.pop(job)
+
+    def run(self):
+        job = max(self.jobs)
+        self.jobs.pop(job)()
+
+
+class FakeLabel():
+    def __init__(self):
+        self.images = []
+        self.onDestroy = None
+
+    def bind(self, event, func, add=None):
+        self.onDestroy = func
+
+    def config(self, image):
+        self.images.append(image)
+
+    def destroy(self):
+        self.onDestroy(None)
+
+
+def writeGif(path, count=3):
+    frames = [Image.new("RGB", (40, 30), (80 * i, 0, 0)) for i in range(count)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=100)
+    return str(path)
+
+
+def test_frames_are_decoded_once_and_shared(tmp_path, monkeypatch):
+    opened = []
+    realOpen = Image.open
+    monkeypatch.setattr(asset_cache.Image, "open", lambda path: opened.append(path) or realOpen(path))
+    monkeypatch.setattr(asset_cache.ImageTk, "PhotoImage", FakePhoto)
+    FakePhoto.created = 0
+    frames = GifFrames(writeGif(tmp_path / "a.gif"), (20, 15))
+    for _ in range(3):
+        frames.preload()
+    assert frames.loaded.wait(5)
+    first = frames.get_photos()
+    assert frames.get_photos() is first
+    assert len(opened) == 1
+    assert FakePhoto.created == len(first) == 3
+    assert all(photo.image.size == (20, 15) for photo in first)
+
+
+def test_photos_are_none_until_decoded(tmp_path, monkeypatch):
+    monkeypatch.setattr(asset_cache.ImageTk, "PhotoImage", FakePhoto)
+    frames = GifFrames(writeGif(tmp_path / "a.gif"), (20, 15))
+    decode, gate = frames._load, threading.Event()
+    monkeypatch.setattr(frames, "_load", lambda: gate.wait(5) and decode())
+    # the first window asks before the loader has finished: it gets the placeholder
+    assert frames.get_photos() is None
+    gate.set()
+    assert frames.loaded.wait(5)
+    assert len(frames.get_photos()) == 3
+
+
+def test_one_loop_animates_every_label_and_stops_with_the_last(tmp_path, monkeypatch):
+    monkeypatch.setattr(asset_cache.ImageTk, "PhotoImage", FakePhoto)
+    frames = GifFrames(writeGif(tmp_path / "a.gif"), (20, 15))
+    frames.preload()
+    assert frames.loaded.wait(5)
+    root = FakeRoot()
+    animator = GifAnimator(root)
+    first, second = FakeLabel(), FakeLabel()
+    animator.attach(first, frames)
+    animator.attach(second, frames)
+    assert len(root.jobs) == 1
+    for _ in range(3):
+        root.run()
+    photos = frames.get_photos()
+    assert first.images == photos + [photos[0]]
+    assert second.images == photos
+    first.destroy()
+    assert len(root.jobs) == 1
+    second.destroy()
+    assert not root.jobs and animator.job is None
+
+
+def test_missing_gif_stops_animating(tmp_path):
+    frames = GifFrames(str(tmp_path / "missing.gif"), (20, 15))
+    frames.preload()
+    assert frames.loaded.wait(5)
+    assert isinstance(frames.error, FileNotFoundError)
+    root = FakeRoot()
+    animator = GifAnimator(root)
+    animator.attach(FakeLabel(), frames)
+    assert not animator.labels and not root.jobs
@@ -0,0 +1,63 @@
+import pytest
+
+import HandTrackingModule as htm
+from Calibration import (CalibrationError, calibratedSettings, loadCalibration, runCalibration, saveCalibration,
+                         synthesizeSession)
+from Profiles import loadModeSettings
+from Sources import openSource
+
+
+def calibrate(path, **kwargs):
+    source = openSource(path)
+    return runCalibration(source, htm.replayDetector(source, maxHands=1), **kwargs)
+
+
+@pytest.mark.parametrize("noise, quiet", [(0.0005, True), (0.004, False)])
+def test_estimates_follow_the_synthetic_user(tmp_path, noise, quiet):
+    profile = calibrate(synthesizeSession(str(tmp_path / "calibration.npz"), noise=noise))
+    left, top, right, bottom = profile["activeRegion"]
+    assert left == pytest.approx(0.2, abs=0.05) and right == pytest.approx(0.8, abs=0.05)
+    assert top == pytest.approx(0.25, abs=0.05) and bottom == pytest.approx(0.75, abs=0.05)
+    assert profile["measured"]["pinches"] == 3
+    settings = calibratedSettings(640, 480, profile)
+    assert 100 <= settings["frameR"] <= 140
+    assert 0.01 * 640 < settings["clickDistance"] < 0.08 * 640
+    # quiet hands get less smoothing, and so less lag
+    assert (settings["smoothening"] < 9) if quiet else (settings["smoothening"] >= 9)
+
+
+def test_missing_pinches_are_refused(tmp_path):
+    with pytest.raises(CalibrationError):
+        calibrate(synthesizeSession(str(tmp_path / "nopinch.npz"), pinches=1))
+
+
+def test_saved_profile_feeds_the_mode_settings(tmp_path):
+    assert loadCalibration() is None
+    profile = calibrate(synthesizeSession(str(tmp_path / "calibration.npz")))
+    saveCalibration(profile)
+    assert loadCalibration() == profile
+    settings = loadModeSettings("gesture")
+    assert settings["smoothening"] == profile["smoothening"]
+    assert settings["frameR"] == calibratedSettings(settings["wCam"], settings["hCam"], profile)["frameR"]
+    assert loadModeSettings("gesture", calibrated=False)["frameR"] == 100
+
+
+def test_launcher_calibration_opens_its_own_camera(tmp_path, monkeypatch):
+    import Sources
+    from mode_runners import ModeRunner
+    from Warmup import prewarmer
+
+    source = openSource(synthesizeSession(str(tmp_path / "calibration.npz")))
+    released = []
+    source.release = lambda: released.append(True)
+    # nothing warmed: no camera to take, so the runner has to open one
+    monkeypatch.setattr(prewarmer, "takeCamera", lambda *args, **kwargs: None)
+    monkeypatch.setattr(prewarmer, "takeDetector", lambda settings: htm.replayDetector(source, maxHands=1))
+    monkeypatch.setattr(prewarmer, "returnDetector", lambda detector: None)
+    monkeypatch.setattr(Sources, "openSource", lambda spec, width, height: source)
+
+    runner = ModeRunner()
+    runner.run_calibration()
+    assert runner.status_message.startswith("✅")
+    assert loadCalibration() is not None
+    assert released == [True]
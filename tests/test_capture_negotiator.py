@@ -0,0 +1,65 @@
+import cv2
+
+from CaptureNegotiator import CaptureNegotiator, SimClock, SimulatedCapture, fourccName, measureCapture
+
+YUYV_ONLY = {"modes": {("YUY2", 640, 480): 30}, "honorBufferSize": False}
+
+
+def negotiator(tmp_path, clock):
+    return CaptureNegotiator(path=str(tmp_path / "capture_profiles.json"), clock=clock.time, sleep=clock.sleep)
+
+
+def test_untouched_webcam_is_slow_and_queued():
+    clock = SimClock()
+    base = measureCapture(SimulatedCapture(clock=clock), clock=clock.time, sleep=clock.sleep)
+    assert base["actualFourcc"] == "YUY2"
+    assert abs(base["deliveredFps"] - 15) < 1
+    assert base["staleFrames"] >= 3
+
+
+def test_negotiation_picks_mjpg_without_a_queue(tmp_path):
+    clock = SimClock()
+    cap = SimulatedCapture(clock=clock)
+    profile = negotiator(tmp_path, clock).configure(cap, 0, 640, 480)
+    assert profile["fourcc"] == "MJPG"
+    assert profile["deliveredFps"] > 55
+    assert profile["staleFrames"] <= 1
+    # the winner is left applied on the capture
+    assert fourccName(cap.get(cv2.CAP_PROP_FOURCC)) == "MJPG"
+    assert cap.get(cv2.CAP_PROP_FPS) == 60
+
+
+def test_second_start_reuses_the_saved_profile(tmp_path):
+    clock = SimClock()
+    first = negotiator(tmp_path, clock)
+    saved = first.configure(SimulatedCapture(clock=clock), 1, 640, 480)
+    assert first.probes == len(first.candidates)
+
+    second = negotiator(tmp_path, clock)
+    cap = SimulatedCapture(clock=clock)
+    assert second.configure(cap, 1, 640, 480)["fourcc"] == saved["fourcc"]
+    assert second.probes == 0
+    assert cap.reads == 1
+    assert second.indexOrder() == [1, 0]
+
+
+def test_driver_ignoring_buffer_size_keeps_its_format(tmp_path):
+    clock = SimClock()
+    profile = negotiator(tmp_path, clock).configure(SimulatedCapture(clock=clock, **YUYV_ONLY), 0, 640, 480)
+    assert profile["fourcc"] == "YUY2"
+    assert abs(profile["deliveredFps"] - 30) < 1
+    # the queue it cannot shrink is measured, not assumed away
+    assert profile["staleFrames"] >= 3
+    assert profile["latency_ms"] > 90
+
+
+def test_stale_saved_profile_is_renegotiated(tmp_path):
+    clock = SimClock()
+    negotiator(tmp_path, clock).configure(SimulatedCapture(clock=clock), 0, 1280, 720)
+    # the same device key now only delivers 640x480
+    replaced = negotiator(tmp_path, clock)
+    cap = SimulatedCapture(clock=clock, modes={("MJPG", 640, 480): 60})
+    profile = replaced.configure(cap, 0, 1280, 720)
+    assert replaced.probes > 0
+    assert profile["frameSize"] == [640, 480]
+    assert not profile["sizeMatches"]
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import pytest
+
+import CursorOutput
+from CursorOutput import CursorOutputThread
+
+FRAME = 1 / 30
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable perf_counter: targets arrive the instant they are captured, so latency stays 0."""
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(CursorOutput, "time", SimpleNamespace(perf_counter=lambda: clock.now))
+    return clock
+
+
+def feed(output, clock, xs, start=100.0):
+    for i, x in enumerate(xs):
+        clock.now = start + i * FRAME
+        output.setTarget(x, 2 * x, clock.now)
+
+
+def test_interpolates_one_frame_behind_the_newest_target(clock):
+    output = CursorOutputThread(lambda x, y: None)
+    feed(output, clock, [0, 30])
+    # halfway through the next frame interval the pointer is halfway along the last segment
+    assert output.positionAt(clock.now + FRAME / 2) == pytest.approx((15, 30))
+    assert output.positionAt(clock.now + FRAME) == pytest.approx((30, 60))
+    # a late frame carries the motion on for at most maxExtrapolation, never back before prev
+    assert output.positionAt(clock.now + 1) == pytest.approx((75, 150))
+    assert output.positionAt(clock.now - 1) == pytest.approx((0, 0))
+
+
+def test_extrapolates_past_the_newest_target_up_to_the_cap(clock):
+    output = CursorOutputThread(lambda x, y: None, extrapolate=True, maxExtrapolation=0.05)
+    feed(output, clock, [0, 30])
+    assert output.positionAt(clock.now) == pytest.approx((30, 60))
+    assert output.positionAt(clock.now + FRAME / 2) == pytest.approx((45, 90))
+    # 900 px/s for at most 50 ms
+    assert output.positionAt(clock.now + 1) == pytest.approx((75, 150))
+
+
+def test_latency_shifts_the_capture_timeline(clock):
+    output = CursorOutputThread(lambda x, y: None, extrapolate=True)
+    for i, x in enumerate([0, 30] * 20):
+        captured = 100.0 + i * FRAME
+        clock.now = captured + 0.01  # each target is ready 10 ms after its frame
+        output.setTarget(x, 0, captured)
+    assert output.latency == pytest.approx(0.01, abs=1e-4)
+    assert output.positionAt(clock.now) == pytest.approx((30, 0), abs=0.1)
+
+
+def test_a_gap_longer_than_max_gap_is_not_blended(clock):
+    output = CursorOutputThread(lambda x, y: None, maxGap=0.25)
+    feed(output, clock, [0])
+    clock.now += 0.5
+    output.setTarget(500, 0, clock.now)
+    assert output.positionAt(clock.now) == (500, 0)
+
+
+def test_jump_to_moves_now_and_holds(clock):
+    moves = []
+    output = CursorOutputThread(lambda x, y: moves.append((x, y)), extrapolate=True)
+    feed(output, clock, [0, 30])
+    output.jumpTo(200, 100)
+    assert moves == [(200, 100)]
+    # no blending from the old segment and no extrapolation past the click point
+    for dt in (0, FRAME / 2, 0.2):
+        assert output.positionAt(clock.now + dt) == (200, 100)
+    output.tick(clock.now + FRAME)
+    assert moves == [(200, 100)]
+
+
+def test_tick_clamps_to_bounds_and_skips_subpixel_moves(clock):
+    moves = []
+    output = CursorOutputThread(lambda x, y: moves.append((x, y)), bounds=(0, 0, 1920, 1080))
+    output.setTarget(2500, -40, clock.now)
+    output.tick(clock.now)
+    output.setTarget(2600, -40.3, clock.now + FRAME)
+    output.tick(clock.now + 2 * FRAME)
+    assert moves == [(1919, 0)]
+    output.clearTarget()
+    output.tick(clock.now + 3 * FRAME)
+    assert moves == [(1919, 0)]
@@ -0,0 +1,79 @@
+import time
+
+import numpy as np
+
+import HandTrackingModule as htm
+from Backends import RecordingBackend
+from DetectorBackends import AsyncDetectorBackend, StubDetectorBackend, scriptFromRecording
+from doubles import DelayedSource
+from Pipeline import runMode
+from Sources import RecordingSource
+
+IMG = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+def hand(value, label="Right"):
+    return np.full((21, 3), value), label
+
+
+def run(detector, source):
+    backend = RecordingBackend()
+    t0 = time.perf_counter()
+    metrics = runMode("gesture", source=source, backend=backend, detector=detector, settings={"cursorRate": 0})
+    elapsed = time.perf_counter() - t0
+    detector.close()
+    return metrics.frames / elapsed, backend.counts()
+
+
+def test_stub_plays_its_script():
+    stub = StubDetectorBackend([[hand(0.1)], [], [hand(0.2, "Left"), hand(0.3)]], maxHands=2, loop=False)
+    counts = [stub.process(IMG, t).count for t in range(4)]
+    assert counts == [1, 0, 2, 0]
+    stub.restart()
+    result = stub.process(IMG, 10.0)
+    assert result.count == 1 and result.labels[0] == "Right" and result.timestamp == 10.0
+    assert np.all(result.landmarks[0] == 0.1)
+
+
+def test_callable_script_sees_index_and_time():
+    stub = StubDetectorBackend(lambda index, timestamp: [hand(index + timestamp)], maxHands=1)
+    stub.process(IMG, 0.5)
+    assert np.all(stub.process(IMG, 0.5).landmarks[0] == 1.5)
+
+
+def test_async_results_come_back_in_order():
+    seen = []
+    backend = AsyncDetectorBackend(StubDetectorBackend(lambda index, timestamp: [hand(index)], maxHands=1),
+                                   onResult=lambda result: seen.append(result.timestamp))
+    for t in range(5):
+        backend.submit(IMG, float(t))
+        result = backend.poll(timeout=1.0)
+        assert result.timestamp == float(t) and np.all(result.landmarks[0] == t)
+    assert seen == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert backend.inFlight() == 0
+    backend.close()
+
+
+def test_stub_and_pipelined_stub_act_like_the_recording(clickSession):
+    path, onsets = clickSession
+    script = scriptFromRecording(path)
+    source = RecordingSource(path)
+    replayed = run(htm.replayDetector(source, maxHands=2), source)[1]
+    assert replayed["click"] == len(onsets)
+    stub = htm.handDetector(maxHands=2, backend=StubDetectorBackend(script, 2, loop=False))
+    assert run(stub, RecordingSource(path))[1] == replayed
+    # on the recording's clock a one-frame lag changes no action
+    pipelined = htm.handDetector(maxHands=2, backend=AsyncDetectorBackend(StubDetectorBackend(script, 2, loop=False)))
+    assert run(pipelined, RecordingSource(path))[1] == replayed
+
+
+def test_pipelining_overlaps_capture_and_inference(clickSession):
+    script = scriptFromRecording(clickSession[0])[:40]
+    fps = {}
+    for label, pipelined in (("sync", False), ("async", True)):
+        backend = StubDetectorBackend(script, 2, delay=0.02)
+        if pipelined:
+            backend = AsyncDetectorBackend(backend)
+        # capture takes 15 ms: sync frames cost capture + inference, pipelined ones the slower of the two
+        fps[label] = run(htm.handDetector(maxHands=2, backend=backend), DelayedSource(frames=40, fps=1 / 0.015))[0]
+    assert fps["async"] > 1.2 * fps["sync"]
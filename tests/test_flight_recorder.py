@@ -0,0 +1,74 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from Backends import RecordingBackend
+from FlightRecorder import FlightRecorder, replayDump
+from GestureModes import modeSettings
+from HandTrackingModule import replayDetector
+from Pipeline import PipelineHooks, runMode
+from Sources import RecordingSource
+
+
+@pytest.fixture
+def settings():
+    return modeSettings("gesture", {"cursorRate": 0})
+
+
+@pytest.fixture
+def firstFrame(clickSession, settings):
+    """A detector that has seen the first frame of the click session, and that frame."""
+    source = RecordingSource(clickSession[0])
+    detector = replayDetector(source, maxHands=settings["maxHands"])
+    _, img, timestamp = source.read()
+    detector.findHands(img, draw=False, timestamp=timestamp)
+    return detector, img, timestamp
+
+
+def test_dump_on_a_watched_action_replays_the_same_actions(clickSession, settings, tmp_path):
+    flight = FlightRecorder("gesture", settings, seconds=1, watchActions=[("click", ("left",))],
+                            directory=str(tmp_path))
+    runMode("gesture", source=RecordingSource(clickSession[0]), backend=RecordingBackend(), settings=settings,
+            hooks=PipelineHooks(flight=flight))
+    flight.wait()
+    assert len(flight.dumps) == 1  # the second click falls inside minInterval
+
+    data = np.load(flight.dumps[0])
+    assert str(data["reason"]) == "click left"
+    assert data["frames"].shape[0] == len(data["timestamps"]) == 30
+    recorded, replayed = replayDump(flight.dumps[0])
+    assert ("click", ("left",)) in [(a, args) for _, a, args in recorded]
+    assert [(f, a) for f, a, _ in recorded] == [(f, a) for f, a, _ in replayed]
+
+
+def test_latency_spike_requests_a_dump(firstFrame, settings, tmp_path):
+    detector, img, timestamp = firstFrame
+    flight = FlightRecorder("gesture", settings, seconds=2, directory=str(tmp_path))
+    for _ in range(40):
+        flight.add(detector, img, timestamp)
+        flight.endFrame(detector, 0.0, 0.001, 0.011, 0.012)
+    assert not flight.dumps
+    flight.add(detector, img, timestamp)
+    flight.endFrame(detector, 0.0, 0.001, 0.301, 0.302)
+    flight.wait()
+    assert len(flight.dumps) == 1 and flight.dumps[0].endswith(".npz")
+    assert np.load(flight.dumps[0])["timings"][-1, 1] == pytest.approx(300, abs=0.01)
+
+
+def test_recorder_does_not_allocate_per_frame(firstFrame, settings, tmp_path):
+    detector, img, timestamp = firstFrame
+    flight = FlightRecorder("gesture", settings, seconds=2, directory=str(tmp_path))
+    for _ in range(100):  # past the ring allocation on the first frame
+        flight.add(detector, img, timestamp)
+        flight.endFrame(detector, 0.0, 0.001, 0.002, 0.003)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for _ in range(500):
+            flight.add(detector, img, timestamp)
+            flight.endFrame(detector, 0.0, 0.001, 0.002, 0.003)
+        grown = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    finally:
+        tracemalloc.stop()
+    assert grown < 4096
@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+import pytest
+
+from Metrics import AllocationTracker
+from Sources import FramePool, VideoFileSource
+
+
+class FakeCapture():
+    """cap.read() the way OpenCV does it: decode into image= when its shape fits, else allocate."""
+
+    def __init__(self, shapes):
+        self.shapes = list(shapes)
+        self.allocated = 0
+
+    def read(self, image=None):
+        if not self.shapes:
+            return False, None
+        shape = self.shapes.pop(0)
+        if image is None or image.shape != shape:
+            image = np.empty(shape, dtype=np.uint8)
+            self.allocated += 1
+        image.fill(len(self.shapes) % 256)
+        return True, image
+
+
+def test_buffers_rotate_without_reallocating():
+    cap = FakeCapture([(48, 64, 3)] * 10)
+    pool = FramePool(size=2)
+    frames = [pool.read(cap)[1] for _ in range(10)]
+    assert cap.allocated == 2
+    assert all(frames[i] is frames[i % 2] for i in range(10))
+
+
+
+def test_previous_frame_survives_the_next_read():
+    cap = FakeCapture([(48, 64, 3)] * 4)
+    pool = FramePool(size=2)
+    previous = pool.read(cap)[1]
+    for _ in range(3):
+        value = int(previous[0, 0, 0])
+        current = pool.read(cap)[1]
+        assert current is not previous and int(previous[0, 0, 0]) == value
+        previous = current
+
+
+def test_size_change_replaces_the_buffer():
+    cap = FakeCapture([(48, 64, 3)] * 4 + [(96, 128, 3)] * 4)
+    pool = FramePool(size=2)
+    frames = [pool.read(cap)[1] for _ in range(8)]
+    assert cap.allocated == 4
+    assert frames[6] is frames[4] and frames[6].shape == (96, 128, 3)
+
+
+def test_failed_read_keeps_the_rotation():
+    cap = FakeCapture([(48, 64, 3)] * 3)
+    pool = FramePool(size=2)
+    for _ in range(3):
+        pool.read(cap)
+    assert pool.read(cap) == (False, None)
+    assert pool.index == 1 and all(buf is not None for buf in pool.buffers)
+
+
+def test_video_source_decodes_into_the_pool(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(12):
+        writer.write(np.full((48, 64, 3), 20 * i, dtype=np.uint8))
+    writer.release()
+    source = VideoFileSource(path)
+    addresses = []
+    while True:
+        success, img, _ = source.read()
+        if not success:
+            break
+        addresses.append(img.ctypes.data)
+    source.release()
+    assert len(addresses) == 12
+    assert len(set(addresses)) == 2
+
+
+def retainingLoop(tracker, frames, retain):
+    kept = []
+    for _ in range(frames):
+        tracker.frame()
+        if retain:
+            kept.append(bytes(retain))  # one block per frame
+        else:
+            bytearray(4096)  # transient only
+    tracker.stop()
+    return kept
+
+
+def test_allocation_tracker_sees_a_flat_loop_as_flat():
+    tracker = AllocationTracker(warmup=5)
+    retainingLoop(tracker, 105, retain=0)
+    summary = tracker.summary()
+    assert summary["frames"] == 100
+    assert abs(summary["netBytesPerFrame"]) < 64
+    assert summary["maxPeakBytes"] >= 4096
+
+
+def test_allocation_tracker_reports_retained_bytes():
+    tracker = AllocationTracker(warmup=5)
+    kept = retainingLoop(tracker, 105, retain=1000)
+    summary = tracker.summary()
+    assert len(kept) == 105
+    assert summary["netBytesPerFrame"] == pytest.approx(1000, rel=0.2)
+    assert summary["blocksPerFrame"] == pytest.approx(1, abs=0.2)
+    assert summary["top"]
+
+
+def test_allocation_tracker_skips_the_warmup():
+    tracker = AllocationTracker(warmup=30)
+    retainingLoop(tracker, 20, retain=1000)
+    assert tracker.summary() == {"frames": 0}
@@ -0,0 +1,69 @@
+import math
+
+import numpy as np
+import pytest
+
+import HandTrackingModule as htm
+from HandFeatures import FINGER_CHAINS, HandFeatures
+from Sources import RecordingSource
+
+
+def straightHand():
+    """Every finger a straight ray out of the wrist, fingertips up the frame."""
+    landmarks = np.zeros((21, 3))
+    landmarks[0] = 0.5, 0.9, 0.0
+    for finger, chain in enumerate(FINGER_CHAINS):
+        direction = np.array([math.sin(0.3 * (finger - 2)), -math.cos(0.3 * (finger - 2)), 0.0])
+        for joint, landmark in enumerate(chain[1:], start=1):
+            landmarks[landmark] = landmarks[0] + 0.05 * joint * direction
+    return landmarks
+
+
+def test_geometry_of_a_straight_hand():
+    features = HandFeatures().update(0, 0, straightHand(), np.array([640.0, 480.0]))
+    np.testing.assert_allclose(features.angles, 0, atol=1e-6)
+    np.testing.assert_allclose(features.extension, 1, atol=1e-6)
+    assert features.scale == pytest.approx(0.05)
+    np.testing.assert_allclose(features.local[0], 0)
+    distances = features.tipDistance
+    np.testing.assert_allclose(distances, distances.T)
+    np.testing.assert_allclose(np.diag(distances), 0)
+    assert features.tipPixelDistance(8, 12) == pytest.approx(features.tipPixels[1, 2])
+
+
+def test_features_match_the_lmlist_helpers(clickSession):
+    source = RecordingSource(clickSession[0])
+    detector = htm.replayDetector(source, maxHands=2)
+    frames = 0
+    while True:
+        success, img, timestamp = source.read()
+        if not success:
+            break
+        detector.findHands(img, draw=False, timestamp=timestamp)
+        lmList, _ = detector.findPosition(img, draw=False)
+        if not len(lmList):
+            continue
+        frames += 1
+        lm = lmList.copy()
+        features = detector.features()
+        assert detector.features() is features  # computed once per frame
+        assert features.fingers == detector.fingersUp(lm)
+        assert features.tipPixelDistance(8, 12) == detector.findDistance(8, 12, img, draw=False, lmList=lm)[0]
+        features.tipPixels  # served from the cached tip distances from here on
+        assert features.tipPixelDistance(4, 8) == pytest.approx(
+            math.hypot(lm[8][1] - lm[4][1], lm[8][2] - lm[4][2]), abs=1e-9)
+        assert (features.pixels[4, 1] > features.pixels[3, 1] + 40) == (lm[4][2] > lm[3][2] + 40)
+    assert frames > 100
+
+
+def test_features_are_recomputed_for_the_next_frame(clickSession):
+    source = RecordingSource(clickSession[0])
+    detector = htm.replayDetector(source, maxHands=1)
+    points = []
+    for _ in range(40):
+        _, img, timestamp = source.read()
+        detector.findHands(img, draw=False, timestamp=timestamp)
+        features = detector.features()
+        points.append(features.points.copy())
+        np.testing.assert_allclose(features.points, detector.landmarks[features.slot])
+    assert not np.allclose(points[0], points[-1])
@@ -0,0 +1,89 @@
+import multiprocessing
+import time
+
+import pytest
+
+from HandState import FILE_NAME, HandStateError, HandStatePublisher, HandStateReader, _stressReader, _stressWriter
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / FILE_NAME)
+
+
+def test_no_torn_frame_reaches_a_reader(path):
+    publisher = HandStatePublisher(path, maxHands=2)
+    frame = _stressWriter(publisher)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    seconds = 1.5
+    # readers polling flat out against a writer publishing back to back: as many torn copies as possible
+    procs = [context.Process(target=_stressReader, args=(path, seconds, 0, results)) for _ in range(2)]
+    for proc in procs:
+        proc.start()
+    deadline = time.perf_counter() + seconds + 1.0  # covers the readers' start-up
+    while time.perf_counter() < deadline:
+        frame(publisher.frames)
+    stats = [results.get(timeout=30) for _ in procs]
+    for proc in procs:
+        proc.join(10)
+    publisher.close()
+    for frames, inconsistent, _ in stats:
+        assert frames > 0
+        assert inconsistent == 0
+
+
+def test_poll_takes_each_frame_once(path):
+    publisher = HandStatePublisher(path, maxHands=2)
+    frame = _stressWriter(publisher)
+    reader = HandStateReader(path)
+    frame(7)
+    assert reader.poll()
+    assert not reader.poll()
+    assert reader.frame == 0 and reader.captureTime == 7.0 and reader.gesture == "7"
+    assert reader.width == 640 and reader.height == 480
+    assert reader.fingers(0) == [0, 1, 1, 0, 0]
+    assert list(reader.handedness) == [2, 1] and list(reader.present) == [1, 1]
+    assert (reader.landmarks == 7).all()
+    assert reader.age(reader.publishTime + 0.5) == pytest.approx(0.5)
+    reader.close()
+    publisher.close()
+
+
+def test_poll_copies_only_the_requested_fields(path):
+    publisher = HandStatePublisher(path, maxHands=2)
+    frame = _stressWriter(publisher)
+    reader = HandStateReader(path)
+    frame(3)
+    assert reader.poll()
+    frame(4)
+    assert reader.poll(("gesture", "fingers", "present"))
+    assert reader.gesture == "4"
+    assert reader.frame == 0 and (reader.landmarks == 3).all()  # left out: still the older frame
+    reader.close()
+    publisher.close()
+
+
+def test_reader_follows_a_restarted_publisher(path):
+    publisher = HandStatePublisher(path, maxHands=2)
+    _stressWriter(publisher)(1)
+    reader = HandStateReader(path)
+    assert reader.poll() and reader.hands == 2
+    publisher.close()
+
+    # a restart with another hand count reuses the file
+    publisher = HandStatePublisher(path, maxHands=1)
+    _stressWriter(publisher)(8)
+    assert reader.poll()
+    assert reader.hands == 1 and reader.gesture == "8" and reader.landmarks.shape == (1, 21, 3)
+    reader.close()
+    publisher.close()
+
+
+def test_reader_refuses_a_missing_or_foreign_file(path, tmp_path):
+    with pytest.raises(HandStateError):
+        HandStateReader(path)
+    foreign = tmp_path / "foreign.bin"
+    foreign.write_bytes(b"\0" * 4096)
+    with pytest.raises(HandStateError):
+        HandStateReader(str(foreign))
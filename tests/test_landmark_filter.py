@@ -0,0 +1,108 @@
+import math
+import tracemalloc
+
+import numpy as np
+
+from LandmarkFilter import LandmarkFilterBank
+
+
+class OneEuro():
+    """Scalar One Euro filter (Casiez et al. 2012), the bank's reference."""
+
+    def __init__(self, minCutoff=1.5, beta=5.0, dCutoff=1.0):
+        self.minCutoff, self.beta, self.dCutoff = minCutoff, beta, dCutoff
+        self.value = self.deriv = self.time = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        r = 2 * math.pi * cutoff * dt
+        return r / (r + 1)
+
+    def __call__(self, x, t):
+        if self.value is None:
+            self.value, self.deriv, self.time = x, 0.0, t
+            return x
+        dt, self.time = t - self.time, t
+        a = self.alpha(self.dCutoff, dt)
+        self.deriv = a * (x - self.value) / dt + (1 - a) * self.deriv
+        self.cutoff = self.minCutoff + self.beta * abs(self.deriv)
+        self.value += self.alpha(self.cutoff, dt) * (x - self.value)
+        return self.value
+
+
+def test_bank_matches_the_scalar_filter():
+    rng = np.random.default_rng(0)
+    bank = LandmarkFilterBank(maxHands=2)
+    references = [OneEuro() for _ in range(2 * 21 * 3)]
+    present = np.ones(2, dtype=bool)
+    raw = rng.random((2, 21, 3))
+    t = 0.0
+    for _ in range(60):
+        raw += rng.normal(0, 0.01, raw.shape)
+        t += rng.uniform(0.02, 0.05)  # uneven frame intervals
+        smoothed = bank.update(raw, present, t)
+        expected = [reference(x, t) for reference, x in zip(references, raw.ravel())]
+        np.testing.assert_allclose(smoothed.ravel(), expected, rtol=0, atol=1e-12)
+
+
+def test_constant_input_passes_through():
+    bank = LandmarkFilterBank(maxHands=1)
+    raw = np.random.default_rng(1).random((1, 21, 3))
+    for frame in range(30):
+        smoothed = bank.update(raw, np.ones(1, dtype=bool), frame / 30)
+    np.testing.assert_array_equal(smoothed, raw)
+    np.testing.assert_array_equal(bank.deriv, 0)
+
+
+def test_cutoff_rises_with_speed():
+    # a ramp lags its input by about speed / (2 pi cutoff): faster ramps must lag less per unit speed
+    lagPerSpeed, cutoff = {}, {}
+    for speed in (0.05, 2.0):
+        bank = LandmarkFilterBank(maxHands=1)
+        reference = OneEuro()
+        for frame in range(60):
+            t = frame / 30
+            smoothed = bank.update(np.full((1, 21, 3), speed * t), np.ones(1, dtype=bool), t)
+            reference(speed * t, t)
+        lagPerSpeed[speed] = (speed * t - smoothed[0, 0, 0]) / speed
+        cutoff[speed] = reference.cutoff
+    assert 1.5 < cutoff[0.05] < cutoff[2.0]
+    assert lagPerSpeed[2.0] < 0.5 * lagPerSpeed[0.05]
+
+
+def test_reappearing_hand_snaps_to_its_new_position():
+    bank = LandmarkFilterBank(maxHands=2)
+    both, first = np.ones(2, dtype=bool), np.array([True, False])
+    raw = np.zeros((2, 21, 3))
+    for frame in range(10):
+        bank.update(raw, both, frame / 30)
+    raw[1] = 0.8  # the second hand leaves and comes back elsewhere
+    bank.update(raw, first, 10 / 30)
+    assert not bank.active[1]
+    smoothed = bank.update(raw, both, 11 / 30)
+    np.testing.assert_array_equal(smoothed[1], 0.8)
+    np.testing.assert_array_equal(smoothed[0], 0.0)
+
+    bank.reset(0)
+    raw[0] = 0.3
+    np.testing.assert_array_equal(bank.update(raw, both, 12 / 30)[0], 0.3)
+
+
+def test_update_allocates_no_arrays():
+    bank = LandmarkFilterBank(maxHands=2)
+    raw = np.random.default_rng(2).random((2, 21, 3))
+    presents = [np.ones(2, dtype=bool), np.array([True, False])]
+    bank.update(raw, presents[0], 0.0)
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for frame in range(1, 500):
+            # a hand leaving and coming back every 100 frames takes the re-seeding path too
+            bank.update(raw, presents[(frame // 100) % 2], frame / 30)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # one (2, 21, 3) float array is 1008 bytes; Python floats and the mask key stay well below
+    assert peak - before < 1008
+    assert current - before < 256
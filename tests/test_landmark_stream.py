@@ -0,0 +1,106 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from Backends import RecordingBackend
+from LandmarkStream import HEADER, MAGIC, SCALE, VERSION, LandmarkCodec, LandmarkPublisher, StreamSource
+from Pipeline import PipelineHooks, runMode
+from Sources import RecordingSource
+
+LANDMARKS = np.random.default_rng(0).uniform(-0.1, 1.1, (2, 21, 3))
+PRESENT = np.array([True, False])
+HANDEDNESS = np.array([2, 0], dtype=np.uint8)
+
+
+@pytest.fixture
+def loopback():
+    """A subscriber on a free local port and a socket to send it raw packets."""
+    source = StreamSource(("127.0.0.1", 0), timeout=0.2)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    address = source.sock.getsockname()
+    codec = LandmarkCodec()
+
+    def send(seq, session=1):
+        sender.sendto(codec.encode(LANDMARKS, PRESENT, HANDEDNESS, (640, 480), seq, time.perf_counter(), session),
+                      address)
+
+    yield source, sender, send
+    source.release()
+    sender.close()
+
+
+def test_only_the_newest_packet_is_kept(loopback):
+    source, sender, send = loopback
+    for seq in (10, 5, 10):
+        send(seq)
+    sender.sendto(b"not a packet", source.sock.getsockname())
+    time.sleep(0.05)
+    ok, _, _ = source.read()
+    assert ok
+    assert source.counts["accepted"] == 1
+    assert source.counts["reordered"] == 2
+    assert source.counts["invalid"] == 1
+
+
+def test_landmarks_survive_quantization(loopback):
+    source, _, send = loopback
+    send(1)
+    time.sleep(0.05)
+    source.read()
+    landmarks, present, handedness = source.current()
+    assert present[0] and not present[1]
+    assert handedness[0] == 2
+    assert np.abs(landmarks[0] - LANDMARKS[0]).max() <= 0.5 / SCALE
+
+
+def test_restarted_publisher_starts_a_new_session(loopback):
+    source, _, send = loopback
+    send(10, session=1)
+    time.sleep(0.05)
+    source.read()
+    send(0, session=2)
+    send(1, session=2)
+    time.sleep(0.05)
+    source.read()
+    assert source.session == 2
+    assert source.lastSeq == 1
+
+
+def test_late_packet_is_dropped(loopback):
+    source, sender, send = loopback
+    send(1)
+    time.sleep(0.05)
+    source.read()
+    # sent a second ago while the baseline is well under a millisecond
+    codec = LandmarkCodec()
+    HEADER.pack_into(codec.buffer, 0, MAGIC, VERSION, 2, 1, 640, 480, 2, 0.0, time.perf_counter() - 1.0)
+    sender.sendto(codec.view, source.sock.getsockname())
+    time.sleep(0.05)
+    source.read()
+    assert source.counts["late"] == 1
+
+
+def test_streamed_mode_acts_like_the_local_one(clickSession):
+    path, onsets = clickSession
+    source = StreamSource(("127.0.0.1", 0), idleTimeout=1.0)
+    publisher = LandmarkPublisher(source.sock.getsockname())
+    localBackend = RecordingBackend()
+    streamBackend = RecordingBackend()
+
+    def publish():
+        time.sleep(0.5)  # let the subscriber's pipeline start first
+        runMode("gesture", source=RecordingSource(path, realtime=True), backend=localBackend,
+                settings={"cursorRate": 0}, hooks=PipelineHooks(recorder=publisher))
+
+    thread = threading.Thread(target=publish, daemon=True)
+    thread.start()
+    metrics = runMode("gesture", source=source, backend=streamBackend, settings={"cursorRate": 0})
+    thread.join()
+
+    assert metrics.frames == publisher.stats()["packets"]
+    assert localBackend.counts()["click"] == len(onsets)
+    assert streamBackend.counts() == localBackend.counts()
+    assert source.stats()["transit_p95_ms"] < 50
@@ -0,0 +1,127 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from Backends import RecordingBackend
+from ModeWorker import ModeWorker
+from Profiles import profilePath
+from Sources import RecordingSource
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_worker.py")
+
+
+def serve(recording, *commands):
+    """Run a worker in this process on a recording; the protocol events it sent."""
+    channel = io.StringIO()
+    worker = ModeWorker(channel)
+    for command in commands:  # the launcher's pipe stays open: no stop at the end
+        worker.commands.put(command)
+    backend = RecordingBackend()
+    code = worker.serve(source=RecordingSource(recording), backend=backend, show=False)
+    return code, [json.loads(line) for line in channel.getvalue().splitlines()], backend
+
+
+def test_runs_the_requested_mode(clickSession):
+    code, events, backend = serve(clickSession[0], {"run": "gesture", "requestedAt": time.time()})
+    assert code == 0
+    assert events[0] == {"started": "gesture"}
+    assert events[-1]["stopped"] == "gesture" and events[-1]["frames"] > 0
+    assert [e for e in backend.events if e[3] == "click"]
+
+
+def test_refuses_unknown_modes_and_invalid_profiles(clickSession):
+    code, events, _ = serve(clickSession[0], {"run": "juggling"})
+    assert code == 2 and "unknown mode" in events[-1]["error"]
+
+    with open(profilePath("gesture"), "w") as f:
+        json.dump({"settings": {"smoothening": "fast"}}, f)
+    code, events, _ = serve(clickSession[0], {"run": "gesture"})
+    assert code == 2 and "profile is invalid" in events[-1]["error"]
+
+
+def test_stop_before_a_run_exits(clickSession):
+    code, events, _ = serve(clickSession[0], {"warmCamera": [640, 480]}, {"stop": True})
+    assert code == 0 and events == []
+
+
+class Worker():
+    """A ModeWorker spawned the way the launcher does, replaying a recording in real time (replay_worker.py)."""
+
+    def __init__(self, recording, cold=False):
+        flags = ["--cold"] if cold else []
+        self.process = subprocess.Popen([sys.executable, SCRIPT, recording, *flags],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+
+    def send(self, **message):
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+
+    def until(self, key):
+        """Events up to the first one holding key; the key's value, or None if the worker exited."""
+        for line in self.process.stdout:
+            event = json.loads(line)
+            if key in event:
+                return event[key]
+        return None
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+
+
+@pytest.fixture
+def workers():
+    spawned = []
+    yield lambda recording, cold=False: spawned.append(Worker(recording, cold)) or spawned[-1]
+    for worker in spawned:
+        worker.close()
+
+
+def test_warm_spare_starts_faster_than_a_cold_worker(clickSession, workers):
+    # cold: what a click used to cost, spawn to first frame with nothing imported ahead
+    cold = workers(clickSession[0], cold=True)
+    cold.send(run="gesture", requestedAt=time.time())
+    coldMs = cold.until("firstFrame_ms")
+
+    # warm: the spare was spawned earlier and is waiting
+    warm = workers(clickSession[0])
+    assert warm.until("ready") is not None
+    warm.send(run="gesture", requestedAt=time.time())
+    warmMs = warm.until("firstFrame_ms")
+    assert coldMs is not None and warmMs is not None
+    assert warmMs < coldMs / 2
+
+    # graceful stop: the worker leaves the mode, reports and exits by itself
+    warm.send(stop=True)
+    assert warm.until("stopped") == "gesture"
+    assert warm.process.wait(10) == 0
+
+
+def test_idle_spare_exits_with_the_launcher(clickSession, workers):
+    idle = workers(clickSession[0])
+    assert idle.until("ready") is not None
+    idle.process.stdin.close()
+    assert idle.process.wait(10) == 0
+
+
+def test_failed_start_reports_and_frees_the_hooks(clickSession, monkeypatch):
+    import Pipeline
+
+    def failingDetector(settings, source):
+        raise RuntimeError("no detector")
+
+    closed = []
+    close = Pipeline.PipelineHooks.close
+    monkeypatch.setattr(Pipeline, "createDetector", failingDetector)
+    monkeypatch.setattr(Pipeline.PipelineHooks, "close", lambda hooks: closed.append(hooks) or close(hooks))
+    with pytest.raises(RuntimeError):
+        serve(clickSession[0], {"run": "gesture"})
+    assert len(closed) == 1
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from Backends import RecordingBackend
+from DetectorBackends import scriptFromRecording
+from MultiCamera import CameraCalibration, calibrate, loadCalibrations, saveCalibrations, simulatedCameras
+from Pipeline import runMode
+from Sources import RecordingSource
+
+
+def test_fit_recovers_a_mirrored_affine_map():
+    truth = CameraCalibration([[-0.9, 0.05, 0.95], [0.02, 0.9, 0.06]])
+    points = np.random.default_rng(0).uniform(0, 1, (50, 2))
+    reference = truth.apply(np.c_[points, np.zeros(50)][None], np.zeros((1, 50, 3)))[0, :, :2]
+    calibration, error = CameraCalibration.fit(points, reference)
+    np.testing.assert_allclose(calibration.matrix, truth.matrix, atol=1e-6)
+    assert error < 1e-6
+    assert calibration.mirrored and not CameraCalibration().mirrored
+
+
+def test_calibrations_round_trip():
+    assert loadCalibrations() == {}
+    saveCalibrations({"camera:1": CameraCalibration([[1, 0, 0.1], [0, 1, 0.2]])}, errors={"camera:1": 0.01})
+    loaded = loadCalibrations()
+    np.testing.assert_allclose(loaded["camera:1"].matrix, [[1, 0, 0.1], [0, 1, 0.2]])
+
+
+@pytest.fixture
+def cameras(clickSession):
+    return simulatedCameras(clickSession[0])
+
+
+def test_calibration_is_recovered_from_both_views(cameras):
+    openPair, truth = cameras
+    calibration, error = calibrate(openPair(None))[1]
+    assert np.abs(calibration.matrix - truth.matrix).max() < 1e-3
+    assert error < 1e-3
+
+
+def test_fusion_covers_each_cameras_dropouts(clickSession, cameras):
+    openPair, truth = cameras
+    source = openPair([None, truth])
+    fused = RecordingBackend()
+    runMode("gesture", source=source, backend=fused, settings={"cursorRate": 0})
+    stats = source.stats()
+
+    script = scriptFromRecording(clickSession[0])
+    ownLoss = sum(1 for hands in script if not hands) / len(script)
+    assert stats["fusedLoss"] == pytest.approx(ownLoss)
+    assert min(stats["cameraLoss"]) > stats["fusedLoss"]
+    replayed = RecordingBackend()
+    runMode("gesture", source=RecordingSource(clickSession[0]), backend=replayed, settings={"cursorRate": 0})
+    assert fused.counts() == replayed.counts()
@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+
+from Overlay import FrameOverlay, OverlayCompositor
+
+W, H = 640, 480
+
+
+def annotate(gfx, img, fps):
+    # a gesture-mode frame: the frameR box and mode label stay put, the tip and the FPS value move
+    gfx.rectangle(img, (100, 100), (W - 100, H - 100), (255, 0, 255), 2)
+    gfx.putText(img, "Scroll Mode", (20, 60), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
+    gfx.putText(img, str(fps), (20, 30), cv2.FONT_HERSHEY_PLAIN, 2, (255, 0, 0), 2)
+    gfx.circle(img, (300 + fps, 240), 15, (255, 0, 255), cv2.FILLED)
+    gfx.line(img, (300, 200), (350 + fps, 260), (255, 0, 255), 3)
+
+
+def recorded(fps, overlay=None):
+    overlay = overlay or FrameOverlay()
+    img = np.zeros((H, W, 3), dtype=np.uint8)
+    overlay.begin(img)
+    annotate(overlay, img, fps)
+    return overlay
+
+
+def test_composited_frames_match_direct_drawing():
+    compositor = OverlayCompositor()
+    overlay = FrameOverlay()
+    for fps in (30, 30, 31, 30, 29):
+        direct = np.zeros((H, W, 3), dtype=np.uint8)
+        annotate(cv2, direct, fps)
+        out = compositor.render(np.zeros((H, W, 3), dtype=np.uint8), recorded(fps, overlay))
+        assert np.array_equal(out, direct)
+    # frame 2 caches box, label and "30"; frame 3 box and label, which frames 4 and 5 reuse
+    assert compositor.misses == 2
+    assert compositor.hits == 2
+
+
+def test_first_sight_of_an_op_is_drawn_directly():
+    compositor = OverlayCompositor()
+    compositor.render(np.zeros((H, W, 3), dtype=np.uint8), recorded(30))
+    assert compositor.misses == 0 and not compositor.layers
+
+
+def test_static_layer_cache_evicts_the_least_recently_used():
+    compositor = OverlayCompositor(cacheSize=2)
+    out = np.zeros((120, 160, 3), dtype=np.uint8)
+
+    def show(label, times=2):
+        for _ in range(times):
+            overlay = FrameOverlay()
+            overlay.begin(np.zeros((H, W, 3), dtype=np.uint8))
+            overlay.putText(None, label, (20, 60), cv2.FONT_HERSHEY_PLAIN, 2, (0, 255, 0), 2)
+            compositor.render(out, overlay)
+
+    def labels():
+        return [ops[0][1][0] for _, _, ops in compositor.layers]
+
+    show("Scroll Mode")
+    show("Dragging...")
+    show("Scroll Mode")  # a hit moves it to the back of the queue
+    assert (compositor.hits, compositor.misses) == (1, 2)
+    show("Zoom")
+    assert labels() == ["Scroll Mode", "Zoom"]
+    show("Dragging...")
+    assert compositor.misses == 4
+    assert labels() == ["Zoom", "Dragging..."]
+
+
+def test_layers_are_keyed_by_output_size():
+    compositor = OverlayCompositor()
+    overlay = recorded(30)
+    compositor.render(np.zeros((240, 320, 3), dtype=np.uint8), overlay)
+    compositor.render(np.zeros((240, 320, 3), dtype=np.uint8), overlay)
+    compositor.render(np.zeros((H, W, 3), dtype=np.uint8), overlay)
+    assert compositor.misses == 2 and len(compositor.layers) == 2
+    # half scale: the box lands at half the frame coordinates
+    out = compositor.render(np.zeros((240, 320, 3), dtype=np.uint8), overlay)
+    assert out[50, 160].tolist() == [255, 0, 255]
@@ -0,0 +1,56 @@
+import pytest
+
+import Pipeline
+from Backends import RecordingBackend
+from Pipeline import PipelineHooks, runMode
+from Sources import RecordingSource
+
+
+class TrackedSource(RecordingSource):
+    def __init__(self, path):
+        super().__init__(path)
+        self.releases = 0
+
+    def release(self):
+        self.releases += 1
+
+
+def failingDetector(settings, source):
+    raise RuntimeError("no detector")
+
+
+def test_source_is_released_when_the_mode_fails_to_start(clickSession, monkeypatch):
+    monkeypatch.setattr(Pipeline, "createDetector", failingDetector)
+    source = TrackedSource(clickSession[0])
+    with pytest.raises(RuntimeError):
+        runMode("gesture", source=source, backend=RecordingBackend())
+    assert source.releases == 1
+
+
+def test_hooks_close_the_hand_state_once():
+    hooks = PipelineHooks.forLaunch("gesture")
+    handState = hooks.handState
+    assert handState is not None
+    hooks.close()
+    hooks.close()
+    assert hooks.handState is None and handState.map.closed
+
+
+def test_launcher_mode_frees_camera_and_hooks_when_it_fails_to_start(clickSession, monkeypatch):
+    from mode_runners import ModeRunner
+    from Warmup import prewarmer
+
+    source = TrackedSource(clickSession[0])
+    launched = []
+    forLaunch = PipelineHooks.forLaunch.__func__
+    monkeypatch.setattr(PipelineHooks, "forLaunch",
+                        classmethod(lambda cls, *args, **kwargs: launched.append(forLaunch(cls, *args, **kwargs))
+                                    or launched[-1]))
+    monkeypatch.setattr(prewarmer, "takeDetector", lambda settings: None)
+    monkeypatch.setattr(prewarmer, "takeCamera", lambda *args, **kwargs: source)
+    monkeypatch.setattr(prewarmer, "returnDetector", lambda detector: None)
+    monkeypatch.setattr(Pipeline, "createDetector", failingDetector)
+
+    ModeRunner().run_mode("gesture")
+    assert source.releases == 1
+    assert launched and launched[0].handState is None
@@ -0,0 +1,80 @@
+import numpy as np
+
+from Overlay import FrameOverlay
+from Preview import PreviewChannel
+
+
+def frame(value, size=(480, 640)):
+    return np.full(size + (3,), value, dtype=np.uint8)
+
+
+def test_hidden_preview_is_never_due():
+    preview = PreviewChannel()
+    assert not preview.due(100.0)
+    preview.setVisible(True)
+    assert preview.due(100.0)
+    preview.setVisible(False)
+    assert not preview.due(200.0)
+
+
+def test_rate_cap_limits_published_frames():
+    preview = PreviewChannel(maxFps=8)
+    preview.setVisible(True)
+    # a 32 fps pipeline running for 3 s publishes every fourth frame
+    published = []
+    for i in range(96):
+        now = 100.0 + i / 32
+        if preview.due(now):
+            preview.publish(frame(i), now)
+            published.append(i)
+    assert published == list(range(0, 96, 4))
+    assert preview.published == 24
+    assert not preview.due(preview.lastPublish + 0.12)
+    assert preview.due(preview.lastPublish + 0.125)
+
+
+def test_full_channel_drops_the_oldest_frame():
+    preview = PreviewChannel(maxFrames=2)
+    preview.setVisible(True)
+    for value in (10, 20, 30):
+        preview.publish(frame(value), 0.0)
+    assert preview.dropped == 1
+    assert [int(f[0, 0, 0]) for f in preview.frames] == [20, 30]
+    # the viewer takes the newest and the one it skipped counts as dropped too
+    assert int(preview.latest()[0, 0, 0]) == 30
+    assert preview.dropped == 2
+    assert preview.latest() is None
+
+
+def test_published_frames_are_small_copies():
+    preview = PreviewChannel(width=320)
+    preview.setVisible(True)
+    img = frame(50)
+    preview.publish(img, 0.0)
+    small = preview.latest()
+    assert small.shape == (240, 320, 3)
+    small[:] = 0
+    assert img[0, 0, 0] == 50
+
+
+def test_overlay_is_drawn_onto_the_small_copy():
+    preview = PreviewChannel(width=320)
+    preview.setVisible(True)
+    img = frame(0)
+    overlay = FrameOverlay()
+    overlay.begin(img)
+    overlay.circle(img, (320, 240), 20, (0, 255, 0), FrameOverlay.FILLED)
+    preview.publish(img, 0.0, overlay)
+    small = preview.latest()
+    # the full-size circle at the centre lands, halved, at the centre of the preview
+    assert small[120, 160].tolist() == [0, 255, 0]
+    assert small[120, 160 + 15].tolist() == [0, 0, 0]
+    assert not img.any()
+
+
+def test_hiding_discards_queued_frames():
+    preview = PreviewChannel()
+    preview.setVisible(True)
+    preview.publish(frame(1), 0.0)
+    preview.setVisible(False)
+    assert preview.latest() is None
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+from Backends import RecordingBackend
+from Pipeline import PipelineHooks, runMode
+from Profiles import ProfileError, ProfileWatcher, loadModeSettings, validate
+from Sources import RecordingSource
+
+
+@pytest.mark.parametrize("bad", [{"frameR": -5}, {"smoothening": "fast"}, {"nope": 1}, {"closeKeys": []},
+                                 {"cursorTarget": "left"}, {"asyncInference": 1}])
+def test_invalid_settings_are_rejected(bad):
+    with pytest.raises(ProfileError):
+        validate("gesture", bad)
+
+
+def test_profile_overrides_defaults_and_overrides_win(tmp_path):
+    path = tmp_path / "gesture.json"
+    path.write_text(json.dumps({"settings": {"smoothening": 5, "clickDistance": 24}}))
+    settings = loadModeSettings("gesture", str(path), calibrated=False, overrides={"clickDistance": 30})
+    assert settings["smoothening"] == 5
+    assert settings["clickDistance"] == 30
+    assert loadModeSettings("gesture", str(tmp_path / "missing.json"), calibrated=False) == \
+        loadModeSettings("gesture", calibrated=False)
+
+
+def holdingPinch(path, n=180):
+    """A hand holding a pinch 40 px wide: clicks only once clickDistance grows past the gap."""
+    landmarks = np.zeros((n, 1, 21, 3), dtype=np.float32)
+    landmarks[:, 0, :, 0] = 0.5
+    landmarks[:, 0, :, 1] = np.linspace(0.9, 0.3, 21)  # fingers up, thumb tip above its joint
+    landmarks[:, 0, 12, 0] = 0.5 + 40 / 640  # middle tip 40 px from the index tip
+    landmarks[:, 0, [8, 12], 1] = landmarks[:, 0, 10, 1, None] - 0.05  # index and middle up, tips level
+    landmarks[:, 0, 16, 1] = landmarks[:, 0, 14, 1] + 0.05  # ring and pinky down
+    landmarks[:, 0, 20, 1] = landmarks[:, 0, 18, 1] + 0.05
+    np.savez_compressed(path, timestamps=np.arange(n) / 30.0, landmarks=landmarks,
+                        present=np.ones((n, 1), dtype=bool), handedness=np.full((n, 1), 2, dtype=np.uint8),
+                        frameSize=np.array([640, 480]))
+    return path
+
+
+def test_profile_is_hot_reloaded_between_frames(tmp_path):
+    recording = holdingPinch(str(tmp_path / "pinch.npz"))
+    path = tmp_path / "gesture.json"
+    path.write_text(json.dumps({"settings": {"clickDistance": 20}}))
+    watcher = ProfileWatcher("gesture", str(path), calibrated=False, overrides={"cursorRate": 0}, interval=0)
+
+    class EditingBackend(RecordingBackend):
+        # the user saves the profile while the mode runs: first a half-written file, then the edit
+        def beginFrame(self, frame, frameTime):
+            super().beginFrame(frame, frameTime)
+            if frame == 60:
+                path.write_text('{"settings": {"clickDistance": ')
+            elif frame == 75:
+                path.write_text(json.dumps({"settings": {"clickDistance": 60, "wCam": 320}}))
+
+    backend = EditingBackend()
+    runMode("gesture", source=RecordingSource(recording), backend=backend, settings=watcher.settings,
+            hooks=PipelineHooks(profile=watcher))
+    clicks = [event[0] for event in backend.events if event[3] == "click"]
+    assert watcher.settings["clickDistance"] == 60
+    assert watcher.settings["wCam"] == 640  # restart-only: held back until the mode starts again
+    assert clicks and clicks[0] >= 75
+    assert watcher.reloads == 1  # the half-written file was ignored, not applied
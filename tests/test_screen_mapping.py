@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from ScreenMapping import CursorMapper, targetRect
+
+CAM = (640, 480)
+FRAME_R = 100
+# primary, a taller monitor to its right and raised, one to the left of the primary
+LAYOUT = [(0, 0, 1920, 1080), (1920, -200, 1280, 1024), (-1600, 100, 1600, 900)]
+
+
+def interpMapping(x, y, rect, frameR=FRAME_R, camSize=CAM):
+    """The mapping the modes used before CursorMapper, shifted onto the target rectangle."""
+    tx, ty, tw, th = rect
+    wCam, hCam = camSize
+    x3 = np.interp(x, (frameR, wCam - frameR), (0, tw))
+    y3 = np.interp(y, (frameR, hCam - frameR), (0, th))
+    return tx + tw - x3, ty + y3
+
+
+def mapperFor(target, layout=LAYOUT, **kwargs):
+    return CursorMapper(CAM, frameR=FRAME_R, target=target, layoutFunc=lambda: layout,
+                        signatureFunc=lambda: None, **kwargs)
+
+
+@pytest.mark.parametrize("target", ["primary", "virtual", 1, 2])
+def test_map_matches_interp_inside_the_region(target):
+    mapper = mapperFor(target)
+    rect = targetRect(LAYOUT, target)
+    rng = np.random.default_rng(0)
+    for x, y in rng.uniform((FRAME_R + 1, FRAME_R + 1), (CAM[0] - FRAME_R - 1, CAM[1] - FRAME_R - 1), (200, 2)):
+        assert mapper.map(x, y) == pytest.approx(interpMapping(x, y, rect))
+
+
+@pytest.mark.parametrize("target", ["primary", "virtual", 1, 2])
+def test_map_clamps_outside_the_region_onto_the_target(target):
+    mapper = mapperFor(target)
+    tx, ty, tw, th = rect = targetRect(LAYOUT, target)
+    for x in range(0, CAM[0] + 1, 20):
+        for y in range(0, CAM[1] + 1, 20):
+            mx, my = mapper.map(x, y)
+            assert tx <= mx <= tx + tw - 1 and ty <= my <= ty + th - 1
+            # interp clamps to the far edge itself; the mapper stops on the last pixel
+            assert (mx, my) == pytest.approx(interpMapping(x, y, rect), abs=1)
+
+
+def test_virtual_target_spans_every_monitor():
+    assert targetRect(LAYOUT, "virtual") == (-1600, -200, 4800, 1280)
+    mapper = mapperFor("virtual")
+    # mirrored: the left edge of the region is the right edge of the desktop
+    assert mapper.map(FRAME_R, FRAME_R) == (3199, -200)
+    assert mapper.map(CAM[0] - FRAME_R, CAM[1] - FRAME_R) == (-1600, 1079)
+
+
+def test_unplugged_monitor_falls_back_to_the_primary():
+    assert targetRect(LAYOUT[:1], 2) == LAYOUT[0]
+
+
+def test_keep_aspect_uses_one_gain_for_both_axes():
+    mapper = mapperFor("primary", keepAspect=True)
+    x0, y0 = mapper.map(320, 240)
+    x1, y1 = mapper.map(330, 250)
+    assert (x0, y0) == pytest.approx((960, 540))
+    assert x0 - x1 == pytest.approx(y1 - y0)
+
+
+def test_layout_change_rebuilds_the_mapping():
+    layouts = {"one": LAYOUT[:1], "two": LAYOUT[:2]}
+    current = ["one"]
+    mapper = CursorMapper(CAM, frameR=FRAME_R, target="virtual", layoutPollInterval=0,
+                          layoutFunc=lambda: layouts[current[0]], signatureFunc=lambda: current[0])
+    assert not mapper.update(*CAM)
+    assert mapper.bounds == (0, 0, 1920, 1080)
+    current[0] = "two"
+    assert mapper.update(*CAM)
+    assert mapper.bounds == (0, -200, 3200, 1080)
+    assert mapper.update(1280, 720)
+    assert mapper.map(FRAME_R, FRAME_R) == (3199, -200)
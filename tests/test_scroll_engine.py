@@ -0,0 +1,81 @@
+import pytest
+
+from ScrollEngine import ScrollEngine
+
+
+def run(engine, start, seconds, rate=120, refresh=None):
+    """Tick at rate for seconds; refresh re-sends the velocity every tick, as the camera loop does."""
+    for i in range(round(seconds * rate)):
+        now = start + i / rate
+        if refresh is not None:
+            engine.setVelocity(refresh, now)
+        engine.tick(now)
+    return start + round(seconds * rate) / rate
+
+
+def test_slow_speeds_accumulate_instead_of_truncating():
+    sent = []
+    engine = ScrollEngine(sent.append, emitRate=20)
+    # 3 units/s is 0.025 per 120 Hz tick and 0.15 per emit interval: never a whole unit at once
+    run(engine, 0.0, 2.0, refresh=3.0)
+    assert sent == [1] * len(sent)
+    assert sum(sent) + engine.accum == pytest.approx(3.0 * (2.0 - 1 / 120))
+
+
+@pytest.mark.parametrize("velocity", [-37.5, 12.3, 450])
+def test_no_fractional_ticks_are_lost(velocity):
+    sent = []
+    engine = ScrollEngine(sent.append, emitRate=20)
+    end = run(engine, 0.0, 3.0, refresh=velocity)
+    assert sum(sent) + engine.accum == pytest.approx(velocity * (3.0 - 1 / 120))
+    # once the finger stops, the whole units still pending go out and less than one is kept
+    engine.setVelocity(0.0, end)
+    run(engine, end, 0.1)
+    assert sum(sent) == pytest.approx(velocity * (3.0 - 1 / 120), abs=1)
+    assert abs(engine.accum) < 1
+
+
+def test_emits_at_most_once_per_interval():
+    now, emitted = [0.0], []
+    engine = ScrollEngine(lambda units: emitted.append((now[0], units)), emitRate=20)
+    for i in range(120):
+        now[0] = i / 120
+        engine.setVelocity(450, now[0])
+        engine.tick(now[0])
+    times = [t for t, _ in emitted]
+    assert engine.eventCount == len(emitted) <= 20
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.05 - 1e-9
+    # each event coalesces the ~22.5 units of one 50 ms interval, or of the 58 ms a late tick makes
+    assert all(22 <= units <= 27 for _, units in emitted[1:])
+
+
+def test_stale_velocity_stops_after_the_timeout():
+    sent = []
+    engine = ScrollEngine(sent.append, emitRate=20, timeout=0.25)
+    engine.setVelocity(100, 0.0)
+    end = run(engine, 0.0, 1.0)
+    # only the 0.25 s before the timeout scrolls
+    assert engine.velocity == 0.0
+    assert sum(sent) + engine.accum == pytest.approx(25, abs=1)
+    count = len(sent)
+    run(engine, end, 1.0)
+    assert len(sent) == count
+
+
+def test_release_drops_the_remainder():
+    sent = []
+    engine = ScrollEngine(sent.append, emitRate=20)
+    run(engine, 0.0, 0.04, refresh=10.0)
+    assert 0 < engine.accum < 1
+    engine.release()
+    run(engine, 0.04, 1.0)
+    assert sent == [] and engine.accum == 0.0
+
+
+def test_velocity_follows_finger_height():
+    engine = ScrollEngine(lambda units: None, maxSpeed=450, curve=1.5)
+    assert engine.velocityFor(100, 100, 380) == 450
+    assert engine.velocityFor(380, 100, 380) == -450
+    assert engine.velocityFor(240, 100, 380) == 0
+    assert engine.velocityFor(0, 100, 380) == 450
+    assert engine.velocityFor(170, 100, 380) == pytest.approx(450 * 0.5 ** 1.5)
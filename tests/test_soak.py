@@ -0,0 +1,70 @@
+import pytest
+
+from Soak import analyze, parseDuration
+
+LIMITS = {"rssGrowthMB": 50.0, "heapGrowthMB": 20.0, "threadGrowth": 2, "latencyDrift": 0.25,
+          "minLatencyDelta_ms": 0.5}
+
+
+def samples(count=40, interval=60.0, rss=lambda i: 300.0, heap=lambda i: 40.0, threads=lambda i: 12,
+            fps=lambda i: 30.0, detect=lambda i: 12.0, control=lambda i: 0.2):
+    """One sample per interval, as SoakSampler.sample() records them."""
+    return [{"t": i * interval, "frames": 1000 * (i + 1), "rssMB": rss(i), "heapMB": heap(i),
+             "threads": threads(i), "fps": fps(i),
+             "stageMeans_ms": {"detect": detect(i), "control": control(i)}} for i in range(count)]
+
+
+def test_steady_run_passes():
+    failures, stats = analyze(samples(), warmup=300, limits=LIMITS)
+    assert failures == []
+    assert stats["rssGrowthMB"] == 0 and stats["latencyDrift"] == {}
+
+
+def test_rss_growth_trend_fails():
+    # 2 MB a minute: the last quarter of the 35 steady samples sits 27 minutes after the first
+    failures, stats = analyze(samples(rss=lambda i: 300.0 + 2 * i), warmup=300, limits=LIMITS)
+    assert stats["rssGrowthMB"] == pytest.approx(2 * 27)
+    assert stats["rssSlopeMBPerHour"] == pytest.approx(120)
+    assert failures == ["RSS grew 54.0 MB (limit 50.0 MB)"]
+
+
+def test_growth_during_warmup_is_ignored():
+    run = samples(rss=lambda i: 100.0 + 40 * min(i, 5), heap=lambda i: 10.0 * min(i, 8))
+    assert analyze(run, warmup=300, limits=LIMITS)[0] == []
+    assert len(analyze(run, warmup=0, limits=LIMITS)[0]) == 2
+
+
+def test_heap_and_thread_growth_fail():
+    failures, _ = analyze(samples(heap=lambda i: 40.0 + i, threads=lambda i: 12 + i // 10),
+                          warmup=0, limits=LIMITS)
+    assert [f.split()[0] for f in failures] == ["Python", "thread"]
+
+
+def test_latency_drift_needs_a_real_slowdown():
+    # +100% on a 0.2 ms stage is timer noise; +30% on detection is not
+    failures, stats = analyze(samples(detect=lambda i: 12.0 if i < 20 else 15.6,
+                                      control=lambda i: 0.2 if i < 20 else 0.4),
+                              warmup=0, limits=LIMITS)
+    assert stats["latencyDrift"] == {"detect": pytest.approx(0.3)}
+    assert failures == ["detect latency drifted +30% (limit 25%)"]
+
+
+def test_falling_fps_fails():
+    failures, _ = analyze(samples(fps=lambda i: 30.0 if i < 20 else 20.0), warmup=0, limits=LIMITS)
+    assert failures == ["fps fell from 30.0 to 20.0"]
+
+
+def test_too_few_samples_is_a_failure():
+    failures, stats = analyze(samples(count=6), warmup=180, limits=LIMITS)
+    assert failures and stats == {}
+
+
+def test_final_sample_is_left_out():
+    run = samples()
+    run.append(dict(run[-1], t=run[-1]["t"] + 5, rssMB=900.0, final=True))
+    assert analyze(run, warmup=300, limits=LIMITS)[0] == []
+
+
+@pytest.mark.parametrize("text, seconds", [("4h", 14400), ("30m", 1800), ("90s", 90), ("600", 600)])
+def test_parse_duration(text, seconds):
+    assert parseDuration(text) == seconds
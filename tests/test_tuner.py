@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from Tuner import actionKey, cursorJitter, cursorLag, matchEvents, recommend
+
+
+def test_actions_match_within_tolerance_once_each():
+    labels = [(10, "click"), (30, "click"), (50, actionKey("hotkey", ("ctrl", "w")))]
+    predicted = [(12, "click"), (13, "click"), (29, "mouseDown"), (55, "hotkey:ctrl+w"), (90, "click")]
+    # 12 takes the label at 10; 13 finds it used and 30 out of reach; the hotkey is 5 frames late
+    assert matchEvents(predicted, labels, tolerance=5) == (2, 5, 3)
+    assert matchEvents(predicted, labels, tolerance=4) == (1, 5, 3)
+    assert matchEvents([(29, "click"), (31, "click")], [(30, "click")], tolerance=5) == (1, 2, 1)
+    assert actionKey("press", ["right"]) != actionKey("press", ["left"])
+
+
+def test_jitter_is_zero_for_steady_motion():
+    assert cursorJitter([(i * 3.0, 100 - i * 2.0) for i in range(20)]) == 0.0
+    assert cursorJitter([(0, 0), (1, 0)]) == 0.0
+    # a 1 px wobble: second differences of -2 and +2 px
+    assert cursorJitter([(0, 0), (1, 0), (0, 0), (1, 0)]) == pytest.approx(2.0)
+
+
+def smoothedTrace(s, frames=400, seed=0):
+    """A wandering raw tip and the cursor exponential smoothing by 1/s makes of it on screen."""
+    rng = np.random.default_rng(seed)
+    tips = np.cumsum(rng.normal(0, 0.004, (frames, 2)), axis=0) + 0.5
+    moves, cursor = {}, None
+    for frame, (x, y) in enumerate(tips):
+        target = np.array([1920 * (1 - x), 1080 * y])  # mirrored and scaled, as the mapper does
+        cursor = target if cursor is None else cursor + (target - cursor) / s
+        moves[frame] = tuple(cursor)
+    return [tuple(tip) for tip in tips], moves
+
+
+@pytest.mark.parametrize("s", [1, 3, 5])
+def test_lag_of_exponential_smoothing_is_s_minus_one_frames(s):
+    tips, moves = smoothedTrace(s)
+    assert cursorLag(tips, moves) == pytest.approx(s - 1, abs=0.05)
+
+
+def test_lag_needs_enough_frames_with_a_hand():
+    tips, moves = smoothedTrace(3, frames=80)
+    assert cursorLag(tips, moves) is None
+    tips, moves = smoothedTrace(3)
+    tips[::20] = [None] * len(tips[::20])  # a hand lost every 20 frames leaves no full window
+    assert cursorLag(tips, moves) is None
+
+
+def result(f1, frameMs, jitter):
+    return {"f1": f1, "frame_ms": frameMs, "jitter_px": jitter, "settings": {}}
+
+
+def test_recommend_takes_the_cheapest_setting_near_the_best():
+    results = [result(0.95, 2.0, 1.0), result(0.94, 1.0, 3.0), result(0.94, 1.0, 2.0), result(0.8, 0.5, 0.1)]
+    assert recommend(results, 0.02) is results[2]
+    assert recommend(results, 0.0) is results[0]
+    assert recommend([], 0.02) is None
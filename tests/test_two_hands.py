@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+import HandTrackingModule as htm
+from AirTap import _TEMPLATE
+from Backends import RecordingBackend
+from Pipeline import runMode
+from Sources import HANDEDNESS_CODES, RecordingSource
+
+POINT = np.zeros((21, 3))
+POINT[:, :2] = _TEMPLATE  # index up, the other fingers curled; hand sizes, y down
+PINCH = POINT.copy()
+PINCH[4, :2] = POINT[8, :2] + (0.1, 0.0)  # thumb tip against the index tip
+PALM = POINT.copy()
+for finger in (9, 13, 17):  # middle, ring and pinky straightened like the index
+    PALM[finger + 1:finger + 4, 0] = POINT[finger, 0]
+    PALM[finger + 1:finger + 4, 1] = POINT[finger, 1] - np.array([0.35, 0.6, 0.8])
+
+
+def place(pose, x, y, size=0.15):
+    """A pose in hand sizes at wrist (x, y), in normalized 4:3 frame coordinates."""
+    hand = pose.copy()
+    hand[:, 0] = x + pose[:, 0] * size * 0.75
+    hand[:, 1] = y + pose[:, 1] * size
+    return hand
+
+
+def twoHands(path, frames):
+    """Write a recording from frames: per frame a list of (label, landmarks) in detector order."""
+    n = len(frames)
+    landmarks = np.zeros((n, 2, 21, 3), dtype=np.float32)
+    present = np.zeros((n, 2), dtype=bool)
+    handedness = np.zeros((n, 2), dtype=np.uint8)
+    for i, hands in enumerate(frames):
+        for slot, (label, hand) in enumerate(hands):
+            landmarks[i, slot], present[i, slot], handedness[i, slot] = hand, True, HANDEDNESS_CODES[label]
+    np.savez_compressed(path, timestamps=np.arange(n) / 30.0, landmarks=landmarks, present=present,
+                        handedness=handedness, frameSize=np.array([640, 480]))
+    return str(path)
+
+
+def tracks(path):
+    """Per frame: {label: (track id, slot, wrist x)} of the tracked hands, and the pointer hand's label."""
+    source = RecordingSource(path)
+    detector = htm.replayDetector(source, maxHands=2)
+    seen = []
+    while True:
+        success, img, timestamp = source.read()
+        if not success:
+            break
+        detector.findHands(img, draw=False, timestamp=timestamp)
+        hands = {detector.handedness[slot]: (int(detector.trackIds[slot]), slot, detector.rawLandmarks[slot, 0, 0])
+                 for slot in detector.handOrder}
+        pointer = detector.handedness[detector.handOrder[0]] if detector.handOrder else None
+        seen.append((hands, pointer))
+    return seen
+
+
+def test_crossing_hands_keep_their_ids(tmp_path):
+    frames = []
+    for i in range(60):
+        u = i / 59
+        right = ("Right", place(POINT, 0.3 + 0.4 * u, 0.7))
+        left = ("Left", place(POINT, 0.7 - 0.4 * u, 0.75))
+        # the detector lists the hands in no particular order
+        frames.append([right, left] if i % 3 else [left, right])
+    seen = tracks(twoHands(tmp_path / "crossing.npz", frames))
+
+    first, _ = seen[0]
+    for i, (hands, pointer) in enumerate(seen):
+        u = i / 59
+        assert {label: ids[:2] for label, ids in hands.items()} == {label: ids[:2] for label, ids in first.items()}
+        assert hands["Right"][2] == pytest.approx(0.3 + 0.4 * u, abs=1e-6)
+        assert pointer == seen[0][1]  # the hand tracked longest keeps the cursor
+
+
+def test_dropped_hand_frees_its_slot(tmp_path):
+    frames = []
+    for i in range(90):
+        hands = [("Right", place(POINT, 0.35, 0.7))]
+        # the left hand blinks out for 5 frames, then leaves for a second
+        if not (20 <= i < 25 or 40 <= i < 70):
+            hands.append(("Left", place(POINT, 0.65, 0.7)))
+        frames.append(hands)
+    seen = tracks(twoHands(tmp_path / "dropout.npz", frames))
+
+    right, left = seen[0][0]["Right"][0], seen[0][0]["Left"][0]
+    assert all(hands["Right"][0] == right and pointer == "Right" for hands, pointer in seen)
+    assert seen[30][0]["Left"][0] == left  # a short dropout keeps the id
+    assert "Left" not in seen[50][0]
+    assert seen[80][0]["Left"][0] not in (left, right)  # back after the timeout: a new hand
+
+
+def pinchSession(path, auxPoses, pointerPoses=None):
+    frames = []
+    for i, aux in enumerate(auxPoses):
+        pointer = POINT if pointerPoses is None else pointerPoses[i]
+        frames.append([("Right", place(pointer, 0.35 + 0.002 * i, 0.7)), ("Left", place(aux, 0.7, 0.7))])
+    return twoHands(path, frames)
+
+
+def buttonEvents(path):
+    backend = RecordingBackend()
+    runMode("gesture", source=path, backend=backend, settings={"cursorRate": 0})
+    return [(frame, action) for frame, _, _, action, _ in backend.events if action in ("mouseDown", "mouseUp")]
+
+
+def test_second_hand_pinch_drags(tmp_path):
+    # the pointer hand keeps moving the cursor while the other hand pinches frames 20-39
+    poses = [PINCH if 20 <= i < 40 else POINT for i in range(60)]
+    (down, pressed), (up, released) = buttonEvents(pinchSession(tmp_path / "pinch.npz", poses))
+    assert (pressed, released) == ("mouseDown", "mouseUp")
+    # within the smoothing filter's lag of the pinch and the un-pinch
+    assert 20 <= down <= 22 and 40 <= up <= 42
+
+
+def test_pinch_is_released_when_the_second_hand_leaves(tmp_path):
+    poses = [PINCH] * 30
+    path = pinchSession(tmp_path / "leave.npz", poses)
+    data = dict(np.load(path))
+    data["present"][20:, 1] = False
+    np.savez_compressed(path, **data)
+    assert buttonEvents(path) == [(0, "mouseDown"), (20, "mouseUp")]
+
+
+def test_both_hands_pinched_zoom_without_pressing(tmp_path):
+    frames = [[("Right", place(PINCH, 0.3, 0.7)), ("Left", place(PINCH, 0.5 + 0.01 * i, 0.7))] for i in range(40)]
+    backend = RecordingBackend()
+    runMode("gesture", source=twoHands(tmp_path / "zoom.npz", frames), backend=backend, settings={"cursorRate": 0})
+    actions = [(action, args) for _, _, _, action, args in backend.events if action != "move"]
+    assert actions and set(actions) == {("hotkey", ("ctrl", "+"))}
+
+
+def test_open_palm_leaves_a_second_hand_press_alone(tmp_path):
+    # the pointer hand opens its palm while the other hand holds a pinch
+    aux = [PINCH if 10 <= i < 40 else POINT for i in range(50)]
+    pointer = [PALM if 20 <= i < 30 else POINT for i in range(50)]
+    (down, pressed), (up, released) = buttonEvents(pinchSession(tmp_path / "palm.npz", aux, pointer))
+    assert (pressed, released) == ("mouseDown", "mouseUp")
+    assert 10 <= down <= 12 and 40 <= up <= 42
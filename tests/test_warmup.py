@@ -0,0 +1,148 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import Sources
+from DetectorBackends import MediaPipeDetectorBackend
+from GestureModes import modeSettings
+from Warmup import DETECTOR_FIELDS, Prewarmer, detectorKey, logColdStart
+
+
+class FakeDetector():
+    """Carries the handDetector fields and a backend that passes for a MediaPipe graph."""
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.backend = MediaPipeDetectorBackend.__new__(MediaPipeDetectorBackend)
+        self.frames = 0
+        self.resets = 0
+
+    def findHands(self, img, draw=True):
+        self.frames += 1
+        return img
+
+    def reset(self):
+        self.resets += 1
+
+
+class FakeCamera():
+    opened = []
+
+    def __init__(self, index=None, width=640, height=480):
+        self.width, self.height = width, height
+        self.reads = 0
+        self.released = threading.Event()
+        FakeCamera.opened.append(self)
+
+    def read(self):
+        self.reads += 1
+        return True, None, 0.0
+
+    def release(self):
+        self.released.set()
+
+
+@pytest.fixture
+def built(monkeypatch):
+    built = []
+
+    def build(key):
+        built.append(FakeDetector(**dict(zip(DETECTOR_FIELDS, key))))
+        return built[-1]
+
+    monkeypatch.setattr(Prewarmer, "_build", staticmethod(build))
+    return built
+
+
+@pytest.fixture
+def cameras(monkeypatch):
+    FakeCamera.opened = []
+    monkeypatch.setattr(Sources, "CameraSource", FakeCamera)
+    return FakeCamera.opened
+
+
+def test_detector_key_is_the_same_for_settings_and_the_detector_built_from_them(built):
+    settings = modeSettings("gesture")
+    detector = Prewarmer().takeDetector(settings)
+    assert detectorKey(detector) == detectorKey(settings)
+    assert detectorKey(modeSettings("gaming")) != detectorKey(settings)
+
+
+def test_start_builds_and_runs_one_detector_per_distinct_config(built):
+    prewarmer = Prewarmer()
+    modes = ("gesture", "normal", "presentation", "gaming")
+    prewarmer.start(modes)
+    assert prewarmer.ready.wait(60)
+    keys = {detectorKey(modeSettings(mode)) for mode in modes}
+    assert len(built) == len(keys) == sum(len(idle) for idle in prewarmer.detectors.values())
+    # each graph saw its first frame during warm-up
+    assert all(detector.frames == 1 for detector in built)
+    assert "detector_ms" in prewarmer.timings
+
+
+def test_take_prefers_a_warm_detector_and_return_keeps_it(built):
+    prewarmer = Prewarmer()
+    settings = modeSettings("gesture")
+    first = prewarmer.takeDetector(settings)
+    assert len(built) == 1 and not prewarmer.detectors
+    prewarmer.returnDetector(first)
+    again = prewarmer.takeDetector(settings)
+    assert again is first and again.resets == 1
+    # a different config does not get it
+    prewarmer.returnDetector(first)
+    other = prewarmer.takeDetector(modeSettings("gaming"))
+    assert other is not first and len(built) == 2
+
+
+def test_return_keeps_only_mediapipe_graphs(built):
+    prewarmer = Prewarmer()
+    detector = prewarmer.takeDetector(modeSettings("gesture"))
+    detector.backend = SimpleNamespace(inner=detector.backend)  # async wrapper around MediaPipe
+    prewarmer.returnDetector(detector)
+    assert sum(len(idle) for idle in prewarmer.detectors.values()) == 1
+    replay = prewarmer.takeDetector(modeSettings("normal"))
+    replay.backend = object()
+    prewarmer.returnDetector(replay)
+    assert sum(len(idle) for idle in prewarmer.detectors.values()) == 1
+
+
+def test_take_camera_hands_over_the_warm_camera(cameras):
+    prewarmer = Prewarmer(cameraHoldTime=30)
+    prewarmer.warmCamera(640, 480)
+    camera = prewarmer.takeCamera(640, 480)
+    assert camera is cameras[0] and camera.reads == 1
+    assert not camera.released.is_set()
+    assert prewarmer.cameraTimer is None
+    assert prewarmer.takeCamera(640, 480) is None
+
+
+def test_take_camera_releases_a_mismatched_camera(cameras):
+    prewarmer = Prewarmer()
+    prewarmer.warmCamera(640, 480)
+    assert prewarmer.takeCamera(1280, 720) is None
+    assert cameras[0].released.is_set()
+
+
+def test_unclaimed_camera_is_released_after_the_hold_time(cameras):
+    prewarmer = Prewarmer(cameraHoldTime=0.1)
+    prewarmer.warmCamera()
+    prewarmer.cameraThread.join(5)
+    assert cameras[0].released.wait(5)
+    assert prewarmer.camera is None
+    assert prewarmer.takeCamera() is None
+    # the next instruction window opens it again
+    prewarmer.warmCamera()
+    assert prewarmer.takeCamera() is cameras[1]
+
+
+def test_cold_start_log_appends_one_line_per_run(userData):
+    metrics = SimpleNamespace(gauges={"setup_ms": 120.0, "firstFrame_ms": 300.0, "fps": 30.0})
+    logColdStart("gesture", metrics, warm=True)
+    logColdStart("gaming", metrics, warm=False)
+    lines = (userData / "metrics" / "coldstart.jsonl").read_text().splitlines()
+    entries = [json.loads(line) for line in lines]
+    assert [(e["mode"], e["warm"]) for e in entries] == [("gesture", True), ("gaming", False)]
+    assert entries[0]["setup_ms"] == 120.0 and "fps" not in entries[0]
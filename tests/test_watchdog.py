@@ -0,0 +1,82 @@
+import time
+
+from Backends import RecordingBackend
+from doubles import DelayedBackend, DelayedDetector, DelayedSource
+from Pipeline import PipelineHooks, runMode
+from Watchdog import PipelineWatchdog
+
+
+def run(source, detector, backend, watchdog):
+    return runMode("gesture", source=source, backend=backend, detector=detector,
+                   settings={"cursorRate": 0}, hooks=PipelineHooks(watchdog=watchdog))
+
+
+def test_stalled_stages_are_flagged_and_restarted():
+    events = []
+    watchdog = PipelineWatchdog(stallTimeout=0.3, abandonTimeout=30.0, checkInterval=0.05,
+                                onEvent=lambda kind, message: events.append(kind))
+    source = DelayedSource(frames=60, delays={10: 0.8})
+    detector = DelayedDetector(delays={25: 0.8})
+    backend = DelayedBackend(delays={40: 0.8})
+    t0 = time.perf_counter()
+    metrics = run(source, detector, backend, watchdog)
+    elapsed = time.perf_counter() - t0
+
+    assert watchdog.stalls == 3
+    assert events.count("stall") == 3
+    assert events.count("recovered") == 3
+    # the source is reopened on the pipeline thread once the stalled read returns
+    assert source.restarts == 1
+    assert elapsed < 60 / 30.0 + 3 * 0.8 + 1.5
+    assert detector.restarts == 1
+    assert backend.counts().get("mouseUp", 0) >= 3
+    assert metrics.frames == 60
+    counters = metrics.summary()["counters"]
+    assert counters["stalls"] == 3
+    assert counters["stall.capture"] == counters["stall.detect"] == counters["stall.act"] == 1
+
+
+def test_hang_past_abandon_timeout_gives_up_the_pipeline():
+    events = []
+    watchdog = PipelineWatchdog(stallTimeout=0.3, abandonTimeout=0.8, checkInterval=0.05,
+                                onEvent=lambda kind, message: events.append(kind))
+    backend = RecordingBackend()
+    metrics = run(DelayedSource(frames=60), DelayedDetector(delays={10: 1.5}), backend, watchdog)
+    assert watchdog.abandoned
+    assert events[-1] == "abandoned"
+    # the stuck thread leaves as soon as it wakes, without acting on the frame
+    assert metrics.frames == 10
+    assert backend.counts().get("mouseUp", 0) >= 2
+
+
+def test_launch_hooks_dump_the_flight_recorder_on_a_stall(monkeypatch):
+    hooks = PipelineHooks.forLaunch("gesture")
+    triggered = []
+    monkeypatch.setattr(hooks.flight, "trigger", triggered.append)
+    hooks.watchdog.stallTimeout = 0.3
+    hooks.watchdog.checkInterval = 0.05
+    hooks.close()
+    run(DelayedSource(frames=20, delays={5: 0.8}), DelayedDetector(), RecordingBackend(), hooks.watchdog)
+    assert triggered == ["watchdog stall"]
+
+
+def test_camera_restart_happens_on_the_reading_thread(monkeypatch):
+    import threading
+
+    import Sources
+    from CaptureNegotiator import SimulatedCapture
+
+    opened = []
+    monkeypatch.setattr(Sources.cv2, "VideoCapture", lambda index: opened.append(SimulatedCapture()) or opened[-1])
+    source = Sources.CameraSource(0, negotiate=False)
+    first = source.cap
+    # the watchdog only asks; the capture the reader may be blocked in is left alone
+    requester = threading.Thread(target=source.requestRestart)
+    requester.start()
+    requester.join()
+    assert source.cap is first and first.isOpened()
+    success, _, _ = source.read()
+    assert success
+    assert not first.isOpened() and source.cap is opened[-1] and source.cap.isOpened()
+    assert not source.restartRequested
+    source.release()